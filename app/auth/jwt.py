@@ -1,8 +1,14 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 
+from app.cache import TTLCache
+from app.database import get_pool, PoolTimeout
+from app.notify import nasluch
+
 # -------------------- JWT konfiguracja --------------------
 SECRET_KEY = "betya_secret_message"
 ALGORITHM = "HS256"
@@ -10,6 +16,20 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 oauth2_scheme = HTTPBearer()
 
+# Rola użytkownika przy każdym sprawdzeniu uprawnień administratora (dostęp do cudzych danych,
+# usuwanie) - claim 'rola' z tokena żyje 60 minut i nie widzi odebrania uprawnień.
+# Także wtedy, gdy token nie ma claimu 'rola' (wydany przed jego dodaniem).
+# Zmianę roli w bazie wyzwalacz ogłasza przez NOTIFY 'zmiany_rol' - każdy worker usuwa wpis od razu,
+# a TTL ogranicza nieaktualność, gdy nasłuch nie działa.
+ROLE_CACHE_TTL = 60
+_role = TTLCache(ttl=ROLE_CACHE_TTL, maxsize=10_000)
+
+
+@dataclass(frozen=True)
+class AktualnyUzytkownik:
+    id: int
+    rola: str
+
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta
@@ -26,3 +46,84 @@ def get_current_user_id(token: HTTPAuthorizationCredentials = Depends(oauth2_sch
         return uzytkownik_id
     except JWTError:
         raise HTTPException(status_code=401, detail="Błędny token JWT - signature jest niepoprawny")
+
+
+def pobierz_role(user_id: int, cur=None) -> str:
+    """
+    Rola użytkownika z cache (TTL), a przy braku wpisu - z bazy.
+    `cur` - kursor połączenia, które endpoint już trzyma; bez niego połączenie jest brane z puli.
+    """
+    rola = _role.get(user_id)
+    if rola is not None:
+        return rola
+
+    if cur is not None:
+        cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
+        row = cur.fetchone()
+    else:
+        pool = get_pool()
+        try:
+            conn = pool.getconn()
+        except PoolTimeout:
+            raise HTTPException(status_code=503, detail="Serwer jest przeciążony - spróbuj ponownie za chwilę")
+        try:
+            with conn.cursor() as c:
+                c.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
+                row = c.fetchone()
+        finally:
+            pool.putconn(conn)
+
+    rola = row[0] if row else 'user'
+    _role.set(user_id, rola)
+    return rola
+
+
+async def pobierz_role_async(user_id: int, cur) -> str:
+    """pobierz_role dla routera async (kursor psycopg 3) - ten sam cache."""
+    rola = _role.get(user_id)
+    if rola is not None:
+        return rola
+
+    await cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
+    row = await cur.fetchone()
+    rola = row[0] if row else 'user'
+    _role.set(user_id, rola)
+    return rola
+
+
+def zapamietaj_role(user_id: int, rola: str):
+    _role.set(user_id, rola)
+
+
+def uniewaznij_role(user_id: Optional[int] = None):
+    """Usuwa rolę użytkownika (albo wszystkich) z cache po zmianie w bazie."""
+    if user_id is None:
+        _role.clear()
+    else:
+        _role.usun(user_id)
+
+
+nasluch.subskrybuj("zmiany_rol", lambda payload: uniewaznij_role(int(payload)))
+nasluch.przy_polaczeniu(uniewaznij_role)
+
+
+def uzytkownik_z_tokenu(token: str) -> AktualnyUzytkownik:
+    """ID i rola z podpisanych claimów tokena (bez zapytania do bazy). Błąd -> HTTPException 401."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Błędny token JWT - signature jest niepoprawny")
+
+    uzytkownik_id = payload.get("uzytkownik_id")
+    if uzytkownik_id is None:
+        raise HTTPException(status_code=401, detail="Nieprawidłowy token JWT: brak pola 'uzytkownik_id'.")
+
+    rola = payload.get("rola")
+    if rola is None:
+        rola = pobierz_role(uzytkownik_id)
+    return AktualnyUzytkownik(id=uzytkownik_id, rola=rola)
+
+
+def get_current_user(token: HTTPAuthorizationCredentials = Depends(oauth2_scheme)) -> AktualnyUzytkownik:
+    """Zwraca ID i rolę zalogowanego użytkownika z nagłówka Authorization: Bearer."""
+    return uzytkownik_z_tokenu(token.credentials)
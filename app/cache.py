@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Prosty słownik z czasem życia wpisów, bezpieczny dla wątków (routery synchroniczne
+    działają w threadpoolu). Każdy worker ma własną kopię - przy kilku workerach
+    dane mogą być nieaktualne najwyżej przez `ttl` sekund.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._dane = {}
+        self._lock = threading.Lock()
+
+    def get(self, klucz):
+        """Zwraca zapisaną wartość albo None, jeśli jej nie ma lub wygasła."""
+        with self._lock:
+            wpis = self._dane.get(klucz)
+            if wpis is None:
+                return None
+            wygasa, wartosc = wpis
+            if wygasa < time.monotonic():
+                del self._dane[klucz]
+                return None
+            return wartosc
+
+    def set(self, klucz, wartosc):
+        with self._lock:
+            teraz = time.monotonic()
+            if klucz not in self._dane and len(self._dane) >= self.maxsize:
+                # najpierw wygasłe, a jeśli nie ma - najstarszy wpis
+                for k in [k for k, (wygasa, _) in self._dane.items() if wygasa < teraz]:
+                    del self._dane[k]
+                if len(self._dane) >= self.maxsize:
+                    del self._dane[next(iter(self._dane))]
+            self._dane[klucz] = (teraz + self.ttl, wartosc)
+
+    def usun(self, klucz):
+        with self._lock:
+            self._dane.pop(klucz, None)
+
+    def usun_gdzie(self, warunek):
+        """Usuwa wpisy, których klucz spełnia warunek."""
+        with self._lock:
+            for k in [k for k in self._dane if warunek(k)]:
+                del self._dane[k]
+
+    def clear(self):
+        with self._lock:
+            self._dane.clear()
+
+
+class LRUCache:
+    """
+    Cache LRU wartości bajtowych (np. zserializowany JSON) ograniczony liczbą wpisów
+    i łączną liczbą bajtów. Bezpieczny dla wątków; liczy trafienia, chybienia i usunięcia.
+
+    Unieważnienia mogą przyjść w trakcie liczenia wartości do zapisania (odczyt z bazy
+    sprzed zmiany). Dlatego set() dostaje wynik znacznik() pobrany PRZED odczytem
+    i pomija zapis, jeśli od tego czasu cokolwiek unieważniono.
+    """
+
+    def __init__(self, max_wpisow: int, max_bajtow: int):
+        self.max_wpisow = max_wpisow
+        self.max_bajtow = max_bajtow
+        self._dane = OrderedDict()
+        self._bajty = 0
+        self._uniewaznienia = 0
+        self._lock = threading.Lock()
+        self.trafienia = 0
+        self.chybienia = 0
+        self.wyparcia = 0
+        self.usuniecia = 0
+
+    def get(self, klucz):
+        with self._lock:
+            wpis = self._dane.get(klucz)
+            if wpis is None:
+                self.chybienia += 1
+                return None
+            self._dane.move_to_end(klucz)
+            self.trafienia += 1
+            return wpis[0]
+
+    def znacznik(self) -> int:
+        with self._lock:
+            return self._uniewaznienia
+
+    def set(self, klucz, wartosc, rozmiar: int, znacznik: int) -> bool:
+        """Zapisuje wartość o rozmiarze `rozmiar` bajtów. Zwraca False, jeśli zapis pominięto."""
+        if rozmiar > self.max_bajtow:
+            return False
+        with self._lock:
+            if znacznik != self._uniewaznienia:
+                return False
+            self._usun(klucz)
+            self._dane[klucz] = (wartosc, rozmiar)
+            self._bajty += rozmiar
+            while len(self._dane) > self.max_wpisow or self._bajty > self.max_bajtow:
+                _, (_, r) = self._dane.popitem(last=False)
+                self._bajty -= r
+                self.wyparcia += 1
+            return True
+
+    def _usun(self, klucz) -> bool:
+        wpis = self._dane.pop(klucz, None)
+        if wpis is None:
+            return False
+        self._bajty -= wpis[1]
+        return True
+
+    def uniewaznij(self, klucz):
+        with self._lock:
+            self._uniewaznienia += 1
+            if self._usun(klucz):
+                self.usuniecia += 1
+
+    def clear(self):
+        with self._lock:
+            self._uniewaznienia += 1
+            self.usuniecia += len(self._dane)
+            self._dane.clear()
+            self._bajty = 0
+
+    def statystyki(self) -> dict:
+        with self._lock:
+            zapytania = self.trafienia + self.chybienia
+            return {
+                "wpisy": len(self._dane),
+                "bajty": self._bajty,
+                "max_wpisow": self.max_wpisow,
+                "max_bajtow": self.max_bajtow,
+                "trafienia": self.trafienia,
+                "chybienia": self.chybienia,
+                "wspolczynnik_trafien": round(self.trafienia / zapytania, 4) if zapytania else None,
+                "wyparcia": self.wyparcia,
+                "usuniecia": self.usuniecia,
+            }
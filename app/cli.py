@@ -0,0 +1,180 @@
+"""
+Polecenia administracyjne backendu.
+
+Uruchomienie (zmienne DB_* jak dla backendu):
+    python -m app.cli migruj
+    python -m app.cli przebuduj-agregaty [--zadanie-id ID]
+    python -m app.cli przebuduj-ranking [--wyzwanie-id ID]
+    python -m app.cli przebuduj-serie [--wyzwanie-id ID]
+    python -m app.cli sprawdz-statystyki [--napraw]
+    python -m app.cli czysc-zdarzenia [--dni N]
+    python -m app.cli archiwizuj [--dni N] [--porcja N]
+"""
+import argparse
+import sys
+
+from app.database import get_connection
+from app.migrate import migruj, MigrationError
+
+
+def migracje(args):
+    """Stosuje brakujące migracje schematu (app/migrations)."""
+    try:
+        zastosowane = migruj()
+    except MigrationError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Zastosowano migracje: {zastosowane}" if zastosowane else "✅ Schemat bazy aktualny")
+
+
+def przebuduj_agregaty(args):
+    """Odtwarza agregat_progresu_dziennego z surowych tabel progresu, a po nim ranking i serie."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT fn_przebuduj_agregat_progresu(%s)", (args.zadanie_id,))
+            liczba = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    zakres = f"zadania {args.zadanie_id}" if args.zadanie_id is not None else "wszystkich zadań"
+    print(f"✅ Przebudowano agregat progresu dla {zakres}: {liczba} wierszy")
+
+
+def przebuduj_ranking(args):
+    """Odtwarza klasyfikacja_wyzwan (ranking) z agregatu progresu."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT fn_przebuduj_klasyfikacje(%s)", (args.wyzwanie_id,))
+            liczba = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    zakres = f"wyzwania {args.wyzwanie_id}" if args.wyzwanie_id is not None else "wszystkich wyzwań"
+    print(f"✅ Przebudowano ranking {zakres}: {liczba} uczestników")
+
+
+def przebuduj_serie(args):
+    """Odtwarza serie_zadan (i dni_ukonczone) z agregatu progresu."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT fn_przebuduj_serie(%s)", (args.wyzwanie_id,))
+            liczba = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    zakres = f"wyzwania {args.wyzwanie_id}" if args.wyzwanie_id is not None else "wszystkich wyzwań"
+    print(f"✅ Przebudowano serie {zakres}: {liczba} wierszy")
+
+
+def sprawdz_statystyki(args):
+    """Porównuje liczniki statystyki_uzytkownikow z tabelą znajomi (--napraw poprawia rozbieżności)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM fn_sprawdz_statystyki_uzytkownikow(%s)", (args.napraw,))
+            rozbieznosci = cur.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+
+    for uzytkownik_id, znajomi, poprawni, oczekujace, poprawne in rozbieznosci:
+        print(f"… użytkownik {uzytkownik_id}: znajomi {znajomi} → {poprawni}, oczekujące {oczekujace} → {poprawne}")
+    if not rozbieznosci:
+        print("✅ Liczniki znajomych są zgodne")
+    elif args.napraw:
+        print(f"✅ Naprawiono liczniki znajomych: {len(rozbieznosci)} użytkowników")
+    else:
+        print(f"⚠️ Rozbieżne liczniki znajomych: {len(rozbieznosci)} użytkowników (użyj --napraw)")
+        return 1
+    return 0
+
+
+def czysc_zdarzenia(args):
+    """Usuwa z dziennika zdarzenia_uzytkownikow wpisy starsze niż --dni (strumień /events)."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT fn_wyczysc_zdarzenia(make_interval(days => %s))", (args.dni,))
+            liczba = cur.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"✅ Usunięto zdarzenia starsze niż {args.dni} dni: {liczba}")
+
+
+def archiwizuj(args):
+    """
+    Przenosi zakończone wyzwania czasowe do tabel *_archiwum (0012_archiwum_wyzwan.sql).
+    Porcjami po --porcja wyzwań, każda porcja w osobnej transakcji.
+    """
+    conn = get_connection()
+    razem = 0
+    try:
+        while True:
+            with conn.cursor() as cur:
+                cur.execute("SELECT fn_archiwizuj_wyzwania(%s, make_interval(days => %s))",
+                            (args.porcja, args.dni))
+                liczba = cur.fetchone()[0]
+            conn.commit()
+            if liczba == 0:
+                break
+            razem += liczba
+            print(f"… zarchiwizowano {razem}")
+    finally:
+        conn.close()
+
+    print(f"✅ Zarchiwizowano wyzwania zakończone ponad {args.dni} dni temu: {razem}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Polecenia administracyjne BetYa")
+    polecenia = parser.add_subparsers(dest="polecenie", required=True)
+
+    p = polecenia.add_parser("migruj", help="stosuje brakujące migracje schematu")
+    p.set_defaults(funkcja=migracje)
+
+    p = polecenia.add_parser("przebuduj-agregaty", help="przebudowuje agregat dziennego progresu")
+    p.add_argument("--zadanie-id", type=int, default=None,
+                   help="tylko jedno zadanie (domyślnie cała tabela)")
+    p.set_defaults(funkcja=przebuduj_agregaty)
+
+    p = polecenia.add_parser("przebuduj-ranking", help="przelicza ranking uczestników wyzwań")
+    p.add_argument("--wyzwanie-id", type=int, default=None,
+                   help="tylko jedno wyzwanie (domyślnie wszystkie)")
+    p.set_defaults(funkcja=przebuduj_ranking)
+
+    p = polecenia.add_parser("przebuduj-serie", help="przelicza serie (streaks) uczestników wyzwań")
+    p.add_argument("--wyzwanie-id", type=int, default=None,
+                   help="tylko jedno wyzwanie (domyślnie wszystkie)")
+    p.set_defaults(funkcja=przebuduj_serie)
+
+    p = polecenia.add_parser("sprawdz-statystyki", help="sprawdza liczniki znajomych i oczekujących zaproszeń")
+    p.add_argument("--napraw", action="store_true",
+                   help="poprawia rozbieżne liczniki (domyślnie tylko raport)")
+    p.set_defaults(funkcja=sprawdz_statystyki)
+
+    p = polecenia.add_parser("czysc-zdarzenia", help="usuwa stare wpisy dziennika zdarzeń użytkowników")
+    p.add_argument("--dni", type=int, default=7,
+                   help="zostawia zdarzenia z ostatnich N dni (domyślnie 7)")
+    p.set_defaults(funkcja=czysc_zdarzenia)
+
+    p = polecenia.add_parser("archiwizuj", help="przenosi zakończone wyzwania czasowe do archiwum")
+    p.add_argument("--dni", type=int, default=30,
+                   help="tylko wyzwania zakończone ponad N dni temu (domyślnie 30)")
+    p.add_argument("--porcja", type=int, default=50,
+                   help="liczba wyzwań na transakcję (domyślnie 50)")
+    p.set_defaults(funkcja=archiwizuj)
+
+    args = parser.parse_args(argv)
+    return args.funkcja(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Szybkie odpowiedzi JSON dla najczęściej wołanych endpointów.
+
+Zwykła ścieżka FastAPI: wiersze -> model Pydantic na każdy wiersz -> walidacja względem
+response_model -> serializacja. Endpointy list i szczegółów wyzwania zwracają zamiast tego
+gotowy Response, więc walidacja i druga serializacja są pomijane. response_model zostaje
+w dekoratorze tylko dla OpenAPI - budowane tu słowniki muszą mieć jego kształt
+(porównuje to benchmarks/bench_serializacja.py).
+"""
+import orjson
+from fastapi import Response
+
+
+def odpowiedz_json(tresc, status_code: int = 200, headers=None) -> Response:
+    """Serializuje słowniki/listy (także datetime) jednym wywołaniem orjson."""
+    return Response(content=orjson.dumps(tresc), status_code=status_code,
+                    media_type="application/json", headers=headers)
+
+
+def koperta_json(dane: str, status: str = "success", message=None, serie=None) -> bytes:
+    """
+    Owija JSON zbudowany w bazie (tekst, bez parsowania) w {"status", "data", "message", "serie"}
+    - kształt WyzwanieResponse. serie - lista słowników (GET /wyzwania/{id}?serie=true) albo None.
+    """
+    return b"".join((
+        b'{"status":', orjson.dumps(status),
+        b',"data":', dane.encode("utf-8"),
+        b',"message":', orjson.dumps(message),
+        b',"serie":', orjson.dumps(serie),
+        b"}",
+    ))
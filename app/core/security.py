@@ -1,13 +1,108 @@
+"""
+Hashowanie i weryfikacja haseł (bcrypt) w osobnej puli procesów.
+
+bcrypt przy koszcie 12 to ~250 ms czystego CPU. W wątkach requestów blokowałby threadpool
+i konkurował z resztą API, dlatego liczą go procesy robocze (rdzenie podzielone między workery uvicorn),
+a liczba zleceń w locie jest ograniczona - nadmiar dostaje od razu 503 zamiast czekać w kolejce.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 import bcrypt
+from fastapi import HTTPException
+
+# Koszt (work factor) nowych hashy. Hasła z innym kosztem są przeliczane przy logowaniu.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Procesy robocze na proces uvicorn. Każdy worker ma własną pulę, więc domyślnie dzielimy
+# rdzenie przez liczbę workerów (WEB_CONCURRENCY - ta sama zmienna, z której uvicorn
+# bierze --workers) - razem najwyżej tyle procesów hashujących, ile rdzeni.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))))
+# Maksymalna liczba zleceń w locie (liczonych i czekających) na proces uvicorn
+HASH_MAX_W_KOLEJCE = int(os.getenv("HASH_MAX_W_KOLEJCE", str(HASH_WORKERS * 4)))
+
+
+# ---------- funkcje wykonywane w procesach roboczych ----------
+
+def _hashuj(haslo: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(haslo, bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _sprawdz(haslo: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(haslo, hashed)
+
+
+# ---------- pula procesów ----------
+
+_executor = None
+_executor_pid = None
+_miejsca = None
+_lock = threading.Lock()
+
+
+def _pula():
+    """Pula bieżącego procesu (po fork'u workera uvicorn tworzona jest nowa)."""
+    global _executor, _executor_pid, _miejsca
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _lock:
+            if _executor is None or _executor_pid != pid:
+                # spawn: proces roboczy nie dziedziczy wątków ani połączeń z bazą
+                _executor = ProcessPoolExecutor(
+                    max_workers=HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                _miejsca = threading.BoundedSemaphore(HASH_MAX_W_KOLEJCE)
+                _executor_pid = pid
+    return _executor, _miejsca
+
+
+def zamknij_pule_hashowania():
+    global _executor
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _zlec(funkcja, *args):
+    executor, miejsca = _pula()
+    if not miejsca.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Serwer jest przeciążony - spróbuj ponownie za chwilę",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = executor.submit(funkcja, *args)
+    except BaseException:
+        miejsca.release()
+        raise
+    future.add_done_callback(lambda _: miejsca.release())
+    return await asyncio.wrap_future(future)
+
+
+# ---------- API ----------
+
+async def hashuj_haslo(haslo: str) -> str:
+    """Hash bcrypt hasła z kosztem BCRYPT_ROUNDS."""
+    return await _zlec(_hashuj, haslo.encode("utf-8"), BCRYPT_ROUNDS)
+
+
+async def sprawdz_haslo(haslo: str, hashed: str) -> bool:
+    return await _zlec(_sprawdz, haslo.encode("utf-8"), hashed.encode("utf-8"))
+
 
-# Hasło jako bytes
-password = b"user"  # musi być typu bytes
-# Tworzymy hash
-hashed = bcrypt.hashpw(password, bcrypt.gensalt())
+def koszt_hasha(hashed: str) -> int:
+    """Koszt zapisany w hashu bcrypt ($2b$12$...)."""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
 
-# Weryfikacja hasła
-def verify_password(plain_password: str, hashed_password: bytes) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
 
-print("Hashed:", hashed)
-print("Weryfikacja (user):", verify_password("user", hashed))
+def wymaga_przeliczenia(hashed: str) -> bool:
+    return koszt_hasha(hashed) != BCRYPT_ROUNDS
@@ -0,0 +1,161 @@
+"""
+Czyszczenie usuniętych wyzwań w wątku tła - jeden na proces uvicorn.
+
+DELETE /wyzwania/ tylko ukrywa wyzwania (fn_miekko_usun_wyzwania, jeden UPDATE) i zakłada
+zlecenie w usuwanie_wyzwan. Ten wątek usuwa potem progres, zadania i uczestników porcjami
+(fn_usun_porcje_wyzwan) - każda porcja to osobna krótka transakcja, więc nie trzyma długo
+blokad ani nie zajmuje wątku requestu.
+
+Przy kilku workerach zlecenie wykonuje ten, który zdobędzie pg_try_advisory_lock.
+Zlecenia przerwane restartem są podejmowane przy starcie i co SKANUJ_CO sekund.
+"""
+import os
+import queue
+import threading
+
+import psycopg2
+
+from app.database import DATABASE_CONFIG, POOL_CONFIG
+
+# ile wierszy usuwa jedna transakcja
+ROZMIAR_PORCJI = int(os.getenv("CZYSZCZENIE_PORCJA", "1000"))
+# przerwa między porcjami (sekundy) - oddaje bazę zwykłemu ruchowi
+PRZERWA_PORCJI = float(os.getenv("CZYSZCZENIE_PRZERWA", "0.05"))
+# co ile sekund szukamy zleceń bez wykonawcy (np. po restarcie innego workera)
+SKANUJ_CO = 60
+# przerwa po błędzie połączenia / porcji
+PRZERWA_PO_BLEDZIE = 5
+
+# Klucz pg_advisory_lock zlecenia = KLUCZ_BLOKADY + id zlecenia. Pojedynczy klucz bigint
+# to inna przestrzeń niż blokady (int, int) wyzwalaczy agregatu (uczestnik, zadanie),
+# a baza jest daleko od klucza migracji (app/migrate.py) - nie blokują się nawzajem.
+KLUCZ_BLOKADY = 7_362_850_210_000_000
+
+
+class CzyszczenieWyzwan:
+    def __init__(self):
+        self._kolejka = queue.Queue()
+        self._watek = None
+        self._stop = threading.Event()
+        self.usuniete_wiersze = 0
+        self.zakonczone_zlecenia = 0
+
+    def zlec(self, zadanie_id: int):
+        """Budzi wątek dla nowego zlecenia (zapisanego już w usuwanie_wyzwan)."""
+        self._kolejka.put(zadanie_id)
+
+    def start(self):
+        if self._watek is not None and self._watek.is_alive():
+            return
+        self._stop.clear()
+        self._watek = threading.Thread(target=self._petla, name="czyszczenie-wyzwan", daemon=True)
+        self._watek.start()
+
+    def stop(self):
+        self._stop.set()
+        self._kolejka.put(None)
+        if self._watek is not None:
+            self._watek.join(timeout=5)
+            self._watek = None
+
+    def statystyki(self) -> dict:
+        return {
+            "dziala": self._watek is not None and self._watek.is_alive(),
+            "w_kolejce": self._kolejka.qsize(),
+            "usuniete_wiersze": self.usuniete_wiersze,
+            "zakonczone_zlecenia": self.zakonczone_zlecenia,
+        }
+
+    # ---------- wątek ----------
+
+    def _polacz(self):
+        return psycopg2.connect(connect_timeout=POOL_CONFIG["connect_timeout"], **DATABASE_CONFIG)
+
+    def _petla(self):
+        conn = None
+        skanuj = True
+        while not self._stop.is_set():
+            try:
+                if conn is None or conn.closed:
+                    conn = self._polacz()
+                    skanuj = True
+
+                if skanuj:
+                    skanuj = False
+                    for zadanie_id in self._niezakonczone(conn):
+                        self._kolejka.put(zadanie_id)
+
+                try:
+                    zadanie_id = self._kolejka.get(timeout=SKANUJ_CO)
+                except queue.Empty:
+                    skanuj = True
+                    continue
+                if zadanie_id is None:
+                    continue
+
+                self._wykonaj(conn, zadanie_id)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print(f"⚠️ Czyszczenie wyzwań przerwane: {e}. Ponowna próba za {PRZERWA_PO_BLEDZIE} s")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+                self._stop.wait(PRZERWA_PO_BLEDZIE)
+
+        if conn is not None:
+            conn.close()
+
+    def _niezakonczone(self, conn):
+        with conn.cursor() as cur:
+            cur.execute("SELECT id FROM usuwanie_wyzwan WHERE status <> 'zakonczone' ORDER BY id")
+            ids = [r[0] for r in cur.fetchall()]
+        conn.commit()
+        return ids
+
+    def _wykonaj(self, conn, zadanie_id: int):
+        # blokada sesyjna - trwa między porcjami, zwalniana na końcu (albo z zerwanym połączeniem)
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (KLUCZ_BLOKADY + zadanie_id,))
+            if not cur.fetchone()[0]:
+                conn.commit()
+                return  # wykonuje je inny worker
+        conn.commit()
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT fn_usun_porcje_wyzwan(%s, %s)", (zadanie_id, ROZMIAR_PORCJI))
+                        liczba = cur.fetchone()[0]
+                    conn.commit()
+                except psycopg2.DatabaseError as e:
+                    if conn.closed:
+                        raise
+                    conn.rollback()
+                    self._zapisz_blad(conn, zadanie_id, e)
+                    # zlecenie wraca przy najbliższym skanowaniu
+                    return
+
+                if liczba == 0:
+                    self.zakonczone_zlecenia += 1
+                    return
+                self.usuniete_wiersze += liczba
+                self._stop.wait(PRZERWA_PORCJI)
+        finally:
+            if not conn.closed:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (KLUCZ_BLOKADY + zadanie_id,))
+                conn.commit()
+
+    def _zapisz_blad(self, conn, zadanie_id: int, blad: Exception):
+        print(f"⚠️ Błąd czyszczenia (zlecenie {zadanie_id}): {blad}")
+        with conn.cursor() as cur:
+            cur.execute("UPDATE usuwanie_wyzwan SET blad = %s WHERE id = %s", (str(blad), zadanie_id))
+        conn.commit()
+
+
+czyszczenie = CzyszczenieWyzwan()
@@ -1,7 +1,9 @@
 import psycopg2
-from pathlib import Path
+import psycopg2.extensions
+from fastapi import HTTPException
 from dotenv import load_dotenv
 import os
+import threading
 import time
 
 load_dotenv()
@@ -14,6 +16,24 @@ DATABASE_CONFIG = {
     "port": os.getenv("DB_PORT"),
 }
 
+# -------------------- Pula połączeń - konfiguracja --------------------
+# Wartości dotyczą JEDNEGO procesu uvicorn (każdy worker ma własną pulę),
+# więc DB_POOL_MAX * liczba workerów musi zmieścić się w max_connections Postgresa.
+POOL_CONFIG = {
+    "minconn": int(os.getenv("DB_POOL_MIN", "2")),
+    "maxconn": int(os.getenv("DB_POOL_MAX", "10")),
+    # ile sekund request może czekać na wolne połączenie
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    # połączenia bezczynne dłużej niż tyle sekund są zamykane (powyżej minconn)
+    "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+    # maksymalny czas życia połączenia - potem jest wymieniane na nowe
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+    # połączenie bezczynne dłużej niż tyle sekund jest sprawdzane (SELECT 1) przy wydaniu
+    "check_after": float(os.getenv("DB_POOL_CHECK_AFTER", "30")),
+    "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+}
+
+
 def get_connection():
     # return psycopg2.connect(**DATABASE_CONFIG)
     for i in range(20):
@@ -23,26 +43,227 @@ def get_connection():
         except psycopg2.OperationalError:
             print(f"Baza danych nie gotowa, próba {i+1}/20. Czekam 2 sekundy...")
             time.sleep(2)
-        raise Exception("Nie udało się połączyć z bazą danych po 20 próbach")
+    raise Exception("Nie udało się połączyć z bazą danych po 20 próbach")
+
+
+class PoolTimeout(Exception):
+    """Brak wolnego połączenia w puli w zadanym czasie."""
+
+
+class ConnectionPool:
+    """
+    Pula połączeń psycopg2 współdzielona przez wątki jednego procesu.
+
+    - min/max liczba połączeń,
+    - limit czasu oczekiwania na połączenie (PoolTimeout),
+    - zamykanie połączeń bezczynnych i zbyt starych,
+    - sprawdzanie połączenia przy wydaniu, jeśli długo leżało w puli,
+    - rollback otwartej transakcji przy zwrocie.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, max_idle, max_lifetime, check_after,
+                 connect_timeout, **connect_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Niepoprawny rozmiar puli połączeń")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._connect_kwargs = dict(connect_kwargs, connect_timeout=connect_timeout)
+
+        # wolne połączenia: lista (conn, czas_utworzenia, czas_ostatniego_zwrotu)
+        self._idle = []
+        # czas utworzenia każdego połączenia (wydanego lub wolnego)
+        self._created = {}
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    # ---------- tworzenie / zamykanie ----------
+
+    def _connect(self):
+        return psycopg2.connect(**self._connect_kwargs)
+
+    def _discard(self, conn):
+        """Zamyka połączenie i zwalnia jego miejsce w puli. Wywoływane pod blokadą."""
+        self._created.pop(id(conn), None)
+        self._size -= 1
+        self._cond.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def open(self):
+        """Otwiera minconn połączeń (rozgrzanie puli przy starcie workera)."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._created[id(conn)] = now
+                self._idle.append((conn, now, now))
+                self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            for conn, _, _ in idle:
+                self._discard(conn)
+            self._cond.notify_all()
+
+    # ---------- wydawanie / zwracanie ----------
+
+    def _expired(self, created, last_used, now):
+        if now - created > self.max_lifetime:
+            return True
+        return now - last_used > self.max_idle and self._size > self.minconn
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("Pula połączeń jest zamknięta")
+
+                    now = time.monotonic()
+                    # najpierw najświeższe wolne połączenie (LIFO) - stare same wygasną
+                    while self._idle:
+                        candidate, created, last_used = self._idle.pop()
+                        if candidate.closed or self._expired(created, last_used, now):
+                            self._discard(candidate)
+                            continue
+                        conn = candidate
+                        break
+                    if conn is not None:
+                        break
+
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        break
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"Brak wolnego połączenia w puli po {self.timeout} s"
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created[id(conn)] = time.monotonic()
+                return conn
+
+            # sprawdzamy tylko połączenia, które długo leżały w puli
+            if now - last_used < self.check_after or self._healthy(conn):
+                return conn
+
+            with self._cond:
+                self._discard(conn)
+
+    def putconn(self, conn):
+        broken = conn.closed != 0
+        if not broken:
+            try:
+                status = conn.get_transaction_status()
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    broken = True
+                elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+        with self._cond:
+            if broken or self._closed or id(conn) not in self._created:
+                self._discard(conn)
+                return
+            now = time.monotonic()
+            self._idle.append((conn, self._created[id(conn)], now))
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"rozmiar": self._size, "wolne": len(self._idle), "max": self.maxconn}
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Zwraca pulę bieżącego procesu (po fork'u workera tworzona jest nowa)."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool(**POOL_CONFIG, **DATABASE_CONFIG)
+                _pool_pid = pid
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+
 
 # Dependency dla FastAPI
 def get_db():
-    conn = get_connection()
+    pool = get_pool()
+    try:
+        conn = pool.getconn()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Serwer jest przeciążony - spróbuj ponownie za chwilę")
     try:
         yield conn
     finally:
-        conn.close()
+        # putconn wycofuje niezatwierdzoną transakcję przed oddaniem do puli
+        pool.putconn(conn)
 
 def init_db():
-    sql_file = Path(__file__).parent / "models.sql"
-    with open(sql_file, "r", encoding="utf-8") as f:
-        sql_code = f.read()
+    """Doprowadza schemat do bieżącej wersji (app/migrations, patrz app/migrate.py)."""
+    from app.migrate import migruj
 
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(sql_code)
-            conn.commit()
-        print("✅ Tabele zostały utworzone / sprawdzone")
-    finally:
-        conn.close()
+    zastosowane = migruj()
+    if zastosowane:
+        print(f"✅ Zastosowano migracje: {zastosowane}")
+    else:
+        print("✅ Schemat bazy aktualny")
@@ -0,0 +1,63 @@
+from fastapi import HTTPException
+import psycopg
+from psycopg import pq
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+import os
+
+from app.database import DATABASE_CONFIG, POOL_CONFIG
+
+# "sync" - routery na psycopg2 w threadpoolu Starlette (domyślnie)
+# "async" - gorące endpointy wyzwań obsługiwane przez routers/wyzwania_async.py
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+_pool: AsyncConnectionPool | None = None
+
+
+def _conninfo() -> str:
+    return make_conninfo(**{k: v for k, v in DATABASE_CONFIG.items() if v})
+
+
+async def open_async_pool():
+    """Tworzy i otwiera asynchroniczną pulę połączeń (psycopg 3) dla tego workera."""
+    global _pool
+    if _pool is not None:
+        return
+    _pool = AsyncConnectionPool(
+        _conninfo(),
+        min_size=POOL_CONFIG["minconn"],
+        max_size=POOL_CONFIG["maxconn"],
+        timeout=POOL_CONFIG["timeout"],
+        max_idle=POOL_CONFIG["max_idle"],
+        max_lifetime=POOL_CONFIG["max_lifetime"],
+        kwargs={"connect_timeout": POOL_CONFIG["connect_timeout"]},
+        open=False,
+    )
+    await _pool.open()
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+# Dependency dla FastAPI (wersja async)
+async def get_async_db():
+    if _pool is None:
+        raise HTTPException(status_code=503, detail="Asynchroniczna pula połączeń nie jest uruchomiona")
+    try:
+        conn = await _pool.getconn()
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Serwer jest przeciążony - spróbuj ponownie za chwilę")
+    try:
+        yield conn
+    finally:
+        try:
+            if conn.info.transaction_status != pq.TransactionStatus.IDLE:
+                await conn.rollback()
+        except psycopg.Error:
+            # zepsute połączenie - pula sama je odrzuci
+            pass
+        await _pool.putconn(conn)
@@ -1,13 +1,43 @@
 print("✅ ŁADUJE SIĘ PLIK: app/main.py")
 
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import logowanie, rejestracja, home, znajomi, wyzwania
+from app.routers import logowanie, rejestracja, home, znajomi, wyzwania, wyzwania_async, ws, zdarzenia
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
-app = FastAPI(title="BetYa")
+from app.database import init_db, get_pool, close_pool
+from app.database_async import DB_MODE, open_async_pool, close_async_pool
+from app.core.security import zamknij_pule_hashowania
+from app.notify import nasluch
+from app.czyszczenie import czyszczenie
 
-# inicjalizacja bazy przy starcie serwera
-init_db()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # rozgrzanie puli połączeń tego workera
+    get_pool().open()
+    if DB_MODE == "async":
+        await open_async_pool()
+    # LISTEN na kanałach unieważniania cache (subskrypcje rejestrują moduły routerów)
+    nasluch.start()
+    # usuwanie danych miękko usuniętych wyzwań (DELETE /wyzwania/) porcjami w tle
+    czyszczenie.start()
+    yield
+    czyszczenie.stop()
+    nasluch.stop()
+    if DB_MODE == "async":
+        await close_async_pool()
+    close_pool()
+    zamknij_pule_hashowania()
+
+
+app = FastAPI(title="BetYa", lifespan=lifespan)
+
+# Migracje schematu przy starcie procesu (wygodne lokalnie). W kontenerze migracje
+# uruchamia `python -m app.cli migruj` przed workerami, a tu wyłącza je DB_MIGRATE_ON_STARTUP=0.
+# Przy aktualnym schemacie to jedno zapytanie do schema_version.
+if os.getenv("DB_MIGRATE_ON_STARTUP", "1") == "1":
+    init_db()
 
 # pozwalamy na połączenia z frontendu
 origins = [
@@ -23,6 +53,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Rejestrujemy routery
@@ -30,7 +61,13 @@ app.include_router(logowanie.router)
 app.include_router(rejestracja.router)
 app.include_router(home.router)
 app.include_router(znajomi.router)
+# W trybie async wersje asynchroniczne muszą być zarejestrowane jako pierwsze,
+# żeby przejęły ścieżki obsługiwane też przez router synchroniczny.
+if DB_MODE == "async":
+    app.include_router(wyzwania_async.router)
 app.include_router(wyzwania.router)
+app.include_router(ws.router)
+app.include_router(zdarzenia.router)
 
 @app.get("/")
 def read_root():
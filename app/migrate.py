@@ -0,0 +1,113 @@
+"""
+Wersjonowane migracje schematu bazy.
+
+Pliki app/migrations/NNNN_opis.sql są stosowane rosnąco według numeru, każdy w osobnej
+transakcji i dokładnie raz. Zastosowane wersje (z sumą kontrolną sha256 pliku) trafiają
+do tabeli schema_version. Zastosowanego pliku nie wolno już edytować - zmiany schematu
+to zawsze nowy plik z kolejnym numerem.
+
+Uruchomienie przed startem workerów:
+    python -m app.cli migruj
+"""
+import hashlib
+import re
+import time
+from pathlib import Path
+
+from app.database import get_connection
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# Klucz blokady doradczej (przestrzeń bigint - nie koliduje z blokadami (int, int)
+# używanymi przez wyzwalacze agregatu). Tylko jeden proces naraz stosuje migracje.
+MIGRACJE_LOCK_KEY = 7_362_850_190_001
+
+_NAZWA_PLIKU = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+
+class MigrationError(Exception):
+    """Niespójność między plikami migracji a tabelą schema_version."""
+
+
+def wczytaj_migracje(katalog: Path = MIGRATIONS_DIR):
+    """Zwraca listę (wersja, nazwa, sql, suma_kontrolna) posortowaną po wersji."""
+    migracje = []
+    for plik in katalog.iterdir():
+        dopasowanie = _NAZWA_PLIKU.match(plik.name)
+        if not dopasowanie:
+            continue
+        sql = plik.read_text(encoding="utf-8")
+        # końce linii nie wpływają na sumę (checkout na Windows)
+        suma = hashlib.sha256(sql.replace("\r\n", "\n").encode("utf-8")).hexdigest()
+        migracje.append((int(dopasowanie.group(1)), plik.name, sql, suma))
+
+    migracje.sort()
+    wersje = [m[0] for m in migracje]
+    if len(wersje) != len(set(wersje)):
+        raise MigrationError("Dwa pliki migracji mają ten sam numer wersji")
+    return migracje
+
+
+def _zastosowane(cur):
+    cur.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return {}
+    cur.execute("SELECT wersja, suma_kontrolna FROM schema_version")
+    return dict(cur.fetchall())
+
+
+def _do_zastosowania(migracje, zastosowane):
+    for wersja, nazwa, _, suma in migracje:
+        if wersja in zastosowane and zastosowane[wersja] != suma:
+            raise MigrationError(
+                f"Migracja {nazwa} została zmieniona po zastosowaniu (inna suma kontrolna)"
+            )
+    return [m for m in migracje if m[0] not in zastosowane]
+
+
+def migruj(katalog: Path = MIGRATIONS_DIR) -> int:
+    """
+    Stosuje brakujące migracje. Zwraca liczbę zastosowanych plików.
+    Gdy schemat jest aktualny, kończy się jednym SELECT-em bez blokad.
+    """
+    migracje = wczytaj_migracje(katalog)
+
+    conn = get_connection()
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            # Szybka ścieżka: nic do zrobienia - bez blokady doradczej i bez DDL
+            if not _do_zastosowania(migracje, _zastosowane(cur)):
+                return 0
+
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRACJE_LOCK_KEY,))
+            try:
+                cur.execute("""
+                            CREATE TABLE IF NOT EXISTS schema_version (
+                                wersja INT PRIMARY KEY,
+                                nazwa TEXT NOT NULL,
+                                suma_kontrolna CHAR(64) NOT NULL,
+                                zastosowano TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                                czas_ms INT NOT NULL
+                            )
+                            """)
+                # Inny proces mógł zastosować migracje, gdy czekaliśmy na blokadę
+                oczekujace = _do_zastosowania(migracje, _zastosowane(cur))
+
+                conn.autocommit = False
+                for wersja, nazwa, sql, suma in oczekujace:
+                    start = time.perf_counter()
+                    cur.execute(sql)
+                    cur.execute("""
+                                INSERT INTO schema_version (wersja, nazwa, suma_kontrolna, czas_ms)
+                                VALUES (%s, %s, %s, %s)
+                                """, (wersja, nazwa, suma, int((time.perf_counter() - start) * 1000)))
+                    conn.commit()
+                    print(f"✅ Migracja {nazwa} zastosowana")
+                return len(oczekujace)
+            finally:
+                conn.rollback()
+                conn.autocommit = True
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRACJE_LOCK_KEY,))
+    finally:
+        conn.close()
@@ -0,0 +1,1269 @@
+-- Tabela Użytkownicy
+CREATE TABLE IF NOT EXISTS uzytkownicy (
+    id SERIAL PRIMARY KEY,
+    nazwa_uzytkownika VARCHAR(100) UNIQUE NOT NULL,
+    email VARCHAR(100) UNIQUE NOT NULL,
+    hashed_haslo VARCHAR(255) NOT NULL,
+    profilowe_url VARCHAR(255),
+    rola VARCHAR(20) NOT NULL DEFAULT 'user',
+
+    CONSTRAINT chk_email_poprawny CHECK (email LIKE '%@%'),
+    CONSTRAINT chk_nazwa_dlugosc CHECK (LENGTH(nazwa_uzytkownika) >= 3),
+    CONSTRAINT chk_rola_wartosci CHECK (rola IN ('user', 'admin'))
+    );
+
+-- Tabela Znajomi
+CREATE TABLE IF NOT EXISTS znajomi (
+    id SERIAL PRIMARY KEY,
+    uzytkownik_id INT NOT NULL REFERENCES uzytkownicy(id),
+    znajomy_id INT NOT NULL REFERENCES uzytkownicy(id),
+    status VARCHAR(50) DEFAULT 'oczekujacy',
+    data_zaproszenia TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sa_znajomymi BOOLEAN DEFAULT FALSE
+    );
+
+-- Tabela Wyzwania
+CREATE TABLE IF NOT EXISTS wyzwania (
+    id SERIAL PRIMARY KEY,
+    nazwa VARCHAR(255) NOT NULL,
+    opis TEXT,
+    czasowe BOOLEAN DEFAULT FALSE,
+    data_start TIMESTAMP,
+    data_koniec TIMESTAMP,
+    autor_id INT NOT NULL REFERENCES uzytkownicy(id)
+    );
+
+-- Tabela Uczestnicy Wyzwań
+CREATE TABLE IF NOT EXISTS uczestnicy_wyzwan (
+    id SERIAL PRIMARY KEY,
+    wyzwanie_id INT NOT NULL REFERENCES wyzwania(id),
+    uzytkownik_id INT NOT NULL REFERENCES uzytkownicy(id),
+    zaakceptowane BOOLEAN DEFAULT FALSE
+    );
+
+-- Tabela Zadania Dzienne
+CREATE TABLE IF NOT EXISTS zadania_dzienne (
+    id SERIAL PRIMARY KEY,
+    wyzwanie_id INT NOT NULL REFERENCES wyzwania(id),
+    nazwa VARCHAR(255) NOT NULL,
+    opis TEXT
+    );
+
+-- Tabela Podzadania
+CREATE TABLE IF NOT EXISTS podzadania (
+    id SERIAL PRIMARY KEY,
+    zadanie_id INT NOT NULL REFERENCES zadania_dzienne(id),
+    nazwa VARCHAR(255) NOT NULL,
+    wymagane BOOLEAN DEFAULT FALSE,
+    waga FLOAT DEFAULT 1.0
+    );
+
+-- Tabela Progres Dzienne
+CREATE TABLE IF NOT EXISTS progres_dzienne (
+    id SERIAL PRIMARY KEY,
+    uczestnik_id INT NOT NULL REFERENCES uczestnicy_wyzwan(id),
+    zadanie_id INT NOT NULL REFERENCES zadania_dzienne(id),
+    data TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    wykonane BOOLEAN DEFAULT FALSE,
+    wartosc FLOAT DEFAULT 0,
+    CONSTRAINT unique_progress_dzienne UNIQUE (uczestnik_id, zadanie_id, data)
+    );
+
+-- Tabela Progres Podzadania
+CREATE TABLE IF NOT EXISTS progres_podzadania (
+    id SERIAL PRIMARY KEY,
+    uczestnik_id INT NOT NULL REFERENCES uczestnicy_wyzwan(id),
+    podzadanie_id INT NOT NULL REFERENCES podzadania(id),
+    data TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    wykonane BOOLEAN DEFAULT FALSE,
+    CONSTRAINT unique_progress_podzadania UNIQUE (uczestnik_id, podzadanie_id, data)
+    );
+
+-- Indeksy pod zapytania zakresowe po dacie (historia wykresów)
+CREATE INDEX IF NOT EXISTS idx_progres_podzadania_podzadanie_data ON progres_podzadania (podzadanie_id, data);
+CREATE INDEX IF NOT EXISTS idx_progres_dzienne_zadanie_data ON progres_dzienne (zadanie_id, data);
+CREATE INDEX IF NOT EXISTS idx_podzadania_zadanie ON podzadania (zadanie_id);
+
+-- Czas ostatniej zmiany wpisu progresu (przyrostowe pobieranie historii: ?since=)
+ALTER TABLE progres_dzienne ADD COLUMN IF NOT EXISTS zmieniono TIMESTAMPTZ NOT NULL DEFAULT NOW();
+ALTER TABLE progres_podzadania ADD COLUMN IF NOT EXISTS zmieniono TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+CREATE OR REPLACE FUNCTION fn_ustaw_czas_zmiany()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.zmieniono := NOW();
+RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_progres_dzienne_zmieniono ON progres_dzienne;
+CREATE TRIGGER trg_progres_dzienne_zmieniono
+    BEFORE UPDATE ON progres_dzienne
+    FOR EACH ROW EXECUTE FUNCTION fn_ustaw_czas_zmiany();
+
+DROP TRIGGER IF EXISTS trg_progres_podzadania_zmieniono ON progres_podzadania;
+CREATE TRIGGER trg_progres_podzadania_zmieniono
+    BEFORE UPDATE ON progres_podzadania
+    FOR EACH ROW EXECUTE FUNCTION fn_ustaw_czas_zmiany();
+
+-- Agregat dzienny: procent wykonania zadania przez uczestnika w danym dniu.
+-- Utrzymywany przez wyzwalacze na tabelach progresu i podzadaniach (sekcja AGREGAT PROGRESU),
+-- więc odczyty historii i dzisiejszego stanu są zwykłym skanem zakresu zamiast przeliczania.
+CREATE TABLE IF NOT EXISTS agregat_progresu_dziennego (
+    uczestnik_id INT NOT NULL REFERENCES uczestnicy_wyzwan(id) ON DELETE CASCADE,
+    zadanie_id INT NOT NULL REFERENCES zadania_dzienne(id) ON DELETE CASCADE,
+    dzien DATE NOT NULL,
+    suma_wykonane FLOAT NOT NULL DEFAULT 0, -- suma wag wykonanych podzadań (zadanie proste: 0 lub 1)
+    procent INT NOT NULL DEFAULT 0,
+    zmieniono TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (uczestnik_id, zadanie_id, dzien)
+    );
+
+CREATE INDEX IF NOT EXISTS idx_agregat_progresu_zadanie_dzien ON agregat_progresu_dziennego (zadanie_id, dzien);
+
+
+-------------------------Uzytkownicy-------------------------------
+-- Spełnienie wymagania 2a: Wykorzystanie w bazie widoków
+-- Security through obscurity (STO)
+CREATE OR REPLACE VIEW widok_dane_logowania AS
+SELECT
+    id,
+    nazwa_uzytkownika,
+    email,
+    hashed_haslo
+FROM uzytkownicy;
+
+-- Funkcja, którą uruchomi wyzwalacz
+CREATE OR REPLACE FUNCTION wyzwalacz_czyszczenie_danych()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Usuwamy białe znaki (spacje) z początku i końca
+    NEW.nazwa_uzytkownika := TRIM(NEW.nazwa_uzytkownika);
+    NEW.email := TRIM(NEW.email);
+RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Właściwy Wyzwalacz (Wymaganie 6c)
+CREATE OR REPLACE TRIGGER trg_nowy_uzytkownik_czyszczenie
+    BEFORE INSERT ON uzytkownicy
+    FOR EACH ROW EXECUTE FUNCTION wyzwalacz_czyszczenie_danych();
+
+-- Funkcja realizująca rejestrację (Wymaganie 6c - Funkcje wbudowane)
+CREATE OR REPLACE FUNCTION zarejestruj_uzytkownika(
+    p_nazwa VARCHAR,
+    p_email VARCHAR,
+    p_haslo VARCHAR
+)
+RETURNS INT AS $$
+DECLARE
+nowe_id INT;
+BEGIN
+    -- Próba wstawienia rekordu
+    INSERT INTO uzytkownicy (nazwa_uzytkownika, email, hashed_haslo)
+    VALUES (p_nazwa, p_email, p_haslo)
+        RETURNING id INTO nowe_id;
+
+    RETURN nowe_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-------------------------Znajomi-------------------------------
+
+-- Widok łączący tabelę znajomi z danymi użytkowników
+CREATE OR REPLACE VIEW widok_szczegoly_relacji AS
+SELECT
+    z.id AS relacja_id,
+    z.uzytkownik_id,
+    z.znajomy_id,
+    z.status,
+    z.sa_znajomymi,
+    u1.nazwa_uzytkownika AS inicjator_nazwa,
+    u1.email AS inicjator_email,
+    u1.profilowe_url AS inicjator_profilowe_url,
+    u2.nazwa_uzytkownika AS adresat_nazwa,
+    u2.email AS adresat_email,
+    u2.profilowe_url AS adresat_profilowe_url
+FROM znajomi z
+         JOIN uzytkownicy u1 ON z.uzytkownik_id = u1.id
+         JOIN uzytkownicy u2 ON z.znajomy_id = u2.id;
+
+
+-- Widok z agregacją (Wymaganie 6a: GROUP BY)
+-- Zlicza ilu znajomych ma każdy użytkownik
+-- Wymaganie 6a: Widok z funkcją agregującą
+CREATE OR REPLACE VIEW widok_statystyki_znajomych AS
+SELECT
+    u.id AS uzytkownik_id,
+    u.nazwa_uzytkownika,
+    COUNT(t.friend_id) AS liczba_znajomych
+FROM uzytkownicy u
+         LEFT JOIN (
+    -- 1. Przypadek: Ja zaprosiłem kogoś (jestem w kolumnie uzytkownik_id)
+    SELECT uzytkownik_id AS user_id, znajomy_id AS friend_id
+    FROM znajomi
+    WHERE sa_znajomymi = TRUE
+
+    UNION ALL
+
+    -- 2. Przypadek: Ktoś zaprosił mnie (jestem w kolumnie znajomy_id)
+    SELECT znajomy_id AS user_id, uzytkownik_id AS friend_id
+    FROM znajomi
+    WHERE sa_znajomymi = TRUE
+) t ON u.id = t.user_id
+GROUP BY u.id, u.nazwa_uzytkownika;
+
+
+-- Spełnienie wymagania 2c (funkcja agregująca)
+CREATE OR REPLACE FUNCTION zlicz_oczekujace_zaproszenia(p_uzytkownik_id INT)
+RETURNS INT AS $$
+DECLARE
+liczba INT;
+BEGIN
+    -- Tutaj używamy funkcji agregującej COUNT
+SELECT COUNT(*) INTO liczba
+FROM znajomi
+WHERE znajomy_id = p_uzytkownik_id AND status = 'oczekujacy';
+
+RETURN liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Funkcja do wyszukiwania osób, które NIE są jeszcze znajomymi ani nie ma zaproszeń
+CREATE OR REPLACE FUNCTION szukaj_potencjalnych_znajomych(
+    p_szukana_fraza VARCHAR,
+    p_moje_id INT
+)
+RETURNS TABLE (
+    id INT,
+    nazwa_uzytkownika VARCHAR,
+    email VARCHAR
+) AS $$
+BEGIN
+RETURN QUERY
+SELECT u.id, u.nazwa_uzytkownika, u.email
+FROM uzytkownicy u
+WHERE u.nazwa_uzytkownika ILIKE '%' || p_szukana_fraza || '%'
+      AND u.id != p_moje_id
+      AND NOT EXISTS (
+          SELECT 1 FROM znajomi z
+          WHERE (z.uzytkownik_id = p_moje_id AND z.znajomy_id = u.id)
+             OR (z.uzytkownik_id = u.id AND z.znajomy_id = p_moje_id)
+      );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Funkcja wysyłająca zaproszenie (z walidacją wewnątrz bazy)
+CREATE OR REPLACE FUNCTION wyslij_zaproszenie(
+    p_uzytkownik_id INT,
+    p_znajomy_id INT
+)
+RETURNS TABLE (
+    nowe_id INT,
+    status VARCHAR,
+    data TIMESTAMP
+) AS $$
+DECLARE
+v_istnieje BOOLEAN;
+BEGIN
+    -- Walidacja: czy relacja już istnieje (Wymaganie 6b/6c)
+SELECT EXISTS(
+    SELECT 1 FROM znajomi
+    WHERE (uzytkownik_id = p_uzytkownik_id AND znajomy_id = p_znajomy_id)
+       OR (uzytkownik_id = p_znajomy_id AND znajomy_id = p_uzytkownik_id)
+) INTO v_istnieje;
+
+IF v_istnieje THEN
+        RAISE EXCEPTION 'Relacja już istnieje';
+END IF;
+
+    -- Wstawienie danych
+RETURN QUERY
+    INSERT INTO znajomi (uzytkownik_id, znajomy_id, status, sa_znajomymi, data_zaproszenia)
+    VALUES (p_uzytkownik_id, p_znajomy_id, 'oczekujacy', FALSE, NOW())
+    RETURNING znajomi.id, znajomi.status, znajomi.data_zaproszenia;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Funkcja do zmiany statusu (Akceptacja/Odrzucenie)
+CREATE OR REPLACE FUNCTION zmien_status_zaproszenia(
+    p_zaproszenie_id INT,
+    p_uzytkownik_id INT, -- ID osoby wykonującej akcję (security check)
+    p_nowy_status VARCHAR
+)
+RETURNS TABLE (
+    z_id INT,
+    z_uzytkownik_id INT,
+    z_znajomy_id INT,
+    z_status VARCHAR,
+    z_sa_znajomymi BOOLEAN,
+    z_data_zaproszenia TIMESTAMP
+) AS $$
+DECLARE
+v_czy_poprawny_adresat BOOLEAN;
+BEGIN
+    -- Sprawdzenie czy zaproszenie jest skierowane do tej osoby
+SELECT EXISTS(
+    SELECT 1 FROM znajomi
+    WHERE id = p_zaproszenie_id AND znajomy_id = p_uzytkownik_id AND status = 'oczekujacy'
+) INTO v_czy_poprawny_adresat;
+
+IF NOT v_czy_poprawny_adresat THEN
+        RAISE EXCEPTION 'Nie znaleziono zaproszenia lub brak uprawnień';
+END IF;
+
+    -- Aktualizacja
+RETURN QUERY
+UPDATE znajomi
+SET status = p_nowy_status,
+    sa_znajomymi = (p_nowy_status = 'zaakceptowany')
+WHERE id = p_zaproszenie_id
+    RETURNING id, uzytkownik_id, znajomy_id, status, sa_znajomymi, data_zaproszenia;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-------------------------Wyzwania-------------------------------
+CREATE OR REPLACE VIEW widok_moje_wyzwania AS
+SELECT DISTINCT
+    w.id, w.nazwa, w.opis, w.czasowe, w.data_start, w.data_koniec, w.autor_id,
+    uw.uzytkownik_id AS uczestnik_id,
+    uw.zaakceptowane
+FROM wyzwania w
+         LEFT JOIN uczestnicy_wyzwan uw
+                   ON uw.wyzwanie_id = w.id;
+
+----------------------------DODAJ WYZWNIA---------------
+----------Funkcja – obsługa relacji M:N
+CREATE OR REPLACE FUNCTION fn_obsluga_relacji_uczestnicy()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Autor zawsze zaakceptowany
+    IF NEW.uzytkownik_id = (
+        SELECT autor_id FROM wyzwania WHERE id = NEW.wyzwanie_id
+    ) THEN
+        NEW.zaakceptowane := TRUE;
+END IF;
+
+RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+------Trigger – kontrola relacji
+DROP TRIGGER IF EXISTS trg_przed_dodaniem_uczestnika ON uczestnicy_wyzwan;
+
+CREATE TRIGGER trg_przed_dodaniem_uczestnika
+    BEFORE INSERT ON uczestnicy_wyzwan
+    FOR EACH ROW
+    EXECUTE FUNCTION fn_obsluga_relacji_uczestnicy();
+
+CREATE OR REPLACE FUNCTION fn_dodaj_autora_do_wyzwania()
+RETURNS TRIGGER AS $$
+BEGIN
+INSERT INTO uczestnicy_wyzwan (wyzwanie_id, uzytkownik_id, zaakceptowane)
+VALUES (NEW.id, NEW.autor_id, TRUE);
+
+RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+----------------Trigger – automatyczne tworzenie relacji
+DROP TRIGGER IF EXISTS trg_po_utworzeniu_wyzwania ON wyzwania;
+
+CREATE TRIGGER trg_po_utworzeniu_wyzwania
+    AFTER INSERT ON wyzwania
+    FOR EACH ROW
+    EXECUTE FUNCTION fn_dodaj_autora_do_wyzwania();
+
+
+DROP TRIGGER IF EXISTS trg_przed_dodaniem_uczestnika ON uczestnicy_wyzwan;
+
+CREATE TRIGGER trg_przed_dodaniem_uczestnika
+    BEFORE INSERT ON uczestnicy_wyzwan
+    FOR EACH ROW
+    EXECUTE FUNCTION fn_obsluga_relacji_uczestnicy();
+
+-- Spełnienie wymagania 2a: Wykorzystanie w bazie widoków
+CREATE OR REPLACE VIEW widok_uczestnicy_wyzwania AS
+SELECT
+    uw.wyzwanie_id,
+    u.id AS uzytkownik_id,
+    u.nazwa_uzytkownika,
+    uw.zaakceptowane
+FROM uczestnicy_wyzwan uw
+         JOIN uzytkownicy u ON u.id = uw.uzytkownik_id;
+
+
+-- Tworzenie całego wyzwania jednym wywołaniem (stała liczba zapytań niezależnie od liczby
+-- uczestników, zadań dziennych i podzadań). Id zadań i podzadań są pobierane z sekwencji
+-- z góry, dzięki czemu w wyniku można je dopasować do kolejności w p_dane.
+CREATE OR REPLACE FUNCTION fn_utworz_wyzwanie(p_autor_id INT, p_dane JSON)
+RETURNS JSON AS $$
+DECLARE
+    v_wyzwanie_id INT;
+    v_zadania JSON;
+    v_uczestnicy JSON;
+BEGIN
+INSERT INTO wyzwania (nazwa, opis, czasowe, data_start, data_koniec, autor_id)
+VALUES (
+    p_dane->>'nazwa',
+    p_dane->>'opis',
+    COALESCE((p_dane->>'czasowe')::BOOLEAN, FALSE),
+    (p_dane->>'data_start')::TIMESTAMP,
+    (p_dane->>'data_koniec')::TIMESTAMP,
+    p_autor_id
+)
+RETURNING id INTO v_wyzwanie_id;
+
+-- Znajomi jako uczestnicy (autora dodaje trigger trg_po_utworzeniu_wyzwania)
+INSERT INTO uczestnicy_wyzwan (wyzwanie_id, uzytkownik_id, zaakceptowane)
+SELECT v_wyzwanie_id, u.uid::INT, FALSE
+FROM json_array_elements_text(COALESCE(p_dane->'uczestnicy_ids', '[]'::json))
+         WITH ORDINALITY AS u(uid, nr)
+ORDER BY u.nr;
+
+-- Zadania dzienne i podzadania - po jednym INSERT na tabelę
+WITH zadania AS MATERIALIZED (
+    SELECT nextval(pg_get_serial_sequence('zadania_dzienne', 'id'))::INT AS id, z.nr, z.dane
+    FROM json_array_elements(COALESCE(p_dane->'zadania_dzienne', '[]'::json))
+             WITH ORDINALITY AS z(dane, nr)
+),
+     podzadania_nowe AS MATERIALIZED (
+         SELECT nextval(pg_get_serial_sequence('podzadania', 'id'))::INT AS id,
+                z.id AS zadanie_id, p.nr, p.dane
+         FROM zadania z
+                  CROSS JOIN LATERAL json_array_elements(COALESCE(z.dane->'podzadania', '[]'::json))
+             WITH ORDINALITY AS p(dane, nr)
+     ),
+     dodane_zadania AS (
+         INSERT INTO zadania_dzienne (id, wyzwanie_id, nazwa, opis)
+         SELECT id, v_wyzwanie_id, dane->>'nazwa', dane->>'opis'
+         FROM zadania
+     ),
+     dodane_podzadania AS (
+         INSERT INTO podzadania (id, zadanie_id, nazwa, wymagane, waga)
+         SELECT id, zadanie_id, dane->>'nazwa',
+                COALESCE((dane->>'wymagane')::BOOLEAN, TRUE),
+                COALESCE((dane->>'waga')::FLOAT, 1.0)
+         FROM podzadania_nowe
+     )
+SELECT COALESCE(json_agg(
+                        json_build_object(
+                                'id', z.id,
+                                'podzadania', (
+                                    SELECT COALESCE(json_agg(p.id ORDER BY p.nr), '[]'::json)
+                                    FROM podzadania_nowe p
+                                    WHERE p.zadanie_id = z.id
+                                )
+                        ) ORDER BY z.nr
+                ), '[]'::json)
+INTO v_zadania
+FROM zadania z;
+
+-- Wszyscy uczestnicy (autor + znajomi)
+SELECT COALESCE(json_agg(
+                        json_build_object(
+                                'id', uzytkownik_id,
+                                'nazwa_uzytkownika', nazwa_uzytkownika,
+                                'zaakceptowane', zaakceptowane
+                        )
+                ), '[]'::json)
+INTO v_uczestnicy
+FROM widok_uczestnicy_wyzwania
+WHERE wyzwanie_id = v_wyzwanie_id;
+
+RETURN json_build_object(
+        'id', v_wyzwanie_id,
+        'uczestnicy', v_uczestnicy,
+        'zadania_dzienne', v_zadania
+       );
+END;
+$$ LANGUAGE plpgsql;
+
+
+
+-- Spełnienie wymagania 2a: Wykorzystanie w bazie widoków
+CREATE OR REPLACE VIEW widok_wyslane_zaproszenia_wyzwania AS
+SELECT
+    uw.id AS uczestnictwo_id,
+    w.id AS wyzwanie_id,
+    w.nazwa AS wyzwanie_nazwa,
+    w.autor_id,               -
+    u.id AS odbiorca_id,
+    u.nazwa_uzytkownika AS odbiorca_nazwa,
+    uw.zaakceptowane
+FROM uczestnicy_wyzwan uw
+         JOIN wyzwania w ON w.id = uw.wyzwanie_id
+         JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+WHERE uw.zaakceptowane = FALSE;
+
+
+-- Spełnienie wymagania 2a (widoki)
+CREATE OR REPLACE VIEW widok_odebrane_zaproszenia_wyzwania AS
+SELECT
+    u.id AS uczestnictwo_id,
+    u.uzytkownik_id AS odbiorca_id,
+    w.id AS wyzwanie_id,
+    w.nazwa AS wyzwanie_nazwa,
+    w.opis AS wyzwanie_opis,
+    w.autor_id,
+    uz.nazwa_uzytkownika AS autor_nazwa
+FROM uczestnicy_wyzwan u
+         JOIN wyzwania w ON w.id = u.wyzwanie_id
+         JOIN uzytkownicy uz ON uz.id = w.autor_id
+WHERE u.zaakceptowane = FALSE;
+
+
+CREATE OR REPLACE FUNCTION akceptuj_zaproszenie_wyzwania_func(p_id INT, p_user_id INT)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_updated_rows INT;
+BEGIN
+    UPDATE uczestnicy_wyzwan
+    SET zaakceptowane = TRUE
+    WHERE id = p_id
+      AND uzytkownik_id = p_user_id
+      AND zaakceptowane = FALSE;
+
+    GET DIAGNOSTICS v_updated_rows = ROW_COUNT;
+
+    RETURN v_updated_rows > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION odrzuc_zaproszenie_wyzwania_func(p_id INT, p_user_id INT)
+RETURNS BOOLEAN AS $$
+DECLARE
+v_deleted_rows INT;
+BEGIN
+    DELETE FROM uczestnicy_wyzwan
+    WHERE id = p_id
+      AND uzytkownik_id = p_user_id
+      AND zaakceptowane = FALSE;
+
+    GET DIAGNOSTICS v_deleted_rows = ROW_COUNT;
+
+    RETURN v_deleted_rows > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+
+   ------------------------- WIDOKI Z HAVING  -------------------------
+
+-- 1. Widok obliczający procent wykonania zadań, które posiadają podzadania.
+-- Spełnia wymaganie: Funkcja agregująca SUM w HAVING.
+CREATE OR REPLACE VIEW widok_progres_zadan_zlozonych AS
+SELECT
+    uw.uzytkownik_id,
+    zd.id AS zadanie_id,
+    -- Obliczamy procent: (Suma wag wykonanych / Suma wszystkich wag) * 100
+    CAST(
+            ROUND(
+                    (SUM(CASE WHEN pp.wykonane IS TRUE THEN p.waga ELSE 0 END) / SUM(p.waga)) * 100
+            ) AS INT
+    ) AS procent_wykonania
+FROM uczestnicy_wyzwan uw
+         JOIN zadania_dzienne zd ON uw.wyzwanie_id = zd.wyzwanie_id
+         JOIN podzadania p ON zd.id = p.zadanie_id -- INNER JOIN wybiera tylko zadania z podzadaniami
+         LEFT JOIN progres_podzadania pp ON p.id = pp.podzadanie_id
+    AND pp.uczestnik_id = uw.id
+    AND pp.data::date = CURRENT_DATE
+GROUP BY uw.uzytkownik_id, zd.id
+HAVING SUM(p.waga) > 0; -- Zabezpieczenie przed dzieleniem przez 0 oraz filtracja pustych zadań
+
+
+-- 2. Widok pokazujący "Wyzwania Społecznościowe" (więcej niż 1 uczestnik).
+-- Spełnia wymaganie: Funkcja agregująca COUNT w HAVING.
+CREATE OR REPLACE VIEW widok_aktywne_wyzwania_statystyki AS
+SELECT
+    w.id,
+    w.nazwa,
+    COUNT(uw.id) as liczba_uczestnikow
+FROM wyzwania w
+         JOIN uczestnicy_wyzwan uw ON w.id = uw.wyzwanie_id
+GROUP BY w.id, w.nazwa
+HAVING COUNT(uw.id) > 1;
+
+
+CREATE OR REPLACE FUNCTION fn_get_wyzwanie_json(p_wyzwanie_id INT)
+RETURNS JSON AS $$
+BEGIN
+RETURN (
+    SELECT json_build_object(
+                   'id', w.id,
+                   'nazwa', w.nazwa,
+                   'opis', w.opis,
+                   'czasowe', w.czasowe,
+
+                   'data_start',
+                   CASE
+                       WHEN w.data_start IS NULL THEN NULL
+                       ELSE to_char(w.data_start, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'data_koniec',
+                   CASE
+                       WHEN w.data_koniec IS NULL THEN NULL
+                       ELSE to_char(w.data_koniec, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'autor_id', w.autor_id,
+
+                   'uczestnicy', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', u.id,
+                                                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                                       'zaakceptowane', uw.zaakceptowane
+                                               )
+                                                   ORDER BY u.id
+                                       ), '[]'::json)
+                       FROM uczestnicy_wyzwan uw
+                                JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+                       WHERE uw.wyzwanie_id = w.id
+                   ),
+
+                   'zadania_dzienne', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', z.id,
+                                                       'nazwa', z.nazwa,
+                                                       'opis', z.opis,
+
+                                                       'podzadania', (
+                                                           SELECT COALESCE(json_agg(
+                                                                                   json_build_object(
+                                                                                           'id', p.id,
+                                                                                           'nazwa', p.nazwa,
+                                                                                           'wymagane', p.wymagane,
+                                                                                           'waga', p.waga
+                                                                                   )
+                                                                                       ORDER BY p.id
+                                                                           ), '[]'::json)
+                                                           FROM podzadania p
+                                                           WHERE p.zadanie_id = z.id
+                                                       )
+                                               )
+                                                   ORDER BY z.id
+                                       ), '[]'::json)
+                       FROM zadania_dzienne z
+                       WHERE z.wyzwanie_id = w.id
+                   )
+           )
+    FROM wyzwania w
+    WHERE w.id = p_wyzwanie_id
+);
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE VIEW widok_uczestnik_podzadania AS
+SELECT
+    uw.id AS uczestnik_id,
+    uw.uzytkownik_id,
+    p.id AS podzadanie_id,
+    zd.id AS zadanie_id,
+    uw.wyzwanie_id
+FROM uczestnicy_wyzwan uw
+         JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id
+         JOIN podzadania p ON p.zadanie_id = zd.id;
+
+
+CREATE OR REPLACE VIEW widok_uczestnik_zadanie_dzienne AS
+SELECT
+    uw.id AS uczestnik_id,
+    uw.uzytkownik_id,
+    zd.id AS zadanie_id,
+    uw.wyzwanie_id
+FROM uczestnicy_wyzwan uw
+         JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id;
+
+
+CREATE OR REPLACE FUNCTION fn_get_progres_dzienne(
+    p_zadanie_id INT,
+    p_user_id INT
+)
+RETURNS TABLE (
+    procent INT,
+    wykonane BOOLEAN
+) AS $$
+BEGIN
+RETURN QUERY
+    WITH uczestnik AS (
+        SELECT uw.id AS uczestnik_id
+        FROM uczestnicy_wyzwan uw
+                 JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id
+        WHERE zd.id = p_zadanie_id AND uw.uzytkownik_id = p_user_id
+    )
+SELECT
+    COALESCE(a.procent, 0) AS procent,
+    COALESCE(a.procent, 0) = 100 AS wykonane
+FROM uczestnik u
+         LEFT JOIN agregat_progresu_dziennego a
+                   ON a.uczestnik_id = u.uczestnik_id
+                       AND a.zadanie_id = p_zadanie_id
+                       AND a.dzien = CURRENT_DATE;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Stan wszystkich zadań i podzadań wyzwania dla użytkownika w danym dniu - jednym zapytaniem.
+-- Procent zadania pochodzi z agregat_progresu_dziennego (wagi podzadań lub 0/100).
+-- Zwraca NULL, jeśli użytkownik nie jest uczestnikiem wyzwania.
+CREATE OR REPLACE FUNCTION fn_get_progres_wyzwania(
+    p_wyzwanie_id INT,
+    p_user_id INT,
+    p_data DATE DEFAULT CURRENT_DATE
+)
+RETURNS JSON AS $$
+DECLARE
+    v_uczestnik_id INT;
+BEGIN
+SELECT uw.id INTO v_uczestnik_id
+FROM uczestnicy_wyzwan uw
+WHERE uw.wyzwanie_id = p_wyzwanie_id AND uw.uzytkownik_id = p_user_id
+ORDER BY uw.id
+LIMIT 1;
+
+IF v_uczestnik_id IS NULL THEN
+    RETURN NULL;
+END IF;
+
+RETURN (
+    WITH podz AS (
+        SELECT p.id, p.zadanie_id,
+               COALESCE(bool_or(pp.wykonane), FALSE) AS wykonane
+        FROM zadania_dzienne zd
+                 JOIN podzadania p ON p.zadanie_id = zd.id
+                 LEFT JOIN progres_podzadania pp
+                           ON pp.podzadanie_id = p.id
+                               AND pp.uczestnik_id = v_uczestnik_id
+                               AND pp.data >= p_data AND pp.data < p_data + 1
+        WHERE zd.wyzwanie_id = p_wyzwanie_id
+        GROUP BY p.id, p.zadanie_id
+    ),
+         zadania AS (
+             SELECT zd.id AS zadanie_id,
+                    COALESCE(json_agg(
+                                     json_build_object('podzadanie_id', pz.id, 'wykonane', pz.wykonane)
+                                         ORDER BY pz.id
+                             ) FILTER (WHERE pz.id IS NOT NULL), '[]'::json) AS podzadania
+             FROM zadania_dzienne zd
+                      LEFT JOIN podz pz ON pz.zadanie_id = zd.id
+             WHERE zd.wyzwanie_id = p_wyzwanie_id
+             GROUP BY zd.id
+         )
+    SELECT json_build_object(
+                   'uczestnik_id', v_uczestnik_id,
+                   'zadania', COALESCE(json_agg(
+                                              json_build_object(
+                                                      'zadanie_id', z.zadanie_id,
+                                                      'procent', COALESCE(a.procent, 0),
+                                                      'wykonane', COALESCE(a.procent, 0) = 100,
+                                                      'podzadania', z.podzadania
+                                              ) ORDER BY z.zadanie_id
+                                      ), '[]'::json)
+           )
+    FROM zadania z
+             LEFT JOIN agregat_progresu_dziennego a
+                       ON a.uczestnik_id = v_uczestnik_id
+                           AND a.zadanie_id = z.zadanie_id
+                           AND a.dzien = p_data
+);
+END;
+$$ LANGUAGE plpgsql;
+
+
+   CREATE OR REPLACE FUNCTION usun_wyzwanie_admin(p_wyzwanie_id INT)
+RETURNS VOID AS $$
+BEGIN
+    -- 1. Usuń progres podzadań (poprzez podzadania -> zadania)
+DELETE FROM progres_podzadania
+WHERE podzadanie_id IN (
+    SELECT p.id FROM podzadania p
+                         JOIN zadania_dzienne z ON p.zadanie_id = z.id
+    WHERE z.wyzwanie_id = p_wyzwanie_id
+);
+
+-- 2. Usuń progres dzienny
+DELETE FROM progres_dzienne
+WHERE zadanie_id IN (
+    SELECT id FROM zadania_dzienne WHERE wyzwanie_id = p_wyzwanie_id
+);
+
+-- 3. Usuń podzadania
+DELETE FROM podzadania
+WHERE zadanie_id IN (
+    SELECT id FROM zadania_dzienne WHERE wyzwanie_id = p_wyzwanie_id
+);
+
+-- 4. Usuń zadania dzienne
+DELETE FROM zadania_dzienne WHERE wyzwanie_id = p_wyzwanie_id;
+
+-- 5. Usuń uczestników
+DELETE FROM uczestnicy_wyzwan WHERE wyzwanie_id = p_wyzwanie_id;
+
+-- 6. Na końcu usuń samo wyzwanie
+DELETE FROM wyzwania WHERE id = p_wyzwanie_id;
+END;
+$$ LANGUAGE plpgsql;
+
+
+
+
+-- ---------------------------------------------------------
+-- AGREGAT PROGRESU: utrzymanie agregat_progresu_dziennego
+-- Reguła procentu (ta sama dla odczytu dzisiejszego stanu i historii):
+--   zadanie z podzadaniami o dodatniej sumie wag -> suma wag wykonanych / suma wag,
+--   w pozostałych przypadkach -> 100, jeśli w progres_dzienne jest wykonany wpis, inaczej 0.
+-- Wiersz istnieje tylko dla dni, w których są surowe wpisy progresu.
+-- ---------------------------------------------------------
+
+-- Przelicza jeden wiersz agregatu (uczestnik, zadanie, dzień) z surowych danych.
+CREATE OR REPLACE FUNCTION fn_odswiez_agregat_progresu(
+    p_uczestnik_id INT,
+    p_zadanie_id INT,
+    p_dzien DATE
+)
+RETURNS VOID AS $$
+DECLARE
+v_suma_wag FLOAT;
+    v_suma_wykonane FLOAT;
+    v_procent INT;
+    v_sa_wpisy BOOLEAN;
+BEGIN
+    IF p_uczestnik_id IS NULL OR p_zadanie_id IS NULL OR p_dzien IS NULL THEN
+        RETURN;
+END IF;
+
+    -- Równoległe zapisy tej samej pary czekają na siebie; kolejne zapytania
+    -- (nowy snapshot) widzą już zatwierdzone wpisy poprzednika.
+    PERFORM pg_advisory_xact_lock(p_uczestnik_id, p_zadanie_id);
+
+SELECT COALESCE(SUM(waga), 0) INTO v_suma_wag
+FROM podzadania
+WHERE zadanie_id = p_zadanie_id;
+
+IF v_suma_wag > 0 THEN
+SELECT COUNT(*) > 0, COALESCE(SUM(p.waga) FILTER (WHERE pp.wykonane), 0)
+INTO v_sa_wpisy, v_suma_wykonane
+FROM progres_podzadania pp
+         JOIN podzadania p ON p.id = pp.podzadanie_id
+WHERE p.zadanie_id = p_zadanie_id
+  AND pp.uczestnik_id = p_uczestnik_id
+  AND pp.data >= p_dzien AND pp.data < p_dzien + 1;
+
+v_procent := CAST(ROUND((v_suma_wykonane / v_suma_wag) * 100) AS INT);
+ELSE
+SELECT COUNT(*) > 0, CASE WHEN bool_or(wykonane) THEN 1 ELSE 0 END
+INTO v_sa_wpisy, v_suma_wykonane
+FROM progres_dzienne
+WHERE zadanie_id = p_zadanie_id
+  AND uczestnik_id = p_uczestnik_id
+  AND data >= p_dzien AND data < p_dzien + 1;
+
+v_procent := CAST(v_suma_wykonane AS INT) * 100;
+END IF;
+
+    IF NOT v_sa_wpisy THEN
+DELETE FROM agregat_progresu_dziennego
+WHERE uczestnik_id = p_uczestnik_id AND zadanie_id = p_zadanie_id AND dzien = p_dzien;
+RETURN;
+END IF;
+
+    -- EXISTS: przy usuwaniu uczestnika / zadania nie odtwarzamy wiersza dla rodzica, którego już nie ma
+INSERT INTO agregat_progresu_dziennego (uczestnik_id, zadanie_id, dzien, suma_wykonane, procent)
+SELECT p_uczestnik_id, p_zadanie_id, p_dzien, v_suma_wykonane, v_procent
+WHERE EXISTS (SELECT 1 FROM uczestnicy_wyzwan WHERE id = p_uczestnik_id)
+  AND EXISTS (SELECT 1 FROM zadania_dzienne WHERE id = p_zadanie_id)
+ON CONFLICT (uczestnik_id, zadanie_id, dzien) DO UPDATE
+    SET suma_wykonane = EXCLUDED.suma_wykonane,
+        procent = EXCLUDED.procent,
+        zmieniono = NOW()
+    -- zmieniono przesuwamy tylko przy faktycznej zmianie (tryb ?since= historii)
+    WHERE agregat_progresu_dziennego.procent IS DISTINCT FROM EXCLUDED.procent
+       OR agregat_progresu_dziennego.suma_wykonane IS DISTINCT FROM EXCLUDED.suma_wykonane;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Przebudowa agregatu od zera: jednego zadania albo (p_zadanie_id = NULL) całej tabeli.
+-- Używana po zmianie podzadań zadania oraz przez polecenie `python -m app.cli przebuduj-agregaty`.
+-- Zwraca liczbę zapisanych wierszy.
+CREATE OR REPLACE FUNCTION fn_przebuduj_agregat_progresu(p_zadanie_id INT DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+v_liczba INT;
+BEGIN
+    IF p_zadanie_id IS NULL THEN
+        -- blokuje zapisy progresu na czas przebudowy, odczyty działają dalej
+        LOCK TABLE progres_dzienne, progres_podzadania, agregat_progresu_dziennego IN SHARE ROW EXCLUSIVE MODE;
+DELETE FROM agregat_progresu_dziennego;
+ELSE
+DELETE FROM agregat_progresu_dziennego WHERE zadanie_id = p_zadanie_id;
+END IF;
+
+WITH zadania AS (
+    SELECT zd.id AS zadanie_id, COALESCE(SUM(p.waga), 0) AS suma_wag
+    FROM zadania_dzienne zd
+             LEFT JOIN podzadania p ON p.zadanie_id = zd.id
+    WHERE p_zadanie_id IS NULL OR zd.id = p_zadanie_id
+    GROUP BY zd.id
+),
+     wazone AS (
+         SELECT pp.uczestnik_id, z.zadanie_id, pp.data::date AS dzien,
+                COALESCE(SUM(p.waga) FILTER (WHERE pp.wykonane), 0) AS suma,
+                z.suma_wag
+         FROM progres_podzadania pp
+                  JOIN podzadania p ON p.id = pp.podzadanie_id
+                  JOIN zadania z ON z.zadanie_id = p.zadanie_id AND z.suma_wag > 0
+         GROUP BY pp.uczestnik_id, z.zadanie_id, pp.data::date, z.suma_wag
+     ),
+     proste AS (
+         SELECT pd.uczestnik_id, z.zadanie_id, pd.data::date AS dzien,
+                CASE WHEN bool_or(pd.wykonane) THEN 1 ELSE 0 END AS suma
+         FROM progres_dzienne pd
+                  JOIN zadania z ON z.zadanie_id = pd.zadanie_id AND z.suma_wag <= 0
+         GROUP BY pd.uczestnik_id, z.zadanie_id, pd.data::date
+     )
+INSERT INTO agregat_progresu_dziennego (uczestnik_id, zadanie_id, dzien, suma_wykonane, procent)
+SELECT uczestnik_id, zadanie_id, dzien, suma, CAST(ROUND((suma / suma_wag) * 100) AS INT)
+FROM wazone
+UNION ALL
+SELECT uczestnik_id, zadanie_id, dzien, suma, suma * 100
+FROM proste;
+
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Wyzwalacze: odświeżenie dnia przy każdej zmianie surowego wpisu (stary i nowy klucz).
+CREATE OR REPLACE FUNCTION fn_trg_agregat_progres_podzadania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_odswiez_agregat_progresu(
+            OLD.uczestnik_id,
+            (SELECT zadanie_id FROM podzadania WHERE id = OLD.podzadanie_id),
+            OLD.data::date);
+END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fn_odswiez_agregat_progresu(
+            NEW.uczestnik_id,
+            (SELECT zadanie_id FROM podzadania WHERE id = NEW.podzadanie_id),
+            NEW.data::date);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_trg_agregat_progres_dzienne()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_odswiez_agregat_progresu(OLD.uczestnik_id, OLD.zadanie_id, OLD.data::date);
+END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fn_odswiez_agregat_progresu(NEW.uczestnik_id, NEW.zadanie_id, NEW.data::date);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Zmiana podzadań (dodanie, usunięcie, waga) zmienia mianownik całego zadania - przebudowa zadania.
+CREATE OR REPLACE FUNCTION fn_trg_agregat_podzadania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_przebuduj_agregat_progresu(OLD.zadanie_id);
+END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.zadanie_id IS DISTINCT FROM OLD.zadanie_id) THEN
+        PERFORM fn_przebuduj_agregat_progresu(NEW.zadanie_id);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_progres_podzadania ON progres_podzadania;
+CREATE TRIGGER trg_agregat_progres_podzadania
+    AFTER INSERT OR DELETE ON progres_podzadania
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_agregat_progres_podzadania();
+
+DROP TRIGGER IF EXISTS trg_agregat_progres_podzadania_zmiana ON progres_podzadania;
+CREATE TRIGGER trg_agregat_progres_podzadania_zmiana
+    AFTER UPDATE ON progres_podzadania
+    FOR EACH ROW
+    WHEN (OLD.wykonane IS DISTINCT FROM NEW.wykonane
+        OR OLD.data IS DISTINCT FROM NEW.data
+        OR OLD.uczestnik_id IS DISTINCT FROM NEW.uczestnik_id
+        OR OLD.podzadanie_id IS DISTINCT FROM NEW.podzadanie_id)
+    EXECUTE FUNCTION fn_trg_agregat_progres_podzadania();
+
+DROP TRIGGER IF EXISTS trg_agregat_progres_dzienne ON progres_dzienne;
+CREATE TRIGGER trg_agregat_progres_dzienne
+    AFTER INSERT OR DELETE ON progres_dzienne
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_agregat_progres_dzienne();
+
+DROP TRIGGER IF EXISTS trg_agregat_progres_dzienne_zmiana ON progres_dzienne;
+CREATE TRIGGER trg_agregat_progres_dzienne_zmiana
+    AFTER UPDATE ON progres_dzienne
+    FOR EACH ROW
+    WHEN (OLD.wykonane IS DISTINCT FROM NEW.wykonane
+        OR OLD.data IS DISTINCT FROM NEW.data
+        OR OLD.uczestnik_id IS DISTINCT FROM NEW.uczestnik_id
+        OR OLD.zadanie_id IS DISTINCT FROM NEW.zadanie_id)
+    EXECUTE FUNCTION fn_trg_agregat_progres_dzienne();
+
+DROP TRIGGER IF EXISTS trg_agregat_podzadania ON podzadania;
+CREATE TRIGGER trg_agregat_podzadania
+    AFTER INSERT OR DELETE OR UPDATE OF waga, zadanie_id ON podzadania
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_agregat_podzadania();
+
+-- Jednorazowe wypełnienie agregatu dla istniejącej bazy (kolejne starty nic nie robią)
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM agregat_progresu_dziennego)
+        AND (EXISTS (SELECT 1 FROM progres_dzienne) OR EXISTS (SELECT 1 FROM progres_podzadania)) THEN
+        PERFORM fn_przebuduj_agregat_progresu();
+END IF;
+END $$;
+
+
+-- ---------------------------------------------------------
+-- KROK 1: Funkcja obliczająca procenty dla konkretnego dnia
+-- Odczyt z agregat_progresu_dziennego (brak wiersza = 0%).
+-- ---------------------------------------------------------
+CREATE OR REPLACE FUNCTION fn_oblicz_procent_zadania(
+    p_uczestnik_id INT,
+    p_zadanie_id INT,
+    p_data DATE
+)
+RETURNS INT AS $$
+SELECT COALESCE((
+    SELECT procent
+    FROM agregat_progresu_dziennego
+    WHERE uczestnik_id = p_uczestnik_id
+      AND zadanie_id = p_zadanie_id
+      AND dzien = p_data
+), 0);
+$$ LANGUAGE sql STABLE;
+
+-- ---------------------------------------------------------
+-- KROK 2: Funkcja generująca JSON z historią (Thick DB)
+-- Jedno zapytanie zbiorowe: siatka dzień × uczestnik złączona (LEFT JOIN)
+-- z zakresem dni z agregat_progresu_dziennego (brak wiersza = 0%).
+-- ---------------------------------------------------------
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wykresu(p_zadanie_id INT)
+RETURNS JSON AS $$
+DECLARE
+v_wyzwanie_id INT;
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    -- Zmienne obliczone
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+
+    v_wynik JSON;
+BEGIN
+    -- 1. Pobieramy dane wyzwania
+SELECT w.id, w.data_start, w.data_koniec, w.czasowe
+INTO v_wyzwanie_id, v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania w
+         JOIN zadania_dzienne zd ON w.id = zd.wyzwanie_id
+WHERE zd.id = p_zadanie_id;
+
+-- 2. Ustalanie daty KOŃCOWEJ
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+        v_koniec_calc := v_data_koniec::date;
+ELSE
+        v_koniec_calc := CURRENT_DATE;
+END IF;
+
+    -- 3. Ustalanie daty STARTOWEJ (pierwszy dzień z progresem - indeks agregatu)
+    IF v_czasowe AND v_data_start IS NOT NULL THEN
+        v_start_calc := v_data_start::date;
+ELSE
+        v_start_calc := COALESCE(
+            (SELECT MIN(dzien) FROM agregat_progresu_dziennego WHERE zadanie_id = p_zadanie_id),
+            CURRENT_DATE);
+END IF;
+
+    -- 4. Generowanie JSON
+WITH uczestnicy AS (
+    SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+    FROM uczestnicy_wyzwan uw
+             JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+    WHERE uw.wyzwanie_id = v_wyzwanie_id
+      AND uw.zaakceptowane = TRUE
+),
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.dzien, a.procent
+         FROM agregat_progresu_dziennego a
+         WHERE a.zadanie_id = p_zadanie_id
+           AND a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     punkty AS (
+         SELECT u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w ON w.uczestnik_id = u.uczestnik_id AND w.dzien = d.dzien
+         GROUP BY u.uczestnik_id
+     )
+SELECT json_agg(
+               json_build_object(
+                       'uczestnik_id', u.uczestnik_id,
+                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                       'punkty', p.punkty
+               ) ORDER BY u.uczestnik_id
+       ) INTO v_wynik
+FROM uczestnicy u
+         LEFT JOIN punkty p ON p.uczestnik_id = u.uczestnik_id;
+
+RETURN COALESCE(v_wynik, '[]'::json);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- ---------------------------------------------------------
+-- KROK 3: Historia wszystkich zadań wyzwania w oknie dat
+-- p_od / p_do przycinają domyślny zakres (jak w fn_pobierz_historie_wykresu, ale wspólny
+-- dla całego wyzwania). p_od_zmiany (tryb przyrostowy) zostawia tylko dni, w których
+-- coś się zmieniło od tego momentu. 'znacznik' z wyniku klient przekazuje przy kolejnym
+-- pobraniu. Zwraca NULL, jeśli wyzwanie nie istnieje.
+-- ---------------------------------------------------------
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wyzwania(
+    p_wyzwanie_id INT,
+    p_od DATE DEFAULT NULL,
+    p_do DATE DEFAULT NULL,
+    p_od_zmiany TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+    v_wynik JSON;
+BEGIN
+SELECT w.data_start, w.data_koniec, w.czasowe
+INTO v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania w
+WHERE w.id = p_wyzwanie_id;
+
+IF NOT FOUND THEN
+    RETURN NULL;
+END IF;
+
+-- Domyślny zakres - te same reguły co w fn_pobierz_historie_wykresu
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+    v_koniec_calc := v_data_koniec::date;
+ELSE
+    v_koniec_calc := CURRENT_DATE;
+END IF;
+
+IF v_czasowe AND v_data_start IS NOT NULL THEN
+    v_start_calc := v_data_start::date;
+ELSE
+    v_start_calc := COALESCE(
+        (SELECT MIN(a.dzien)
+         FROM agregat_progresu_dziennego a
+                  JOIN zadania_dzienne zd ON zd.id = a.zadanie_id
+         WHERE zd.wyzwanie_id = p_wyzwanie_id),
+        CURRENT_DATE);
+END IF;
+
+-- Okno żądane przez klienta
+v_start_calc := GREATEST(v_start_calc, COALESCE(p_od, v_start_calc));
+v_koniec_calc := LEAST(v_koniec_calc, COALESCE(p_do, v_koniec_calc));
+
+WITH zadania AS (
+    SELECT zd.id AS zadanie_id
+    FROM zadania_dzienne zd
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+),
+     uczestnicy AS (
+         SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+         FROM uczestnicy_wyzwan uw
+                  JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+         WHERE uw.wyzwanie_id = p_wyzwanie_id
+           AND uw.zaakceptowane = TRUE
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.zadanie_id, a.dzien, a.procent, a.zmieniono
+         FROM agregat_progresu_dziennego a
+                  JOIN zadania z ON z.zadanie_id = a.zadanie_id
+         WHERE a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     -- Dni zmienione od p_od_zmiany. Margines 10 s obejmuje transakcje zapisu, które
+     -- zaczęły się przed poprzednim odczytem, a zatwierdziły po nim (ponowne wysłanie dnia nic nie psuje).
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+         WHERE p_od_zmiany IS NULL
+            OR d::date IN (SELECT dzien FROM wykonane
+                           WHERE zmieniono > p_od_zmiany - INTERVAL '10 seconds')
+     ),
+     punkty AS (
+         SELECT z.zadanie_id, u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM zadania z
+                  CROSS JOIN uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w
+                            ON w.zadanie_id = z.zadanie_id
+                                AND w.uczestnik_id = u.uczestnik_id
+                                AND w.dzien = d.dzien
+         GROUP BY z.zadanie_id, u.uczestnik_id
+     ),
+     historia AS (
+         SELECT z.zadanie_id,
+                COALESCE(json_agg(
+                                 json_build_object(
+                                         'uczestnik_id', u.uczestnik_id,
+                                         'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                         'punkty', COALESCE(p.punkty, '[]'::json)
+                                 ) ORDER BY u.uczestnik_id
+                         ) FILTER (WHERE u.uczestnik_id IS NOT NULL), '[]'::json) AS historia
+         FROM zadania z
+                  LEFT JOIN uczestnicy u ON TRUE
+                  LEFT JOIN punkty p ON p.zadanie_id = z.zadanie_id AND p.uczestnik_id = u.uczestnik_id
+         GROUP BY z.zadanie_id
+     )
+SELECT json_build_object(
+               'od', v_start_calc,
+               'do', v_koniec_calc,
+               'znacznik', NOW(),
+               'zadania', COALESCE(json_agg(
+                                          json_build_object('zadanie_id', h.zadanie_id, 'historia', h.historia)
+                                              ORDER BY h.zadanie_id
+                                  ), '[]'::json)
+       ) INTO v_wynik
+FROM historia h;
+
+RETURN v_wynik;
+END;
+$$ LANGUAGE plpgsql;
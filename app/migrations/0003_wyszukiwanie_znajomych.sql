@@ -0,0 +1,64 @@
+-- Wyszukiwanie potencjalnych znajomych: indeks trigramowy, ranking i stronicowanie kursorem.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ILIKE '%fraza%' korzysta z indeksu GIN zamiast skanu całej tabeli
+CREATE INDEX IF NOT EXISTS idx_uzytkownicy_nazwa_trgm
+    ON uzytkownicy USING gin (nazwa_uzytkownika gin_trgm_ops);
+
+-- Relacja sprawdzana w obu kierunkach - po indeksie na kierunek
+CREATE INDEX IF NOT EXISTS idx_znajomi_uzytkownik_znajomy ON znajomi (uzytkownik_id, znajomy_id);
+CREATE INDEX IF NOT EXISTS idx_znajomi_znajomy_uzytkownik ON znajomi (znajomy_id, uzytkownik_id);
+
+DROP FUNCTION IF EXISTS szukaj_potencjalnych_znajomych(VARCHAR, INT);
+
+-- Kolejność: najpierw nazwy zaczynające się od frazy (priorytet 0), potem pozostałe (1);
+-- w grupie malejąco po podobieństwie trigramowym, dalej po nazwie i id.
+-- Kolejna strona zaczyna się za krotką (p_po_priorytet, p_po_podobienstwo, p_po_nazwa, p_po_id)
+-- ostatniego wiersza poprzedniej strony (NULL = pierwsza strona).
+CREATE OR REPLACE FUNCTION szukaj_potencjalnych_znajomych(
+    p_szukana_fraza VARCHAR,
+    p_moje_id INT,
+    p_limit INT DEFAULT 20,
+    p_po_priorytet INT DEFAULT NULL,
+    p_po_podobienstwo FLOAT DEFAULT NULL,
+    p_po_nazwa VARCHAR DEFAULT NULL,
+    p_po_id INT DEFAULT NULL
+)
+RETURNS TABLE (
+    id INT,
+    nazwa_uzytkownika VARCHAR,
+    email VARCHAR,
+    priorytet INT,
+    podobienstwo FLOAT
+) AS $$
+DECLARE
+    -- %, _ i \ we frazie traktujemy dosłownie
+    v_wzorzec TEXT := replace(replace(replace(p_szukana_fraza, '\', '\\'), '%', '\%'), '_', '\_');
+BEGIN
+RETURN QUERY
+WITH kandydaci AS (
+    SELECT u.id, u.nazwa_uzytkownika, u.email,
+           CASE WHEN u.nazwa_uzytkownika ILIKE v_wzorzec || '%' THEN 0 ELSE 1 END AS priorytet,
+           similarity(u.nazwa_uzytkownika, p_szukana_fraza)::FLOAT AS podobienstwo
+    FROM uzytkownicy u
+    WHERE u.nazwa_uzytkownika ILIKE '%' || v_wzorzec || '%'
+      AND u.id != p_moje_id
+      AND NOT EXISTS (
+          SELECT 1 FROM znajomi z
+          WHERE z.uzytkownik_id = p_moje_id AND z.znajomy_id = u.id
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM znajomi z
+          WHERE z.uzytkownik_id = u.id AND z.znajomy_id = p_moje_id
+      )
+)
+SELECT k.id, k.nazwa_uzytkownika, k.email, k.priorytet, k.podobienstwo
+FROM kandydaci k
+WHERE p_po_id IS NULL
+   OR (k.priorytet, -k.podobienstwo, k.nazwa_uzytkownika, k.id)
+          > (p_po_priorytet, -p_po_podobienstwo, p_po_nazwa, p_po_id)
+ORDER BY k.priorytet, k.podobienstwo DESC, k.nazwa_uzytkownika, k.id
+LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql STABLE;
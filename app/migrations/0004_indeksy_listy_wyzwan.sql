@@ -0,0 +1,6 @@
+-- Lista wyzwań użytkownika (GET /wyzwania/): EXISTS po uczestnikach zamiast DISTINCT po złączeniu,
+-- stronicowanie kluczem po id malejąco.
+CREATE INDEX IF NOT EXISTS idx_uczestnicy_wyzwan_uzytkownik_wyzwanie
+    ON uczestnicy_wyzwan (uzytkownik_id, wyzwanie_id) WHERE zaakceptowane;
+CREATE INDEX IF NOT EXISTS idx_uczestnicy_wyzwan_wyzwanie ON uczestnicy_wyzwan (wyzwanie_id);
+CREATE INDEX IF NOT EXISTS idx_wyzwania_autor ON wyzwania (autor_id, id);
@@ -0,0 +1,9 @@
+-- Rola trafia do tokena JWT przy logowaniu (claim 'rola'), więc widok logowania ją zwraca.
+CREATE OR REPLACE VIEW widok_dane_logowania AS
+SELECT
+    id,
+    nazwa_uzytkownika,
+    email,
+    hashed_haslo,
+    rola
+FROM uzytkownicy;
@@ -0,0 +1,109 @@
+-- Pulpit (GET /home/): wszystkie sekcje strony głównej jednym zapytaniem.
+-- Sekcje mają ten sam kształt co odpowiedzi osobnych endpointów (/znajomi/*, /wyzwania/*).
+-- p_sekcje = NULL -> wszystkie sekcje; pominięte sekcje mają wartość NULL.
+-- p_admin - rola z tokena: admin widzi na liście wszystkie wyzwania (jak GET /wyzwania/).
+CREATE OR REPLACE FUNCTION fn_pulpit_json(
+    p_user_id INT,
+    p_admin BOOLEAN DEFAULT FALSE,
+    p_sekcje TEXT[] DEFAULT NULL,
+    p_limit_wyzwan INT DEFAULT 100
+)
+RETURNS JSON AS $$
+SELECT json_build_object(
+    'znajomi', CASE WHEN p_sekcje IS NULL OR 'znajomi' = ANY(p_sekcje) THEN (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', z.id,
+                   'nazwa_uzytkownika', z.nazwa_uzytkownika,
+                   'email', z.email,
+                   'profilowe_url', z.profilowe_url
+               ) ORDER BY z.nazwa_uzytkownika, z.id), '[]'::json)
+        FROM (
+            SELECT r.znajomy_id AS id, r.adresat_nazwa AS nazwa_uzytkownika,
+                   r.adresat_email AS email, r.adresat_profilowe_url AS profilowe_url
+            FROM widok_szczegoly_relacji r
+            WHERE r.uzytkownik_id = p_user_id AND r.sa_znajomymi = TRUE
+            UNION ALL
+            SELECT r.uzytkownik_id, r.inicjator_nazwa, r.inicjator_email, r.inicjator_profilowe_url
+            FROM widok_szczegoly_relacji r
+            WHERE r.znajomy_id = p_user_id AND r.sa_znajomymi = TRUE
+        ) z
+    ) END,
+
+    'pending_wyslane', CASE WHEN p_sekcje IS NULL OR 'pending_wyslane' = ANY(p_sekcje) THEN (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'relacja_id', r.relacja_id,
+                   'uzytkownik', json_build_object(
+                       'id', r.znajomy_id, 'nazwa_uzytkownika', r.adresat_nazwa, 'email', r.adresat_email)
+               ) ORDER BY r.relacja_id), '[]'::json)
+        FROM widok_szczegoly_relacji r
+        WHERE r.uzytkownik_id = p_user_id AND r.status = 'oczekujacy'
+    ) END,
+
+    'pending_odebrane', CASE WHEN p_sekcje IS NULL OR 'pending_odebrane' = ANY(p_sekcje) THEN (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'relacja_id', r.relacja_id,
+                   'uzytkownik', json_build_object(
+                       'id', r.uzytkownik_id, 'nazwa_uzytkownika', r.inicjator_nazwa, 'email', r.inicjator_email)
+               ) ORDER BY r.relacja_id), '[]'::json)
+        FROM widok_szczegoly_relacji r
+        WHERE r.znajomy_id = p_user_id AND r.status = 'oczekujacy'
+    ) END,
+
+    -- Pierwsza strona listy wyzwań (dalsze strony: GET /wyzwania/?after_id=...)
+    'wyzwania', CASE WHEN p_sekcje IS NULL OR 'wyzwania' = ANY(p_sekcje) THEN (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'id', w.id,
+                   'nazwa', w.nazwa,
+                   'opis', w.opis,
+                   'czasowe', w.czasowe,
+                   'data_start', w.data_start,
+                   'data_koniec', w.data_koniec,
+                   'autor_id', w.autor_id
+               ) ORDER BY w.id DESC), '[]'::json)
+        FROM (
+            SELECT w.*
+            FROM wyzwania w
+            WHERE p_admin
+               OR w.autor_id = p_user_id
+               OR EXISTS (SELECT 1 FROM uczestnicy_wyzwan uw
+                          WHERE uw.wyzwanie_id = w.id
+                            AND uw.uzytkownik_id = p_user_id
+                            AND uw.zaakceptowane)
+            ORDER BY w.id DESC
+            LIMIT p_limit_wyzwan
+        ) w
+    ) END,
+
+    'wyzwania_zaproszenia_odebrane', CASE WHEN p_sekcje IS NULL OR 'wyzwania_zaproszenia_odebrane' = ANY(p_sekcje) THEN (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'uczestnictwo_id', v.uczestnictwo_id,
+                   'wyzwanie_id', v.wyzwanie_id,
+                   'nazwa', v.wyzwanie_nazwa,
+                   'opis', v.wyzwanie_opis,
+                   'autor_id', v.autor_id,
+                   'autor_nazwa', v.autor_nazwa
+               ) ORDER BY v.uczestnictwo_id), '[]'::json)
+        FROM widok_odebrane_zaproszenia_wyzwania v
+        WHERE v.odbiorca_id = p_user_id
+    ) END,
+
+    'wyzwania_zaproszenia_wyslane', CASE WHEN p_sekcje IS NULL OR 'wyzwania_zaproszenia_wyslane' = ANY(p_sekcje) THEN (
+        SELECT COALESCE(json_agg(json_build_object(
+                   'uczestnictwo_id', v.uczestnictwo_id,
+                   'wyzwanie_id', v.wyzwanie_id,
+                   'wyzwanie_nazwa', v.wyzwanie_nazwa,
+                   'odbiorca_id', v.odbiorca_id,
+                   'odbiorca_nazwa', v.odbiorca_nazwa
+               ) ORDER BY v.uczestnictwo_id), '[]'::json)
+        FROM widok_wyslane_zaproszenia_wyzwania v
+        WHERE v.autor_id = p_user_id
+    ) END,
+
+    'statystyki', CASE WHEN p_sekcje IS NULL OR 'statystyki' = ANY(p_sekcje) THEN json_build_object(
+        'liczba_znajomych', COALESCE((SELECT s.liczba_znajomych
+                                      FROM widok_statystyki_znajomych s
+                                      WHERE s.uzytkownik_id = p_user_id), 0),
+        'liczba_oczekujacych_zaproszen', zlicz_oczekujace_zaproszenia(p_user_id)
+    ) END
+);
+$$ LANGUAGE sql STABLE;
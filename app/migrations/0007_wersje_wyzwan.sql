@@ -0,0 +1,86 @@
+-- Wersja szczegółów wyzwania (ETag w GET /wyzwania/{id}).
+-- Podbijana wyzwalaczami przy każdej zmianie danych, z których składa się fn_get_wyzwanie_json:
+-- wyzwanie, uczestnicy (i ich nazwy), zadania dzienne, podzadania.
+CREATE TABLE IF NOT EXISTS wyzwania_wersje (
+    wyzwanie_id INT PRIMARY KEY REFERENCES wyzwania(id) ON DELETE CASCADE,
+    wersja BIGINT NOT NULL DEFAULT 1
+    );
+
+INSERT INTO wyzwania_wersje (wyzwanie_id)
+SELECT id FROM wyzwania
+ON CONFLICT (wyzwanie_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION fn_podbij_wersje_wyzwania(p_wyzwanie_id INT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_wyzwanie_id IS NULL OR NOT EXISTS (SELECT 1 FROM wyzwania WHERE id = p_wyzwanie_id) THEN
+        RETURN; -- wyzwanie właśnie usuwane - wersja znika razem z nim
+END IF;
+
+INSERT INTO wyzwania_wersje (wyzwanie_id) VALUES (p_wyzwanie_id)
+ON CONFLICT (wyzwanie_id) DO UPDATE SET wersja = wyzwania_wersje.wersja + 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Wspólny wyzwalacz: TG_ARGV[0] mówi, jak z wiersza dojść do wyzwania
+CREATE OR REPLACE FUNCTION fn_trg_wersja_wyzwania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_ARGV[0] = 'wyzwania' THEN
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM fn_podbij_wersje_wyzwania(NEW.id);
+END IF;
+    ELSIF TG_ARGV[0] = 'wyzwanie_id' THEN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM fn_podbij_wersje_wyzwania(NEW.wyzwanie_id);
+ELSE
+            PERFORM fn_podbij_wersje_wyzwania(OLD.wyzwanie_id);
+            IF TG_OP = 'UPDATE' AND NEW.wyzwanie_id IS DISTINCT FROM OLD.wyzwanie_id THEN
+                PERFORM fn_podbij_wersje_wyzwania(NEW.wyzwanie_id);
+END IF;
+END IF;
+    ELSIF TG_ARGV[0] = 'zadanie_id' THEN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM fn_podbij_wersje_wyzwania((SELECT wyzwanie_id FROM zadania_dzienne WHERE id = NEW.zadanie_id));
+ELSE
+            PERFORM fn_podbij_wersje_wyzwania((SELECT wyzwanie_id FROM zadania_dzienne WHERE id = OLD.zadanie_id));
+            IF TG_OP = 'UPDATE' AND NEW.zadanie_id IS DISTINCT FROM OLD.zadanie_id THEN
+                PERFORM fn_podbij_wersje_wyzwania((SELECT wyzwanie_id FROM zadania_dzienne WHERE id = NEW.zadanie_id));
+END IF;
+END IF;
+    ELSIF TG_ARGV[0] = 'uzytkownik' THEN
+        -- zmiana nazwy użytkownika widocznej na liście uczestników
+UPDATE wyzwania_wersje ww
+SET wersja = ww.wersja + 1
+WHERE ww.wyzwanie_id IN (SELECT wyzwanie_id FROM uczestnicy_wyzwan WHERE uzytkownik_id = NEW.id);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_wersja_wyzwania ON wyzwania;
+CREATE TRIGGER trg_wersja_wyzwania
+    AFTER INSERT OR UPDATE ON wyzwania
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_wersja_wyzwania('wyzwania');
+
+DROP TRIGGER IF EXISTS trg_wersja_wyzwania ON uczestnicy_wyzwan;
+CREATE TRIGGER trg_wersja_wyzwania
+    AFTER INSERT OR UPDATE OR DELETE ON uczestnicy_wyzwan
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_wersja_wyzwania('wyzwanie_id');
+
+DROP TRIGGER IF EXISTS trg_wersja_wyzwania ON zadania_dzienne;
+CREATE TRIGGER trg_wersja_wyzwania
+    AFTER INSERT OR UPDATE OR DELETE ON zadania_dzienne
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_wersja_wyzwania('wyzwanie_id');
+
+DROP TRIGGER IF EXISTS trg_wersja_wyzwania ON podzadania;
+CREATE TRIGGER trg_wersja_wyzwania
+    AFTER INSERT OR UPDATE OR DELETE ON podzadania
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_wersja_wyzwania('zadanie_id');
+
+DROP TRIGGER IF EXISTS trg_wersja_wyzwania ON uzytkownicy;
+CREATE TRIGGER trg_wersja_wyzwania
+    AFTER UPDATE OF nazwa_uzytkownika ON uzytkownicy
+    FOR EACH ROW
+    WHEN (OLD.nazwa_uzytkownika IS DISTINCT FROM NEW.nazwa_uzytkownika)
+    EXECUTE FUNCTION fn_trg_wersja_wyzwania('uzytkownik');
@@ -0,0 +1,80 @@
+-- Powiadomienia o zmianach (LISTEN/NOTIFY) dla cache w procesach backendu (app/notify.py).
+--   'zmiany_wyzwan' - payload: id wyzwania, którego szczegóły (fn_get_wyzwanie_json) się zmieniły
+--   'zmiany_rol'    - payload: id użytkownika, któremu zmieniono rolę
+-- NOTIFY jest wysyłany przy zatwierdzeniu transakcji, a powtórzenia w jednej transakcji są scalane.
+
+CREATE OR REPLACE FUNCTION fn_podbij_wersje_wyzwania(p_wyzwanie_id INT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_wyzwanie_id IS NULL THEN
+        RETURN;
+END IF;
+
+    PERFORM pg_notify('zmiany_wyzwan', p_wyzwanie_id::text);
+
+    IF NOT EXISTS (SELECT 1 FROM wyzwania WHERE id = p_wyzwanie_id) THEN
+        RETURN; -- wyzwanie właśnie usuwane - wersja znika razem z nim
+END IF;
+
+INSERT INTO wyzwania_wersje (wyzwanie_id) VALUES (p_wyzwanie_id)
+ON CONFLICT (wyzwanie_id) DO UPDATE SET wersja = wyzwania_wersje.wersja + 1;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_trg_wersja_wyzwania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_ARGV[0] = 'wyzwania' THEN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM pg_notify('zmiany_wyzwan', OLD.id::text);
+ELSE
+            PERFORM fn_podbij_wersje_wyzwania(NEW.id);
+END IF;
+    ELSIF TG_ARGV[0] = 'wyzwanie_id' THEN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM fn_podbij_wersje_wyzwania(NEW.wyzwanie_id);
+ELSE
+            PERFORM fn_podbij_wersje_wyzwania(OLD.wyzwanie_id);
+            IF TG_OP = 'UPDATE' AND NEW.wyzwanie_id IS DISTINCT FROM OLD.wyzwanie_id THEN
+                PERFORM fn_podbij_wersje_wyzwania(NEW.wyzwanie_id);
+END IF;
+END IF;
+    ELSIF TG_ARGV[0] = 'zadanie_id' THEN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM fn_podbij_wersje_wyzwania((SELECT wyzwanie_id FROM zadania_dzienne WHERE id = NEW.zadanie_id));
+ELSE
+            PERFORM fn_podbij_wersje_wyzwania((SELECT wyzwanie_id FROM zadania_dzienne WHERE id = OLD.zadanie_id));
+            IF TG_OP = 'UPDATE' AND NEW.zadanie_id IS DISTINCT FROM OLD.zadanie_id THEN
+                PERFORM fn_podbij_wersje_wyzwania((SELECT wyzwanie_id FROM zadania_dzienne WHERE id = NEW.zadanie_id));
+END IF;
+END IF;
+    ELSIF TG_ARGV[0] = 'uzytkownik' THEN
+        -- zmiana nazwy użytkownika widocznej na liście uczestników
+PERFORM fn_podbij_wersje_wyzwania(uw.wyzwanie_id)
+FROM uczestnicy_wyzwan uw
+WHERE uw.uzytkownik_id = NEW.id;
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_wersja_wyzwania ON wyzwania;
+CREATE TRIGGER trg_wersja_wyzwania
+    AFTER INSERT OR UPDATE OR DELETE ON wyzwania
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_wersja_wyzwania('wyzwania');
+
+
+CREATE OR REPLACE FUNCTION fn_trg_zmiana_roli()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('zmiany_rol', NEW.id::text);
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_zmiana_roli ON uzytkownicy;
+CREATE TRIGGER trg_zmiana_roli
+    AFTER UPDATE OF rola ON uzytkownicy
+    FOR EACH ROW
+    WHEN (OLD.rola IS DISTINCT FROM NEW.rola)
+    EXECUTE FUNCTION fn_trg_zmiana_roli();
@@ -0,0 +1,82 @@
+-- Zdarzenia postępu na żywo (WebSocket /ws/wyzwania/{id}, app/realtime.py).
+-- Każda zmiana wpisu postępu wysyła NOTIFY 'progres_wyzwan' z małym JSON-em:
+--   {"wyzwanie_id", "uczestnik_id", "uzytkownik_id", "zadanie_id", "podzadanie_id" (NULL dla zadania prostego),
+--    "dzien", "wykonane", "procent"}
+-- "procent" pochodzi z agregat_progresu_dziennego - wyzwalacze wykonują się w kolejności nazw,
+-- więc trg_powiadom_* (po trg_agregat_*) widzi już odświeżony agregat.
+-- Usunięcie wpisu jest wysyłane jako wykonane = false.
+
+CREATE OR REPLACE FUNCTION fn_trg_powiadom_progres()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_wiersz RECORD;
+    v_zadanie_id INT;
+    v_podzadanie_id INT;
+    v_wyzwanie_id INT;
+    v_uzytkownik_id INT;
+    v_procent INT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_wiersz := OLD;
+    ELSE
+        v_wiersz := NEW;
+END IF;
+
+    IF TG_TABLE_NAME = 'progres_podzadania' THEN
+        v_podzadanie_id := v_wiersz.podzadanie_id;
+SELECT zadanie_id INTO v_zadanie_id FROM podzadania WHERE id = v_podzadanie_id;
+ELSE
+        v_zadanie_id := v_wiersz.zadanie_id;
+END IF;
+
+SELECT uw.wyzwanie_id, uw.uzytkownik_id INTO v_wyzwanie_id, v_uzytkownik_id
+FROM uczestnicy_wyzwan uw
+WHERE uw.id = v_wiersz.uczestnik_id;
+
+    IF v_wyzwanie_id IS NULL THEN
+        RETURN NULL; -- uczestnictwo usuwane razem z wyzwaniem
+END IF;
+
+SELECT a.procent INTO v_procent
+FROM agregat_progresu_dziennego a
+WHERE a.uczestnik_id = v_wiersz.uczestnik_id
+  AND a.zadanie_id = v_zadanie_id
+  AND a.dzien = v_wiersz.data::date;
+
+PERFORM pg_notify('progres_wyzwan', json_build_object(
+        'wyzwanie_id', v_wyzwanie_id,
+        'uczestnik_id', v_wiersz.uczestnik_id,
+        'uzytkownik_id', v_uzytkownik_id,
+        'zadanie_id', v_zadanie_id,
+        'podzadanie_id', v_podzadanie_id,
+        'dzien', v_wiersz.data::date,
+        'wykonane', TG_OP <> 'DELETE' AND COALESCE(v_wiersz.wykonane, FALSE),
+        'procent', COALESCE(v_procent, 0)
+    )::text);
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_powiadom_progres ON progres_podzadania;
+CREATE TRIGGER trg_powiadom_progres
+    AFTER INSERT OR DELETE ON progres_podzadania
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_powiadom_progres();
+
+DROP TRIGGER IF EXISTS trg_powiadom_progres_zmiana ON progres_podzadania;
+CREATE TRIGGER trg_powiadom_progres_zmiana
+    AFTER UPDATE ON progres_podzadania
+    FOR EACH ROW
+    WHEN (OLD.wykonane IS DISTINCT FROM NEW.wykonane)
+    EXECUTE FUNCTION fn_trg_powiadom_progres();
+
+DROP TRIGGER IF EXISTS trg_powiadom_progres ON progres_dzienne;
+CREATE TRIGGER trg_powiadom_progres
+    AFTER INSERT OR DELETE ON progres_dzienne
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_powiadom_progres();
+
+DROP TRIGGER IF EXISTS trg_powiadom_progres_zmiana ON progres_dzienne;
+CREATE TRIGGER trg_powiadom_progres_zmiana
+    AFTER UPDATE ON progres_dzienne
+    FOR EACH ROW
+    WHEN (OLD.wykonane IS DISTINCT FROM NEW.wykonane)
+    EXECUTE FUNCTION fn_trg_powiadom_progres();
@@ -0,0 +1,151 @@
+-- Dziennik zdarzeń dla użytkowników (GET /events, Server-Sent Events).
+-- Wyzwalacze na znajomi i uczestnicy_wyzwan dopisują zdarzenie adresatowi, a wyzwalacz dziennika
+-- wysyła je w całości przez NOTIFY 'zdarzenia_uzytkownikow' - otwarte strumienie nie czytają bazy.
+-- id z dziennika jest polem "id:" SSE, więc klient po ponownym połączeniu (Last-Event-ID)
+-- dostaje zaległe zdarzenia. Stare wpisy usuwa fn_wyczysc_zdarzenia (python -m app.cli czysc-zdarzenia).
+CREATE TABLE IF NOT EXISTS zdarzenia_uzytkownikow (
+    id BIGSERIAL PRIMARY KEY,
+    uzytkownik_id INT NOT NULL REFERENCES uzytkownicy(id) ON DELETE CASCADE,
+    typ VARCHAR(50) NOT NULL,
+    dane JSONB NOT NULL DEFAULT '{}'::jsonb,
+    utworzono TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+
+CREATE INDEX IF NOT EXISTS idx_zdarzenia_uzytkownikow_uzytkownik ON zdarzenia_uzytkownikow (uzytkownik_id, id);
+CREATE INDEX IF NOT EXISTS idx_zdarzenia_uzytkownikow_utworzono ON zdarzenia_uzytkownikow (utworzono);
+
+
+CREATE OR REPLACE FUNCTION fn_trg_powiadom_zdarzenie()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('zdarzenia_uzytkownikow', json_build_object(
+        'id', NEW.id,
+        'uzytkownik_id', NEW.uzytkownik_id,
+        'typ', NEW.typ,
+        'dane', NEW.dane
+    )::text);
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_powiadom_zdarzenie ON zdarzenia_uzytkownikow;
+CREATE TRIGGER trg_powiadom_zdarzenie
+    AFTER INSERT ON zdarzenia_uzytkownikow
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_powiadom_zdarzenie();
+
+
+-- Zaproszenia do znajomych: nowe -> adresat, zmiana statusu -> obie strony
+CREATE OR REPLACE FUNCTION fn_trg_zdarzenia_znajomi()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO zdarzenia_uzytkownikow (uzytkownik_id, typ, dane)
+        SELECT NEW.znajomy_id, 'zaproszenie_znajomego', jsonb_build_object(
+                   'relacja_id', NEW.id,
+                   'status', NEW.status,
+                   'uzytkownik', jsonb_build_object('id', u.id, 'nazwa_uzytkownika', u.nazwa_uzytkownika))
+        FROM uzytkownicy u
+        WHERE u.id = NEW.uzytkownik_id;
+ELSE
+        INSERT INTO zdarzenia_uzytkownikow (uzytkownik_id, typ, dane)
+        SELECT odbiorca, 'zaproszenie_znajomego_status', jsonb_build_object(
+                   'relacja_id', NEW.id,
+                   'status', NEW.status,
+                   'sa_znajomymi', NEW.sa_znajomymi)
+        FROM unnest(ARRAY[NEW.uzytkownik_id, NEW.znajomy_id]) AS odbiorca;
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_zdarzenia_znajomi ON znajomi;
+CREATE TRIGGER trg_zdarzenia_znajomi
+    AFTER INSERT ON znajomi
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_zdarzenia_znajomi();
+
+DROP TRIGGER IF EXISTS trg_zdarzenia_znajomi_status ON znajomi;
+CREATE TRIGGER trg_zdarzenia_znajomi_status
+    AFTER UPDATE OF status, sa_znajomymi ON znajomi
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.sa_znajomymi IS DISTINCT FROM NEW.sa_znajomymi)
+    EXECUTE FUNCTION fn_trg_zdarzenia_znajomi();
+
+
+-- Zaproszenia do wyzwań: nowe (poza autorem) -> zaproszony,
+-- akceptacja / odrzucenie (usunięcie niezaakceptowanego) -> zaproszony i autor
+CREATE OR REPLACE FUNCTION fn_trg_zdarzenia_uczestnicy()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_wiersz RECORD;
+    v_status TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.zaakceptowane THEN
+            RETURN NULL; -- autor dodawany automatycznie
+END IF;
+        INSERT INTO zdarzenia_uzytkownikow (uzytkownik_id, typ, dane)
+        SELECT NEW.uzytkownik_id, 'zaproszenie_wyzwania', jsonb_build_object(
+                   'uczestnictwo_id', NEW.id,
+                   'wyzwanie_id', w.id,
+                   'nazwa', w.nazwa,
+                   'autor_id', w.autor_id,
+                   'autor_nazwa', a.nazwa_uzytkownika)
+        FROM wyzwania w
+                 JOIN uzytkownicy a ON a.id = w.autor_id
+        WHERE w.id = NEW.wyzwanie_id;
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        v_wiersz := OLD;
+        v_status := 'odrzucone';
+ELSE
+        v_wiersz := NEW;
+        v_status := CASE WHEN NEW.zaakceptowane THEN 'zaakceptowane' ELSE 'oczekujace' END;
+END IF;
+
+INSERT INTO zdarzenia_uzytkownikow (uzytkownik_id, typ, dane)
+SELECT DISTINCT odbiorca, 'zaproszenie_wyzwania_status', jsonb_build_object(
+           'uczestnictwo_id', v_wiersz.id,
+           'wyzwanie_id', v_wiersz.wyzwanie_id,
+           'uzytkownik_id', v_wiersz.uzytkownik_id,
+           'status', v_status)
+FROM unnest(ARRAY[v_wiersz.uzytkownik_id,
+                  (SELECT autor_id FROM wyzwania WHERE id = v_wiersz.wyzwanie_id)]) AS odbiorca
+WHERE odbiorca IS NOT NULL;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_zdarzenia_uczestnicy ON uczestnicy_wyzwan;
+CREATE TRIGGER trg_zdarzenia_uczestnicy
+    AFTER INSERT ON uczestnicy_wyzwan
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_zdarzenia_uczestnicy();
+
+DROP TRIGGER IF EXISTS trg_zdarzenia_uczestnicy_status ON uczestnicy_wyzwan;
+CREATE TRIGGER trg_zdarzenia_uczestnicy_status
+    AFTER UPDATE OF zaakceptowane ON uczestnicy_wyzwan
+    FOR EACH ROW
+    WHEN (OLD.zaakceptowane IS DISTINCT FROM NEW.zaakceptowane)
+    EXECUTE FUNCTION fn_trg_zdarzenia_uczestnicy();
+
+-- Tylko odrzucone zaproszenia - usunięcie uczestnika, który je przyjął, nie jest zaproszeniem
+DROP TRIGGER IF EXISTS trg_zdarzenia_uczestnicy_odrzucenie ON uczestnicy_wyzwan;
+CREATE TRIGGER trg_zdarzenia_uczestnicy_odrzucenie
+    AFTER DELETE ON uczestnicy_wyzwan
+    FOR EACH ROW
+    WHEN (NOT OLD.zaakceptowane)
+    EXECUTE FUNCTION fn_trg_zdarzenia_uczestnicy();
+
+
+-- Usuwa zdarzenia starsze niż p_starsze_niz. Zwraca liczbę usuniętych wierszy.
+CREATE OR REPLACE FUNCTION fn_wyczysc_zdarzenia(p_starsze_niz INTERVAL DEFAULT INTERVAL '7 days')
+RETURNS INT AS $$
+DECLARE
+    v_liczba INT;
+BEGIN
+    DELETE FROM zdarzenia_uzytkownikow WHERE utworzono < NOW() - p_starsze_niz;
+    GET DIAGNOSTICS v_liczba = ROW_COUNT;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
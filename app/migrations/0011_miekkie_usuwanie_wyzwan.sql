@@ -0,0 +1,533 @@
+-- Miękkie usuwanie wyzwań i czyszczenie w tle (DELETE /wyzwania/, app/czyszczenie.py).
+--
+-- Tabela wyzwań nazywa się teraz wyzwania_wszystkie i ma kolumnę usunieto, a nazwa "wyzwania"
+-- to widok z samymi nieusuniętymi wierszami. Wszystkie funkcje i zapytania aplikacji czytające
+-- "wyzwania" od razu przestają widzieć usunięte wyzwanie - usunięcie to jeden UPDATE.
+-- Widok jest automatycznie modyfikowalny (INSERT ... RETURNING w fn_utworz_wyzwanie działa bez zmian).
+-- Klucze obce i wyzwalacze zostają przy tabeli. Nowe kolumny wyzwań wymagają odtworzenia widoku,
+-- a nowe klucze obce muszą wskazywać wyzwania_wszystkie.
+--
+-- Właściwe usuwanie danych (progres, zadania, uczestnicy) robi w tle fn_usun_porcje_wyzwan:
+-- porcjami w krótkich transakcjach, postęp zapisuje w usuwanie_wyzwan.
+
+ALTER TABLE wyzwania RENAME TO wyzwania_wszystkie;
+ALTER TABLE wyzwania_wszystkie ADD COLUMN IF NOT EXISTS usunieto TIMESTAMPTZ;
+
+CREATE OR REPLACE VIEW wyzwania AS
+SELECT id, nazwa, opis, czasowe, data_start, data_koniec, autor_id
+FROM wyzwania_wszystkie
+WHERE usunieto IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_wyzwania_usuniete ON wyzwania_wszystkie (id) WHERE usunieto IS NOT NULL;
+
+-- Widoki wiążą tabelę przy utworzeniu - odtwarzamy je, żeby czytały już z widoku "wyzwania"
+CREATE OR REPLACE VIEW widok_moje_wyzwania AS
+SELECT DISTINCT
+    w.id, w.nazwa, w.opis, w.czasowe, w.data_start, w.data_koniec, w.autor_id,
+    uw.uzytkownik_id AS uczestnik_id,
+    uw.zaakceptowane
+FROM wyzwania w
+         LEFT JOIN uczestnicy_wyzwan uw
+                   ON uw.wyzwanie_id = w.id;
+
+CREATE OR REPLACE VIEW widok_wyslane_zaproszenia_wyzwania AS
+SELECT
+    uw.id AS uczestnictwo_id,
+    w.id AS wyzwanie_id,
+    w.nazwa AS wyzwanie_nazwa,
+    w.autor_id,               -
+    u.id AS odbiorca_id,
+    u.nazwa_uzytkownika AS odbiorca_nazwa,
+    uw.zaakceptowane
+FROM uczestnicy_wyzwan uw
+         JOIN wyzwania w ON w.id = uw.wyzwanie_id
+         JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+WHERE uw.zaakceptowane = FALSE;
+
+CREATE OR REPLACE VIEW widok_odebrane_zaproszenia_wyzwania AS
+SELECT
+    u.id AS uczestnictwo_id,
+    u.uzytkownik_id AS odbiorca_id,
+    w.id AS wyzwanie_id,
+    w.nazwa AS wyzwanie_nazwa,
+    w.opis AS wyzwanie_opis,
+    w.autor_id,
+    uz.nazwa_uzytkownika AS autor_nazwa
+FROM uczestnicy_wyzwan u
+         JOIN wyzwania w ON w.id = u.wyzwanie_id
+         JOIN uzytkownicy uz ON uz.id = w.autor_id
+WHERE u.zaakceptowane = FALSE;
+
+CREATE OR REPLACE VIEW widok_aktywne_wyzwania_statystyki AS
+SELECT
+    w.id,
+    w.nazwa,
+    COUNT(uw.id) as liczba_uczestnikow
+FROM wyzwania w
+         JOIN uczestnicy_wyzwan uw ON w.id = uw.wyzwanie_id
+GROUP BY w.id, w.nazwa
+HAVING COUNT(uw.id) > 1;
+
+-- Uczestnik usuniętego wyzwania nie może już zapisywać ani czytać progresu
+CREATE OR REPLACE VIEW widok_uczestnik_podzadania AS
+SELECT
+    uw.id AS uczestnik_id,
+    uw.uzytkownik_id,
+    p.id AS podzadanie_id,
+    zd.id AS zadanie_id,
+    uw.wyzwanie_id
+FROM uczestnicy_wyzwan uw
+         JOIN wyzwania w ON w.id = uw.wyzwanie_id
+         JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id
+         JOIN podzadania p ON p.zadanie_id = zd.id;
+
+CREATE OR REPLACE VIEW widok_uczestnik_zadanie_dzienne AS
+SELECT
+    uw.id AS uczestnik_id,
+    uw.uzytkownik_id,
+    zd.id AS zadanie_id,
+    uw.wyzwanie_id
+FROM uczestnicy_wyzwan uw
+         JOIN wyzwania w ON w.id = uw.wyzwanie_id
+         JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id;
+
+CREATE OR REPLACE FUNCTION fn_get_progres_dzienne(
+    p_zadanie_id INT,
+    p_user_id INT
+)
+RETURNS TABLE (
+    procent INT,
+    wykonane BOOLEAN
+) AS $$
+BEGIN
+RETURN QUERY
+    WITH uczestnik AS (
+        SELECT uw.id AS uczestnik_id
+        FROM uczestnicy_wyzwan uw
+                 JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id
+                 JOIN wyzwania w ON w.id = uw.wyzwanie_id
+        WHERE zd.id = p_zadanie_id AND uw.uzytkownik_id = p_user_id
+    )
+SELECT
+    COALESCE(a.procent, 0) AS procent,
+    COALESCE(a.procent, 0) = 100 AS wykonane
+FROM uczestnik u
+         LEFT JOIN agregat_progresu_dziennego a
+                   ON a.uczestnik_id = u.uczestnik_id
+                       AND a.zadanie_id = p_zadanie_id
+                       AND a.dzien = CURRENT_DATE;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_get_progres_wyzwania(
+    p_wyzwanie_id INT,
+    p_user_id INT,
+    p_data DATE DEFAULT CURRENT_DATE
+)
+RETURNS JSON AS $$
+DECLARE
+    v_uczestnik_id INT;
+BEGIN
+SELECT uw.id INTO v_uczestnik_id
+FROM uczestnicy_wyzwan uw
+         JOIN wyzwania w ON w.id = uw.wyzwanie_id
+WHERE uw.wyzwanie_id = p_wyzwanie_id AND uw.uzytkownik_id = p_user_id
+ORDER BY uw.id
+LIMIT 1;
+
+IF v_uczestnik_id IS NULL THEN
+    RETURN NULL;
+END IF;
+
+RETURN (
+    WITH podz AS (
+        SELECT p.id, p.zadanie_id,
+               COALESCE(bool_or(pp.wykonane), FALSE) AS wykonane
+        FROM zadania_dzienne zd
+                 JOIN podzadania p ON p.zadanie_id = zd.id
+                 LEFT JOIN progres_podzadania pp
+                           ON pp.podzadanie_id = p.id
+                               AND pp.uczestnik_id = v_uczestnik_id
+                               AND pp.data >= p_data AND pp.data < p_data + 1
+        WHERE zd.wyzwanie_id = p_wyzwanie_id
+        GROUP BY p.id, p.zadanie_id
+    ),
+         zadania AS (
+             SELECT zd.id AS zadanie_id,
+                    COALESCE(json_agg(
+                                     json_build_object('podzadanie_id', pz.id, 'wykonane', pz.wykonane)
+                                         ORDER BY pz.id
+                             ) FILTER (WHERE pz.id IS NOT NULL), '[]'::json) AS podzadania
+             FROM zadania_dzienne zd
+                      LEFT JOIN podz pz ON pz.zadanie_id = zd.id
+             WHERE zd.wyzwanie_id = p_wyzwanie_id
+             GROUP BY zd.id
+         )
+    SELECT json_build_object(
+                   'uczestnik_id', v_uczestnik_id,
+                   'zadania', COALESCE(json_agg(
+                                              json_build_object(
+                                                      'zadanie_id', z.zadanie_id,
+                                                      'procent', COALESCE(a.procent, 0),
+                                                      'wykonane', COALESCE(a.procent, 0) = 100,
+                                                      'podzadania', z.podzadania
+                                              ) ORDER BY z.zadanie_id
+                                      ), '[]'::json)
+           )
+    FROM zadania z
+             LEFT JOIN agregat_progresu_dziennego a
+                       ON a.uczestnik_id = v_uczestnik_id
+                           AND a.zadanie_id = z.zadanie_id
+                           AND a.dzien = p_data
+);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- ---------------------------------------------------------
+-- Zlecenia czyszczenia
+-- ---------------------------------------------------------
+CREATE TABLE IF NOT EXISTS usuwanie_wyzwan (
+    id BIGSERIAL PRIMARY KEY,
+    zlecil INT REFERENCES uzytkownicy(id) ON DELETE SET NULL,
+    wyzwania_ids INT[] NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'oczekuje',
+    pozostale_wyzwania INT NOT NULL,
+    usuniete_wiersze BIGINT NOT NULL DEFAULT 0,
+    blad TEXT,
+    utworzono TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    rozpoczeto TIMESTAMPTZ,
+    zakonczono TIMESTAMPTZ,
+
+    CONSTRAINT chk_usuwanie_status CHECK (status IN ('oczekuje', 'w_toku', 'zakonczone'))
+    );
+
+CREATE INDEX IF NOT EXISTS idx_usuwanie_wyzwan_niezakonczone ON usuwanie_wyzwan (id) WHERE status <> 'zakonczone';
+
+
+-- Ustawiane (SET LOCAL) na czas porcji czyszczenia: wyzwalacze przeliczające agregaty i wysyłające
+-- powiadomienia pomijają wtedy wiersze usuwanego wyzwania - i tak wszystkie znikną.
+CREATE OR REPLACE FUNCTION fn_czyszczenie_w_toku()
+RETURNS BOOLEAN AS $$
+SELECT COALESCE(current_setting('betya.czyszczenie', true), '') = 'on';
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION fn_trg_agregat_progres_podzadania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_odswiez_agregat_progresu(
+            OLD.uczestnik_id,
+            (SELECT zadanie_id FROM podzadania WHERE id = OLD.podzadanie_id),
+            OLD.data::date);
+END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fn_odswiez_agregat_progresu(
+            NEW.uczestnik_id,
+            (SELECT zadanie_id FROM podzadania WHERE id = NEW.podzadanie_id),
+            NEW.data::date);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_trg_agregat_progres_dzienne()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_odswiez_agregat_progresu(OLD.uczestnik_id, OLD.zadanie_id, OLD.data::date);
+END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fn_odswiez_agregat_progresu(NEW.uczestnik_id, NEW.zadanie_id, NEW.data::date);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_trg_agregat_podzadania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fn_przebuduj_agregat_progresu(OLD.zadanie_id);
+END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.zadanie_id IS DISTINCT FROM OLD.zadanie_id) THEN
+        PERFORM fn_przebuduj_agregat_progresu(NEW.zadanie_id);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_trg_powiadom_progres()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_wiersz RECORD;
+    v_zadanie_id INT;
+    v_podzadanie_id INT;
+    v_wyzwanie_id INT;
+    v_uzytkownik_id INT;
+    v_procent INT;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP = 'DELETE' THEN
+        v_wiersz := OLD;
+    ELSE
+        v_wiersz := NEW;
+END IF;
+
+    IF TG_TABLE_NAME = 'progres_podzadania' THEN
+        v_podzadanie_id := v_wiersz.podzadanie_id;
+SELECT zadanie_id INTO v_zadanie_id FROM podzadania WHERE id = v_podzadanie_id;
+ELSE
+        v_zadanie_id := v_wiersz.zadanie_id;
+END IF;
+
+SELECT uw.wyzwanie_id, uw.uzytkownik_id INTO v_wyzwanie_id, v_uzytkownik_id
+FROM uczestnicy_wyzwan uw
+WHERE uw.id = v_wiersz.uczestnik_id;
+
+    IF v_wyzwanie_id IS NULL THEN
+        RETURN NULL; -- uczestnictwo usuwane razem z wyzwaniem
+END IF;
+
+SELECT a.procent INTO v_procent
+FROM agregat_progresu_dziennego a
+WHERE a.uczestnik_id = v_wiersz.uczestnik_id
+  AND a.zadanie_id = v_zadanie_id
+  AND a.dzien = v_wiersz.data::date;
+
+PERFORM pg_notify('progres_wyzwan', json_build_object(
+        'wyzwanie_id', v_wyzwanie_id,
+        'uczestnik_id', v_wiersz.uczestnik_id,
+        'uzytkownik_id', v_uzytkownik_id,
+        'zadanie_id', v_zadanie_id,
+        'podzadanie_id', v_podzadanie_id,
+        'dzien', v_wiersz.data::date,
+        'wykonane', TG_OP <> 'DELETE' AND COALESCE(v_wiersz.wykonane, FALSE),
+        'procent', COALESCE(v_procent, 0)
+    )::text);
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_trg_zdarzenia_uczestnicy()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_wiersz RECORD;
+    v_status TEXT;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.zaakceptowane THEN
+            RETURN NULL; -- autor dodawany automatycznie
+END IF;
+        INSERT INTO zdarzenia_uzytkownikow (uzytkownik_id, typ, dane)
+        SELECT NEW.uzytkownik_id, 'zaproszenie_wyzwania', jsonb_build_object(
+                   'uczestnictwo_id', NEW.id,
+                   'wyzwanie_id', w.id,
+                   'nazwa', w.nazwa,
+                   'autor_id', w.autor_id,
+                   'autor_nazwa', a.nazwa_uzytkownika)
+        FROM wyzwania w
+                 JOIN uzytkownicy a ON a.id = w.autor_id
+        WHERE w.id = NEW.wyzwanie_id;
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        v_wiersz := OLD;
+        v_status := 'odrzucone';
+ELSE
+        v_wiersz := NEW;
+        v_status := CASE WHEN NEW.zaakceptowane THEN 'zaakceptowane' ELSE 'oczekujace' END;
+END IF;
+
+INSERT INTO zdarzenia_uzytkownikow (uzytkownik_id, typ, dane)
+SELECT DISTINCT odbiorca, 'zaproszenie_wyzwania_status', jsonb_build_object(
+           'uczestnictwo_id', v_wiersz.id,
+           'wyzwanie_id', v_wiersz.wyzwanie_id,
+           'uzytkownik_id', v_wiersz.uzytkownik_id,
+           'status', v_status)
+FROM unnest(ARRAY[v_wiersz.uzytkownik_id,
+                  (SELECT autor_id FROM wyzwania WHERE id = v_wiersz.wyzwanie_id)]) AS odbiorca
+WHERE odbiorca IS NOT NULL;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Miękkie usunięcie już wysłało 'zmiany_wyzwan' - porcje czyszczenia nie podbijają wersji
+CREATE OR REPLACE FUNCTION fn_podbij_wersje_wyzwania(p_wyzwanie_id INT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_wyzwanie_id IS NULL OR fn_czyszczenie_w_toku() THEN
+        RETURN;
+END IF;
+
+    PERFORM pg_notify('zmiany_wyzwan', p_wyzwanie_id::text);
+
+    IF NOT EXISTS (SELECT 1 FROM wyzwania WHERE id = p_wyzwanie_id) THEN
+        RETURN; -- wyzwanie właśnie usuwane (albo ukryte) - wersja znika razem z nim
+END IF;
+
+INSERT INTO wyzwania_wersje (wyzwanie_id) VALUES (p_wyzwanie_id)
+ON CONFLICT (wyzwanie_id) DO UPDATE SET wersja = wyzwania_wersje.wersja + 1;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Ukrywa wyzwania (jeden UPDATE) i tworzy zlecenie czyszczenia.
+-- Zwraca id zlecenia i id faktycznie ukrytych wyzwań (NULL/pusta tablica, jeśli żadnego nie było).
+CREATE OR REPLACE FUNCTION fn_miekko_usun_wyzwania(p_ids INT[], p_zlecil INT)
+RETURNS TABLE (
+    zadanie_id BIGINT,
+    wyzwania_ids INT[]
+) AS $$
+DECLARE
+    v_ids INT[];
+    v_zadanie_id BIGINT;
+BEGIN
+    WITH ukryte AS (
+        UPDATE wyzwania_wszystkie
+        SET usunieto = NOW()
+        WHERE id = ANY(p_ids) AND usunieto IS NULL
+        RETURNING id
+    )
+SELECT COALESCE(array_agg(id ORDER BY id), '{}') INTO v_ids FROM ukryte;
+
+IF cardinality(v_ids) > 0 THEN
+        INSERT INTO usuwanie_wyzwan (zlecil, wyzwania_ids, pozostale_wyzwania)
+        VALUES (p_zlecil, v_ids, cardinality(v_ids))
+        RETURNING id INTO v_zadanie_id;
+END IF;
+
+RETURN QUERY SELECT v_zadanie_id, v_ids;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Usuwa do p_limit wierszy jednego ukrytego wyzwania - z pierwszej niepustej tabeli,
+-- od liści do korzenia. Zwraca liczbę usuniętych wierszy (0 = wyzwania już nie ma).
+CREATE OR REPLACE FUNCTION fn_usun_porcje_wyzwania(p_wyzwanie_id INT, p_limit INT)
+RETURNS INT AS $$
+DECLARE
+    v_liczba INT;
+BEGIN
+    PERFORM set_config('betya.czyszczenie', 'on', true);
+
+DELETE FROM agregat_progresu_dziennego
+WHERE ctid = ANY(ARRAY(
+    SELECT a.ctid
+    FROM agregat_progresu_dziennego a
+             JOIN zadania_dzienne zd ON zd.id = a.zadanie_id
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+    LIMIT p_limit));
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+DELETE FROM progres_podzadania
+WHERE ctid = ANY(ARRAY(
+    SELECT pp.ctid
+    FROM progres_podzadania pp
+             JOIN podzadania p ON p.id = pp.podzadanie_id
+             JOIN zadania_dzienne zd ON zd.id = p.zadanie_id
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+    LIMIT p_limit));
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+DELETE FROM progres_dzienne
+WHERE ctid = ANY(ARRAY(
+    SELECT pd.ctid
+    FROM progres_dzienne pd
+             JOIN zadania_dzienne zd ON zd.id = pd.zadanie_id
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+    LIMIT p_limit));
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+    -- struktura wyzwania jest mała - bez porcjowania
+DELETE FROM podzadania
+WHERE zadanie_id IN (SELECT id FROM zadania_dzienne WHERE wyzwanie_id = p_wyzwanie_id);
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+DELETE FROM zadania_dzienne WHERE wyzwanie_id = p_wyzwanie_id;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+DELETE FROM uczestnicy_wyzwan WHERE wyzwanie_id = p_wyzwanie_id;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+DELETE FROM wyzwania_wszystkie WHERE id = p_wyzwanie_id AND usunieto IS NOT NULL;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Jedna porcja zlecenia (jedna krótka transakcja po stronie aplikacji).
+-- Zwraca liczbę usuniętych wierszy; 0 = zlecenie zakończone.
+CREATE OR REPLACE FUNCTION fn_usun_porcje_wyzwan(p_zadanie_id BIGINT, p_limit INT DEFAULT 1000)
+RETURNS INT AS $$
+DECLARE
+    v_zadanie usuwanie_wyzwan%ROWTYPE;
+    v_wyzwanie_id INT;
+    v_liczba INT := 0;
+BEGIN
+SELECT * INTO v_zadanie FROM usuwanie_wyzwan WHERE id = p_zadanie_id FOR UPDATE;
+IF NOT FOUND OR v_zadanie.status = 'zakonczone' THEN
+        RETURN 0;
+END IF;
+
+    -- kolejne wyzwanie zlecenia, które jeszcze istnieje
+SELECT w.id INTO v_wyzwanie_id
+FROM wyzwania_wszystkie w
+WHERE w.id = ANY(v_zadanie.wyzwania_ids) AND w.usunieto IS NOT NULL
+ORDER BY w.id
+LIMIT 1;
+
+IF v_wyzwanie_id IS NOT NULL THEN
+        v_liczba := fn_usun_porcje_wyzwania(v_wyzwanie_id, p_limit);
+END IF;
+
+UPDATE usuwanie_wyzwan
+SET status = CASE WHEN v_wyzwanie_id IS NULL THEN 'zakonczone' ELSE 'w_toku' END,
+    usuniete_wiersze = usuniete_wiersze + v_liczba,
+    pozostale_wyzwania = (SELECT COUNT(*) FROM wyzwania_wszystkie w
+                          WHERE w.id = ANY(v_zadanie.wyzwania_ids) AND w.usunieto IS NOT NULL),
+    rozpoczeto = COALESCE(rozpoczeto, NOW()),
+    zakonczono = CASE WHEN v_wyzwanie_id IS NULL THEN NOW() END,
+    blad = NULL
+WHERE id = p_zadanie_id;
+
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Synchroniczne usunięcie całego wyzwania w jednej transakcji (skrypty / konsola).
+-- Aplikacja używa fn_miekko_usun_wyzwania + czyszczenia w tle.
+CREATE OR REPLACE FUNCTION usun_wyzwanie_admin(p_wyzwanie_id INT)
+RETURNS VOID AS $$
+BEGIN
+UPDATE wyzwania_wszystkie SET usunieto = COALESCE(usunieto, NOW()) WHERE id = p_wyzwanie_id;
+
+LOOP
+        EXIT WHEN fn_usun_porcje_wyzwania(p_wyzwanie_id, 10000) = 0;
+END LOOP;
+END;
+$$ LANGUAGE plpgsql;
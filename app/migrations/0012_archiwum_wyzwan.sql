@@ -0,0 +1,498 @@
+-- Archiwum zakończonych wyzwań czasowych (python -m app.cli archiwizuj).
+--
+-- Wyzwanie czasowe po data_koniec (+ okres karencji na spóźnione wpisy) jest przenoszone
+-- w całości - z uczestnikami, zadaniami, progresem i agregatem - do tabel *_archiwum.
+-- Tabele bieżące, ich indeksy (w tym unikalne indeksy upsertów progresu) i widoki rosną
+-- wtedy z liczbą aktywnych wyzwań, a nie z całą historią.
+--
+-- Archiwum jest tylko do odczytu: szczegóły (GET /wyzwania/{id}), historia i lista
+-- (?stan=archiwalne) czytają je przez funkcje *_archiwum, gdy w tabelach bieżących
+-- wyzwania już nie ma. Id zostają te same (sekwencje tabel bieżących).
+
+CREATE TABLE IF NOT EXISTS wyzwania_archiwum (
+    LIKE wyzwania_wszystkie INCLUDING CONSTRAINTS INCLUDING INDEXES,
+    zarchiwizowano TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+CREATE TABLE IF NOT EXISTS uczestnicy_wyzwan_archiwum (LIKE uczestnicy_wyzwan INCLUDING CONSTRAINTS INCLUDING INDEXES);
+CREATE TABLE IF NOT EXISTS zadania_dzienne_archiwum (LIKE zadania_dzienne INCLUDING CONSTRAINTS INCLUDING INDEXES);
+CREATE TABLE IF NOT EXISTS podzadania_archiwum (LIKE podzadania INCLUDING CONSTRAINTS INCLUDING INDEXES);
+CREATE TABLE IF NOT EXISTS progres_podzadania_archiwum (LIKE progres_podzadania INCLUDING CONSTRAINTS INCLUDING INDEXES);
+CREATE TABLE IF NOT EXISTS progres_dzienne_archiwum (LIKE progres_dzienne INCLUDING CONSTRAINTS INCLUDING INDEXES);
+CREATE TABLE IF NOT EXISTS agregat_progresu_dziennego_archiwum (LIKE agregat_progresu_dziennego INCLUDING CONSTRAINTS INCLUDING INDEXES);
+
+-- pozostałe indeksy są kopiowane z tabel bieżących (INCLUDING INDEXES)
+CREATE INDEX IF NOT EXISTS idx_zadania_dzienne_archiwum_wyzwanie ON zadania_dzienne_archiwum (wyzwanie_id);
+
+-- kandydaci do archiwizacji
+CREATE INDEX IF NOT EXISTS idx_wyzwania_do_archiwum ON wyzwania_wszystkie (data_koniec)
+    WHERE czasowe AND usunieto IS NULL;
+
+
+-- Przenosi jedno wyzwanie do archiwum (jedna transakcja). Zwraca liczbę przeniesionych wierszy
+-- albo 0, jeśli wyzwania nie ma (lub zostało usunięte).
+-- Wyzwalacze agregatów, powiadomień i zdarzeń są pomijane (fn_czyszczenie_w_toku) - agregat
+-- przenosimy gotowy, a dla klienta wyzwanie się nie zmienia.
+CREATE OR REPLACE FUNCTION fn_archiwizuj_wyzwanie(p_wyzwanie_id INT)
+RETURNS INT AS $$
+DECLARE
+    v_liczba INT;
+    v_razem INT := 0;
+BEGIN
+    PERFORM 1 FROM wyzwania_wszystkie WHERE id = p_wyzwanie_id AND usunieto IS NULL FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN 0;
+END IF;
+
+    PERFORM set_config('betya.czyszczenie', 'on', true);
+
+WITH przeniesione AS (
+    DELETE FROM agregat_progresu_dziennego a
+    USING zadania_dzienne zd
+    WHERE zd.id = a.zadanie_id AND zd.wyzwanie_id = p_wyzwanie_id
+    RETURNING a.*
+)
+INSERT INTO agregat_progresu_dziennego_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+WITH przeniesione AS (
+    DELETE FROM progres_podzadania pp
+    USING podzadania p, zadania_dzienne zd
+    WHERE p.id = pp.podzadanie_id AND zd.id = p.zadanie_id AND zd.wyzwanie_id = p_wyzwanie_id
+    RETURNING pp.*
+)
+INSERT INTO progres_podzadania_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+WITH przeniesione AS (
+    DELETE FROM progres_dzienne pd
+    USING zadania_dzienne zd
+    WHERE zd.id = pd.zadanie_id AND zd.wyzwanie_id = p_wyzwanie_id
+    RETURNING pd.*
+)
+INSERT INTO progres_dzienne_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+WITH przeniesione AS (
+    DELETE FROM podzadania p
+    USING zadania_dzienne zd
+    WHERE zd.id = p.zadanie_id AND zd.wyzwanie_id = p_wyzwanie_id
+    RETURNING p.*
+)
+INSERT INTO podzadania_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+WITH przeniesione AS (
+    DELETE FROM zadania_dzienne WHERE wyzwanie_id = p_wyzwanie_id RETURNING *
+)
+INSERT INTO zadania_dzienne_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+WITH przeniesione AS (
+    DELETE FROM uczestnicy_wyzwan WHERE wyzwanie_id = p_wyzwanie_id RETURNING *
+)
+INSERT INTO uczestnicy_wyzwan_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+    -- zarchiwizowano dostaje wartość domyślną
+WITH przeniesione AS (
+    DELETE FROM wyzwania_wszystkie WHERE id = p_wyzwanie_id RETURNING *
+)
+INSERT INTO wyzwania_archiwum SELECT * FROM przeniesione;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+v_razem := v_razem + v_liczba;
+
+PERFORM set_config('betya.czyszczenie', 'off', true);
+RETURN v_razem;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Jedna porcja archiwizacji: do p_limit wyzwań zakończonych ponad p_po_czasie temu.
+-- Zwraca liczbę zarchiwizowanych wyzwań (0 = nie ma już kandydatów).
+-- SKIP LOCKED - równoległe uruchomienia nie czekają na siebie.
+CREATE OR REPLACE FUNCTION fn_archiwizuj_wyzwania(
+    p_limit INT DEFAULT 50,
+    p_po_czasie INTERVAL DEFAULT INTERVAL '30 days'
+)
+RETURNS INT AS $$
+DECLARE
+    v_id INT;
+    v_liczba INT := 0;
+BEGIN
+    FOR v_id IN
+SELECT w.id
+FROM wyzwania_wszystkie w
+WHERE w.czasowe AND w.usunieto IS NULL
+  AND w.data_koniec < NOW() - p_po_czasie
+ORDER BY w.data_koniec
+LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+    LOOP
+        IF fn_archiwizuj_wyzwanie(v_id) > 0 THEN
+            v_liczba := v_liczba + 1;
+END IF;
+END LOOP;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Szczegóły wyzwania z polem 'zarchiwizowane' (WyzwanieFullOut) - bez zmian poza nim
+CREATE OR REPLACE FUNCTION fn_get_wyzwanie_json(p_wyzwanie_id INT)
+RETURNS JSON AS $$
+BEGIN
+RETURN (
+    SELECT json_build_object(
+                   'id', w.id,
+                   'nazwa', w.nazwa,
+                   'opis', w.opis,
+                   'czasowe', w.czasowe,
+
+                   'data_start',
+                   CASE
+                       WHEN w.data_start IS NULL THEN NULL
+                       ELSE to_char(w.data_start, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'data_koniec',
+                   CASE
+                       WHEN w.data_koniec IS NULL THEN NULL
+                       ELSE to_char(w.data_koniec, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'autor_id', w.autor_id,
+                   'zarchiwizowane', FALSE,
+
+                   'uczestnicy', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', u.id,
+                                                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                                       'zaakceptowane', uw.zaakceptowane
+                                               )
+                                                   ORDER BY u.id
+                                       ), '[]'::json)
+                       FROM uczestnicy_wyzwan uw
+                                JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+                       WHERE uw.wyzwanie_id = w.id
+                   ),
+
+                   'zadania_dzienne', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', z.id,
+                                                       'nazwa', z.nazwa,
+                                                       'opis', z.opis,
+
+                                                       'podzadania', (
+                                                           SELECT COALESCE(json_agg(
+                                                                                   json_build_object(
+                                                                                           'id', p.id,
+                                                                                           'nazwa', p.nazwa,
+                                                                                           'wymagane', p.wymagane,
+                                                                                           'waga', p.waga
+                                                                                   )
+                                                                                       ORDER BY p.id
+                                                                           ), '[]'::json)
+                                                           FROM podzadania p
+                                                           WHERE p.zadanie_id = z.id
+                                                       )
+                                               )
+                                                   ORDER BY z.id
+                                       ), '[]'::json)
+                       FROM zadania_dzienne z
+                       WHERE z.wyzwanie_id = w.id
+                   )
+           )
+    FROM wyzwania w
+    WHERE w.id = p_wyzwanie_id
+);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- ---------------------------------------------------------
+-- Odczyt archiwum - kopie fn_get_wyzwanie_json, fn_pobierz_historie_wykresu
+-- i fn_pobierz_historie_wyzwania na tabelach *_archiwum (ten sam kształt JSON).
+-- ---------------------------------------------------------
+CREATE OR REPLACE FUNCTION fn_get_wyzwanie_json_archiwum(p_wyzwanie_id INT)
+RETURNS JSON AS $$
+BEGIN
+RETURN (
+    SELECT json_build_object(
+                   'id', w.id,
+                   'nazwa', w.nazwa,
+                   'opis', w.opis,
+                   'czasowe', w.czasowe,
+
+                   'data_start',
+                   CASE
+                       WHEN w.data_start IS NULL THEN NULL
+                       ELSE to_char(w.data_start, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'data_koniec',
+                   CASE
+                       WHEN w.data_koniec IS NULL THEN NULL
+                       ELSE to_char(w.data_koniec, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'autor_id', w.autor_id,
+                   'zarchiwizowane', TRUE,
+
+                   'uczestnicy', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', u.id,
+                                                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                                       'zaakceptowane', uw.zaakceptowane
+                                               )
+                                                   ORDER BY u.id
+                                       ), '[]'::json)
+                       FROM uczestnicy_wyzwan_archiwum uw
+                                JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+                       WHERE uw.wyzwanie_id = w.id
+                   ),
+
+                   'zadania_dzienne', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', z.id,
+                                                       'nazwa', z.nazwa,
+                                                       'opis', z.opis,
+
+                                                       'podzadania', (
+                                                           SELECT COALESCE(json_agg(
+                                                                                   json_build_object(
+                                                                                           'id', p.id,
+                                                                                           'nazwa', p.nazwa,
+                                                                                           'wymagane', p.wymagane,
+                                                                                           'waga', p.waga
+                                                                                   )
+                                                                                       ORDER BY p.id
+                                                                           ), '[]'::json)
+                                                           FROM podzadania_archiwum p
+                                                           WHERE p.zadanie_id = z.id
+                                                       )
+                                               )
+                                                   ORDER BY z.id
+                                       ), '[]'::json)
+                       FROM zadania_dzienne_archiwum z
+                       WHERE z.wyzwanie_id = w.id
+                   )
+           )
+    FROM wyzwania_archiwum w
+    WHERE w.id = p_wyzwanie_id
+);
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wykresu_archiwum(p_zadanie_id INT)
+RETURNS JSON AS $$
+DECLARE
+v_wyzwanie_id INT;
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    -- Zmienne obliczone
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+
+    v_wynik JSON;
+BEGIN
+    -- 1. Pobieramy dane wyzwania
+SELECT w.id, w.data_start, w.data_koniec, w.czasowe
+INTO v_wyzwanie_id, v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania_archiwum w
+         JOIN zadania_dzienne_archiwum zd ON w.id = zd.wyzwanie_id
+WHERE zd.id = p_zadanie_id;
+
+-- 2. Ustalanie daty KOŃCOWEJ
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+        v_koniec_calc := v_data_koniec::date;
+ELSE
+        v_koniec_calc := CURRENT_DATE;
+END IF;
+
+    -- 3. Ustalanie daty STARTOWEJ (pierwszy dzień z progresem - indeks agregatu)
+    IF v_czasowe AND v_data_start IS NOT NULL THEN
+        v_start_calc := v_data_start::date;
+ELSE
+        v_start_calc := COALESCE(
+            (SELECT MIN(dzien) FROM agregat_progresu_dziennego_archiwum WHERE zadanie_id = p_zadanie_id),
+            CURRENT_DATE);
+END IF;
+
+    -- 4. Generowanie JSON
+WITH uczestnicy AS (
+    SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+    FROM uczestnicy_wyzwan_archiwum uw
+             JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+    WHERE uw.wyzwanie_id = v_wyzwanie_id
+      AND uw.zaakceptowane = TRUE
+),
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.dzien, a.procent
+         FROM agregat_progresu_dziennego_archiwum a
+         WHERE a.zadanie_id = p_zadanie_id
+           AND a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     punkty AS (
+         SELECT u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w ON w.uczestnik_id = u.uczestnik_id AND w.dzien = d.dzien
+         GROUP BY u.uczestnik_id
+     )
+SELECT json_agg(
+               json_build_object(
+                       'uczestnik_id', u.uczestnik_id,
+                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                       'punkty', p.punkty
+               ) ORDER BY u.uczestnik_id
+       ) INTO v_wynik
+FROM uczestnicy u
+         LEFT JOIN punkty p ON p.uczestnik_id = u.uczestnik_id;
+
+RETURN COALESCE(v_wynik, '[]'::json);
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wyzwania_archiwum(
+    p_wyzwanie_id INT,
+    p_od DATE DEFAULT NULL,
+    p_do DATE DEFAULT NULL,
+    p_od_zmiany TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+    v_wynik JSON;
+BEGIN
+SELECT w.data_start, w.data_koniec, w.czasowe
+INTO v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania_archiwum w
+WHERE w.id = p_wyzwanie_id;
+
+IF NOT FOUND THEN
+    RETURN NULL;
+END IF;
+
+-- Domyślny zakres - te same reguły co w fn_pobierz_historie_wykresu
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+    v_koniec_calc := v_data_koniec::date;
+ELSE
+    v_koniec_calc := CURRENT_DATE;
+END IF;
+
+IF v_czasowe AND v_data_start IS NOT NULL THEN
+    v_start_calc := v_data_start::date;
+ELSE
+    v_start_calc := COALESCE(
+        (SELECT MIN(a.dzien)
+         FROM agregat_progresu_dziennego_archiwum a
+                  JOIN zadania_dzienne_archiwum zd ON zd.id = a.zadanie_id
+         WHERE zd.wyzwanie_id = p_wyzwanie_id),
+        CURRENT_DATE);
+END IF;
+
+-- Okno żądane przez klienta
+v_start_calc := GREATEST(v_start_calc, COALESCE(p_od, v_start_calc));
+v_koniec_calc := LEAST(v_koniec_calc, COALESCE(p_do, v_koniec_calc));
+
+WITH zadania AS (
+    SELECT zd.id AS zadanie_id
+    FROM zadania_dzienne_archiwum zd
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+),
+     uczestnicy AS (
+         SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+         FROM uczestnicy_wyzwan_archiwum uw
+                  JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+         WHERE uw.wyzwanie_id = p_wyzwanie_id
+           AND uw.zaakceptowane = TRUE
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.zadanie_id, a.dzien, a.procent, a.zmieniono
+         FROM agregat_progresu_dziennego_archiwum a
+                  JOIN zadania z ON z.zadanie_id = a.zadanie_id
+         WHERE a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     -- Dni zmienione od p_od_zmiany. Margines 10 s obejmuje transakcje zapisu, które
+     -- zaczęły się przed poprzednim odczytem, a zatwierdziły po nim (ponowne wysłanie dnia nic nie psuje).
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+         WHERE p_od_zmiany IS NULL
+            OR d::date IN (SELECT dzien FROM wykonane
+                           WHERE zmieniono > p_od_zmiany - INTERVAL '10 seconds')
+     ),
+     punkty AS (
+         SELECT z.zadanie_id, u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM zadania z
+                  CROSS JOIN uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w
+                            ON w.zadanie_id = z.zadanie_id
+                                AND w.uczestnik_id = u.uczestnik_id
+                                AND w.dzien = d.dzien
+         GROUP BY z.zadanie_id, u.uczestnik_id
+     ),
+     historia AS (
+         SELECT z.zadanie_id,
+                COALESCE(json_agg(
+                                 json_build_object(
+                                         'uczestnik_id', u.uczestnik_id,
+                                         'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                         'punkty', COALESCE(p.punkty, '[]'::json)
+                                 ) ORDER BY u.uczestnik_id
+                         ) FILTER (WHERE u.uczestnik_id IS NOT NULL), '[]'::json) AS historia
+         FROM zadania z
+                  LEFT JOIN uczestnicy u ON TRUE
+                  LEFT JOIN punkty p ON p.zadanie_id = z.zadanie_id AND p.uczestnik_id = u.uczestnik_id
+         GROUP BY z.zadanie_id
+     )
+SELECT json_build_object(
+               'od', v_start_calc,
+               'do', v_koniec_calc,
+               'znacznik', NOW(),
+               'zadania', COALESCE(json_agg(
+                                          json_build_object('zadanie_id', h.zadanie_id, 'historia', h.historia)
+                                              ORDER BY h.zadanie_id
+                                  ), '[]'::json)
+       ) INTO v_wynik
+FROM historia h;
+
+RETURN v_wynik;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,255 @@
+-- Ranking uczestników wyzwania (GET /wyzwania/{id}/ranking).
+--
+-- klasyfikacja_wyzwan trzyma na uczestnika gotowe wyniki:
+--   suma_procent  - suma procentów wykonania wszystkich zadań we wszystkich dniach
+--                   (procent z agregat_progresu_dziennego, czyli już ważony wagami podzadań),
+--   dni_ukonczone - dni, w których uczestnik wykonał w 100% każde zadanie wyzwania.
+-- Wyzwalacz na agregacie aktualizuje je przyrostowo (delta jednego wiersza), więc odczyt rankingu
+-- to skan klasyfikacji jednego wyzwania po indeksie - bez przeliczania progresu.
+-- Kolejność: suma_procent malejąco, dni_ukonczone malejąco, uczestnik_id rosnąco (remisy
+-- rozstrzygane zawsze tak samo). Naprawa / pierwsze wypełnienie: fn_przebuduj_klasyfikacje
+-- (python -m app.cli przebuduj-ranking).
+
+CREATE TABLE IF NOT EXISTS klasyfikacja_wyzwan (
+    uczestnik_id INT PRIMARY KEY REFERENCES uczestnicy_wyzwan(id) ON DELETE CASCADE,
+    wyzwanie_id INT NOT NULL,
+    suma_procent BIGINT NOT NULL DEFAULT 0,
+    dni_ukonczone INT NOT NULL DEFAULT 0,
+    zmieniono TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+
+CREATE INDEX IF NOT EXISTS idx_klasyfikacja_wyzwan_ranking
+    ON klasyfikacja_wyzwan (wyzwanie_id, suma_procent DESC, dni_ukonczone DESC, uczestnik_id);
+
+-- liczba zadań wyzwania (czy dzień jest ukończony) i dni w pełni wykonanych zadań uczestnika
+CREATE INDEX IF NOT EXISTS idx_zadania_dzienne_wyzwanie ON zadania_dzienne (wyzwanie_id);
+CREATE INDEX IF NOT EXISTS idx_agregat_progresu_pelne
+    ON agregat_progresu_dziennego (uczestnik_id, dzien) WHERE procent = 100;
+
+
+-- Przelicza klasyfikację od zera: jednego wyzwania albo (p_wyzwanie_id = NULL) wszystkich.
+-- Zwraca liczbę zapisanych wierszy.
+CREATE OR REPLACE FUNCTION fn_przebuduj_klasyfikacje(p_wyzwanie_id INT DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    v_liczba INT;
+BEGIN
+WITH liczba_zadan AS (
+    SELECT zd.wyzwanie_id, COUNT(*) AS n
+    FROM zadania_dzienne zd
+    WHERE p_wyzwanie_id IS NULL OR zd.wyzwanie_id = p_wyzwanie_id
+    GROUP BY zd.wyzwanie_id
+),
+     dni AS (
+         SELECT a.uczestnik_id, a.dzien,
+                SUM(a.procent) AS suma,
+                COUNT(*) FILTER (WHERE a.procent = 100) AS pelne
+         FROM agregat_progresu_dziennego a
+                  JOIN uczestnicy_wyzwan uw ON uw.id = a.uczestnik_id
+         WHERE p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id
+         GROUP BY a.uczestnik_id, a.dzien
+     ),
+     wyniki AS (
+         SELECT uw.id AS uczestnik_id, uw.wyzwanie_id,
+                COALESCE(SUM(d.suma), 0) AS suma_procent,
+                COUNT(d.dzien) FILTER (WHERE d.pelne = lz.n) AS dni_ukonczone
+         FROM uczestnicy_wyzwan uw
+                  LEFT JOIN liczba_zadan lz ON lz.wyzwanie_id = uw.wyzwanie_id
+                  LEFT JOIN dni d ON d.uczestnik_id = uw.id
+         WHERE p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id
+         GROUP BY uw.id, uw.wyzwanie_id
+     )
+INSERT INTO klasyfikacja_wyzwan (uczestnik_id, wyzwanie_id, suma_procent, dni_ukonczone)
+SELECT uczestnik_id, wyzwanie_id, suma_procent, dni_ukonczone FROM wyniki
+ON CONFLICT (uczestnik_id) DO UPDATE
+    SET wyzwanie_id = EXCLUDED.wyzwanie_id,
+        suma_procent = EXCLUDED.suma_procent,
+        dni_ukonczone = EXCLUDED.dni_ukonczone,
+        zmieniono = NOW();
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Zmiana jednego wiersza agregatu -> delta sumy i ewentualnie +/-1 dzień ukończony.
+-- Najpierw UPDATE sumy (blokada wiersza klasyfikacji), dopiero potem liczenie pełnych zadań dnia:
+-- równoległe zapisy tego samego uczestnika czekają na blokadę, a kolejne zapytanie widzi już
+-- zatwierdzony agregat poprzednika - ostatnie zadanie dnia zostanie policzone dokładnie raz.
+CREATE OR REPLACE FUNCTION fn_trg_klasyfikacja_agregat()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_uczestnik_id INT;
+    v_dzien DATE;
+    v_stary INT := 0;
+    v_nowy INT := 0;
+    v_wyzwanie_id INT;
+    v_liczba_zadan INT;
+    v_pelne_teraz INT;
+    v_pelne_przed INT;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        v_uczestnik_id := OLD.uczestnik_id;
+        v_dzien := OLD.dzien;
+ELSE
+        v_uczestnik_id := NEW.uczestnik_id;
+        v_dzien := NEW.dzien;
+END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_stary := OLD.procent;
+END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_nowy := NEW.procent;
+END IF;
+
+UPDATE klasyfikacja_wyzwan
+SET suma_procent = suma_procent + (v_nowy - v_stary),
+    zmieniono = NOW()
+WHERE uczestnik_id = v_uczestnik_id
+RETURNING wyzwanie_id INTO v_wyzwanie_id;
+
+IF NOT FOUND OR (v_stary = 100) = (v_nowy = 100) THEN
+        RETURN NULL; -- uczestnik usuwany albo "pełność" zadania się nie zmieniła
+END IF;
+
+SELECT COUNT(*) INTO v_liczba_zadan FROM zadania_dzienne WHERE wyzwanie_id = v_wyzwanie_id;
+
+SELECT COUNT(*) INTO v_pelne_teraz
+FROM agregat_progresu_dziennego
+WHERE uczestnik_id = v_uczestnik_id AND dzien = v_dzien AND procent = 100;
+
+v_pelne_przed := v_pelne_teraz - (v_nowy = 100)::int + (v_stary = 100)::int;
+
+IF (v_pelne_teraz = v_liczba_zadan) <> (v_pelne_przed = v_liczba_zadan) THEN
+UPDATE klasyfikacja_wyzwan
+SET dni_ukonczone = dni_ukonczone + CASE WHEN v_pelne_teraz = v_liczba_zadan THEN 1 ELSE -1 END
+WHERE uczestnik_id = v_uczestnik_id;
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_klasyfikacja_agregat ON agregat_progresu_dziennego;
+CREATE TRIGGER trg_klasyfikacja_agregat
+    AFTER INSERT OR UPDATE OR DELETE ON agregat_progresu_dziennego
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_klasyfikacja_agregat();
+
+
+-- Nowy uczestnik dostaje wiersz z zerami (w rankingu od razu, także bez progresu)
+CREATE OR REPLACE FUNCTION fn_trg_klasyfikacja_uczestnik()
+RETURNS TRIGGER AS $$
+BEGIN
+INSERT INTO klasyfikacja_wyzwan (uczestnik_id, wyzwanie_id)
+VALUES (NEW.id, NEW.wyzwanie_id)
+ON CONFLICT (uczestnik_id) DO NOTHING;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_klasyfikacja_uczestnik ON uczestnicy_wyzwan;
+CREATE TRIGGER trg_klasyfikacja_uczestnik
+    AFTER INSERT ON uczestnicy_wyzwan
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_klasyfikacja_uczestnik();
+
+
+-- Inna liczba zadań zmienia to, które dni są ukończone - przeliczamy całe wyzwanie
+-- (rzadkie: zadania powstają razem z wyzwaniem).
+CREATE OR REPLACE FUNCTION fn_trg_klasyfikacja_zadania()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    PERFORM fn_przebuduj_klasyfikacje(CASE WHEN TG_OP = 'DELETE' THEN OLD.wyzwanie_id ELSE NEW.wyzwanie_id END);
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_klasyfikacja_zadania ON zadania_dzienne;
+CREATE TRIGGER trg_klasyfikacja_zadania
+    AFTER INSERT OR DELETE ON zadania_dzienne
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_klasyfikacja_zadania();
+
+
+SELECT fn_przebuduj_klasyfikacje();
+
+
+-- Ranking wyzwania: p_limit pierwszych miejsc + wiersz p_uzytkownik_id (jeśli jest dalej).
+-- Tylko zaakceptowani uczestnicy. liczba_uczestnikow - do "miejsce X z Y".
+-- Dla wyzwania z archiwum (0012) wyniki liczone z agregatu archiwum - nie zmieniają się już.
+CREATE OR REPLACE FUNCTION fn_ranking_wyzwania(
+    p_wyzwanie_id INT,
+    p_limit INT DEFAULT 50,
+    p_uzytkownik_id INT DEFAULT NULL
+)
+RETURNS TABLE (
+    pozycja BIGINT,
+    uczestnik_id INT,
+    uzytkownik_id INT,
+    nazwa_uzytkownika VARCHAR,
+    suma_procent BIGINT,
+    dni_ukonczone INT,
+    liczba_uczestnikow BIGINT
+) AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM wyzwania WHERE id = p_wyzwanie_id) THEN
+        RETURN QUERY
+        WITH ranking AS (
+            SELECT row_number() OVER w AS pozycja,
+                   k.uczestnik_id, uw.uzytkownik_id, u.nazwa_uzytkownika,
+                   k.suma_procent, k.dni_ukonczone,
+                   COUNT(*) OVER () AS liczba_uczestnikow
+            FROM klasyfikacja_wyzwan k
+                     JOIN uczestnicy_wyzwan uw ON uw.id = k.uczestnik_id
+                     JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+            WHERE k.wyzwanie_id = p_wyzwanie_id
+              AND uw.zaakceptowane
+            WINDOW w AS (ORDER BY k.suma_procent DESC, k.dni_ukonczone DESC, k.uczestnik_id)
+        )
+        SELECT r.pozycja, r.uczestnik_id, r.uzytkownik_id, r.nazwa_uzytkownika,
+               r.suma_procent, r.dni_ukonczone, r.liczba_uczestnikow
+        FROM ranking r
+        WHERE r.pozycja <= p_limit OR r.uzytkownik_id = p_uzytkownik_id
+        ORDER BY r.pozycja;
+        RETURN;
+END IF;
+
+RETURN QUERY
+WITH liczba_zadan AS (
+    SELECT COUNT(*) AS n FROM zadania_dzienne_archiwum WHERE wyzwanie_id = p_wyzwanie_id
+),
+     dni AS (
+         SELECT a.uczestnik_id, a.dzien, SUM(a.procent) AS suma,
+                COUNT(*) FILTER (WHERE a.procent = 100) AS pelne
+         FROM agregat_progresu_dziennego_archiwum a
+                  JOIN uczestnicy_wyzwan_archiwum uw ON uw.id = a.uczestnik_id
+         WHERE uw.wyzwanie_id = p_wyzwanie_id
+         GROUP BY a.uczestnik_id, a.dzien
+     ),
+     wyniki AS (
+         SELECT uw.id AS uczestnik_id, uw.uzytkownik_id, u.nazwa_uzytkownika,
+                COALESCE(SUM(d.suma), 0)::BIGINT AS suma_procent,
+                (COUNT(d.dzien) FILTER (WHERE d.pelne = (SELECT n FROM liczba_zadan)))::INT AS dni_ukonczone
+         FROM uczestnicy_wyzwan_archiwum uw
+                  JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+                  LEFT JOIN dni d ON d.uczestnik_id = uw.id
+         WHERE uw.wyzwanie_id = p_wyzwanie_id
+           AND uw.zaakceptowane
+         GROUP BY uw.id, uw.uzytkownik_id, u.nazwa_uzytkownika
+     ),
+     ranking AS (
+         SELECT row_number() OVER (ORDER BY w.suma_procent DESC, w.dni_ukonczone DESC, w.uczestnik_id) AS pozycja,
+                w.*, COUNT(*) OVER () AS liczba_uczestnikow
+         FROM wyniki w
+     )
+SELECT r.pozycja, r.uczestnik_id, r.uzytkownik_id, r.nazwa_uzytkownika,
+       r.suma_procent, r.dni_ukonczone, r.liczba_uczestnikow
+FROM ranking r
+WHERE r.pozycja <= p_limit OR r.uzytkownik_id = p_uzytkownik_id
+ORDER BY r.pozycja;
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,376 @@
+-- Serie (streaks): kolejne dni z zadaniem wykonanym w 100%.
+--
+-- serie_zadan trzyma na (uczestnik, zadanie) bieżącą i najdłuższą serię oraz ostatni pełny dzień.
+-- zadanie_id = NULL to seria całego wyzwania - dni, w których wszystkie zadania są na 100%
+-- (dni_ukonczone, utrzymywane razem z rankingiem w fn_trg_klasyfikacja_agregat).
+--
+-- Aktualizacja przy zapisie progresu (wyzwalacze na agregacie, tylko gdy dzień przestaje / zaczyna
+-- być pełny):
+--   * nowy pełny dzień po ostatnim - O(1),
+--   * zmiana dnia z przeszłości - sprawdzenie sąsiednich dni (po indeksie, tyle zapytań, ile dni
+--     ma przerwana / sklejona seria); pełne przeliczenie najdłuższej serii tylko wtedy,
+--     gdy cofnięty dzień należał do serii najdłuższej.
+-- biezaca dotyczy serii kończącej się w ostatni_dzien - przy odczycie jest zerowana,
+-- jeśli ostatni_dzien jest starszy niż wczoraj. Przebudowa: fn_przebuduj_serie
+-- (python -m app.cli przebuduj-serie).
+
+CREATE TABLE IF NOT EXISTS dni_ukonczone (
+    uczestnik_id INT NOT NULL REFERENCES uczestnicy_wyzwan(id) ON DELETE CASCADE,
+    dzien DATE NOT NULL,
+    PRIMARY KEY (uczestnik_id, dzien)
+    );
+
+CREATE TABLE IF NOT EXISTS serie_zadan (
+    uczestnik_id INT NOT NULL REFERENCES uczestnicy_wyzwan(id) ON DELETE CASCADE,
+    zadanie_id INT REFERENCES zadania_dzienne(id) ON DELETE CASCADE,
+    biezaca INT NOT NULL DEFAULT 0,
+    najdluzsza INT NOT NULL DEFAULT 0,
+    ostatni_dzien DATE,
+    zmieniono TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    CONSTRAINT uq_serie_zadan UNIQUE NULLS NOT DISTINCT (uczestnik_id, zadanie_id)
+    );
+
+
+-- Czy dzień jest pełny: zadanie na 100% albo (p_zadanie_id = NULL) cały dzień wyzwania
+CREATE OR REPLACE FUNCTION fn_dzien_pelny(p_uczestnik_id INT, p_zadanie_id INT, p_dzien DATE)
+RETURNS BOOLEAN AS $$
+SELECT CASE
+           WHEN p_zadanie_id IS NULL THEN EXISTS (
+               SELECT 1 FROM dni_ukonczone
+               WHERE uczestnik_id = p_uczestnik_id AND dzien = p_dzien)
+           ELSE EXISTS (
+               SELECT 1 FROM agregat_progresu_dziennego
+               WHERE uczestnik_id = p_uczestnik_id AND zadanie_id = p_zadanie_id
+                 AND dzien = p_dzien AND procent = 100)
+           END;
+$$ LANGUAGE sql STABLE;
+
+-- Ostatni pełny dzień przed p_przed (NULL, jeśli nie ma)
+CREATE OR REPLACE FUNCTION fn_ostatni_pelny_dzien(p_uczestnik_id INT, p_zadanie_id INT, p_przed DATE)
+RETURNS DATE AS $$
+SELECT CASE
+           WHEN p_zadanie_id IS NULL THEN (
+               SELECT MAX(dzien) FROM dni_ukonczone
+               WHERE uczestnik_id = p_uczestnik_id AND dzien < p_przed)
+           ELSE (
+               SELECT MAX(dzien) FROM agregat_progresu_dziennego
+               WHERE uczestnik_id = p_uczestnik_id AND zadanie_id = p_zadanie_id
+                 AND dzien < p_przed AND procent = 100)
+           END;
+$$ LANGUAGE sql STABLE;
+
+-- Najdłuższa seria od zera (gaps-and-islands: dzień - numer wiersza jest stały w obrębie serii)
+CREATE OR REPLACE FUNCTION fn_najdluzsza_seria(p_uczestnik_id INT, p_zadanie_id INT)
+RETURNS INT AS $$
+SELECT COALESCE(MAX(dlugosc), 0)::INT
+FROM (
+    SELECT COUNT(*) AS dlugosc
+    FROM (
+        SELECT d.dzien - (row_number() OVER (ORDER BY d.dzien))::int AS wyspa
+        FROM (
+            SELECT dzien FROM dni_ukonczone
+            WHERE p_zadanie_id IS NULL AND uczestnik_id = p_uczestnik_id
+            UNION ALL
+            SELECT dzien FROM agregat_progresu_dziennego
+            WHERE p_zadanie_id IS NOT NULL AND uczestnik_id = p_uczestnik_id
+              AND zadanie_id = p_zadanie_id AND procent = 100
+        ) d
+    ) x
+    GROUP BY wyspa
+) s;
+$$ LANGUAGE sql STABLE;
+
+
+-- Dzień p_dzien właśnie stał się pełny (p_pelny) albo przestał nim być.
+-- Wołana z wyzwalaczy po zmianie agregatu / dni_ukonczone (stan dnia jest już zapisany).
+CREATE OR REPLACE FUNCTION fn_aktualizuj_serie(
+    p_uczestnik_id INT,
+    p_zadanie_id INT,
+    p_dzien DATE,
+    p_pelny BOOLEAN
+)
+RETURNS VOID AS $$
+DECLARE
+    v_biezaca INT;
+    v_najdluzsza INT;
+    v_ostatni DATE;
+    v_przed INT := 0;
+    v_po INT := 0;
+BEGIN
+    -- uczestnik / zadanie właśnie usuwane (kaskada) - wiersz serii znika razem z nimi
+    IF NOT EXISTS (SELECT 1 FROM uczestnicy_wyzwan WHERE id = p_uczestnik_id)
+        OR (p_zadanie_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM zadania_dzienne WHERE id = p_zadanie_id)) THEN
+        RETURN;
+END IF;
+
+INSERT INTO serie_zadan (uczestnik_id, zadanie_id)
+VALUES (p_uczestnik_id, p_zadanie_id)
+ON CONFLICT (uczestnik_id, zadanie_id) DO NOTHING;
+
+    -- blokada wiersza serii - równoległe zapisy tej samej serii po kolei
+SELECT biezaca, najdluzsza, ostatni_dzien
+INTO v_biezaca, v_najdluzsza, v_ostatni
+FROM serie_zadan
+WHERE uczestnik_id = p_uczestnik_id AND zadanie_id IS NOT DISTINCT FROM p_zadanie_id
+    FOR UPDATE;
+
+IF p_pelny AND (v_ostatni IS NULL OR p_dzien > v_ostatni) THEN
+        -- zwykły przypadek: kolejny dzień - O(1)
+        v_biezaca := CASE WHEN p_dzien = v_ostatni + 1 THEN v_biezaca + 1 ELSE 1 END;
+        v_ostatni := p_dzien;
+        v_najdluzsza := GREATEST(v_najdluzsza, v_biezaca);
+ELSE
+        -- dzień z przeszłości: długość pełnych odcinków tuż przed i tuż po nim
+        WHILE fn_dzien_pelny(p_uczestnik_id, p_zadanie_id, p_dzien - v_przed - 1) LOOP
+            v_przed := v_przed + 1;
+END LOOP;
+        WHILE p_dzien + v_po < v_ostatni
+            AND fn_dzien_pelny(p_uczestnik_id, p_zadanie_id, p_dzien + v_po + 1) LOOP
+            v_po := v_po + 1;
+END LOOP;
+
+        IF p_pelny THEN
+            -- dzień skleja dwa odcinki
+            v_najdluzsza := GREATEST(v_najdluzsza, v_przed + 1 + v_po);
+            IF p_dzien + v_po = v_ostatni THEN
+                v_biezaca := v_przed + 1 + v_po;
+END IF;
+ELSE
+            IF p_dzien = v_ostatni THEN
+                v_ostatni := fn_ostatni_pelny_dzien(p_uczestnik_id, p_zadanie_id, p_dzien);
+                v_biezaca := 0;
+                IF v_ostatni = p_dzien - 1 THEN
+                    v_biezaca := v_przed;
+                ELSIF v_ostatni IS NOT NULL THEN
+                    WHILE fn_dzien_pelny(p_uczestnik_id, p_zadanie_id, v_ostatni - v_biezaca) LOOP
+                        v_biezaca := v_biezaca + 1;
+END LOOP;
+END IF;
+            ELSIF p_dzien + v_po = v_ostatni THEN
+                -- bieżąca seria przecięta - zostaje jej część po p_dzien
+                v_biezaca := v_po;
+END IF;
+
+            -- najdłuższa mogła być właśnie przeciętą serią
+            IF v_przed + 1 + v_po >= v_najdluzsza THEN
+                v_najdluzsza := fn_najdluzsza_seria(p_uczestnik_id, p_zadanie_id);
+END IF;
+END IF;
+END IF;
+
+UPDATE serie_zadan
+SET biezaca = v_biezaca,
+    najdluzsza = v_najdluzsza,
+    ostatni_dzien = v_ostatni,
+    zmieniono = NOW()
+WHERE uczestnik_id = p_uczestnik_id AND zadanie_id IS NOT DISTINCT FROM p_zadanie_id;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Seria zadania: zmiana "pełności" wiersza agregatu
+CREATE OR REPLACE FUNCTION fn_trg_serie_agregat()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_stary BOOLEAN := FALSE;
+    v_nowy BOOLEAN := FALSE;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_stary := OLD.procent = 100;
+END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_nowy := NEW.procent = 100;
+END IF;
+    IF v_stary = v_nowy THEN
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        PERFORM fn_aktualizuj_serie(OLD.uczestnik_id, OLD.zadanie_id, OLD.dzien, FALSE);
+ELSE
+        PERFORM fn_aktualizuj_serie(NEW.uczestnik_id, NEW.zadanie_id, NEW.dzien, v_nowy);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_serie_agregat ON agregat_progresu_dziennego;
+CREATE TRIGGER trg_serie_agregat
+    AFTER INSERT OR UPDATE OR DELETE ON agregat_progresu_dziennego
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_serie_agregat();
+
+
+-- Ranking (0013) + dni_ukonczone i seria całego wyzwania
+CREATE OR REPLACE FUNCTION fn_trg_klasyfikacja_agregat()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_uczestnik_id INT;
+    v_dzien DATE;
+    v_stary INT := 0;
+    v_nowy INT := 0;
+    v_wyzwanie_id INT;
+    v_liczba_zadan INT;
+    v_pelne_teraz INT;
+    v_pelne_przed INT;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        v_uczestnik_id := OLD.uczestnik_id;
+        v_dzien := OLD.dzien;
+ELSE
+        v_uczestnik_id := NEW.uczestnik_id;
+        v_dzien := NEW.dzien;
+END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_stary := OLD.procent;
+END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_nowy := NEW.procent;
+END IF;
+
+UPDATE klasyfikacja_wyzwan
+SET suma_procent = suma_procent + (v_nowy - v_stary),
+    zmieniono = NOW()
+WHERE uczestnik_id = v_uczestnik_id
+RETURNING wyzwanie_id INTO v_wyzwanie_id;
+
+IF NOT FOUND OR (v_stary = 100) = (v_nowy = 100) THEN
+        RETURN NULL; -- uczestnik usuwany albo "pełność" zadania się nie zmieniła
+END IF;
+
+SELECT COUNT(*) INTO v_liczba_zadan FROM zadania_dzienne WHERE wyzwanie_id = v_wyzwanie_id;
+
+SELECT COUNT(*) INTO v_pelne_teraz
+FROM agregat_progresu_dziennego
+WHERE uczestnik_id = v_uczestnik_id AND dzien = v_dzien AND procent = 100;
+
+v_pelne_przed := v_pelne_teraz - (v_nowy = 100)::int + (v_stary = 100)::int;
+
+IF (v_pelne_teraz = v_liczba_zadan) <> (v_pelne_przed = v_liczba_zadan) THEN
+        IF v_pelne_teraz = v_liczba_zadan THEN
+            INSERT INTO dni_ukonczone (uczestnik_id, dzien) VALUES (v_uczestnik_id, v_dzien)
+            ON CONFLICT DO NOTHING;
+ELSE
+DELETE FROM dni_ukonczone WHERE uczestnik_id = v_uczestnik_id AND dzien = v_dzien;
+END IF;
+
+UPDATE klasyfikacja_wyzwan
+SET dni_ukonczone = dni_ukonczone + CASE WHEN v_pelne_teraz = v_liczba_zadan THEN 1 ELSE -1 END
+WHERE uczestnik_id = v_uczestnik_id;
+
+        PERFORM fn_aktualizuj_serie(v_uczestnik_id, NULL, v_dzien, v_pelne_teraz = v_liczba_zadan);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Przebudowa dni_ukonczone i serii od zera: jednego wyzwania albo (NULL) wszystkich.
+-- Zwraca liczbę zapisanych wierszy serii.
+CREATE OR REPLACE FUNCTION fn_przebuduj_serie(p_wyzwanie_id INT DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    v_liczba INT;
+BEGIN
+DELETE FROM dni_ukonczone d
+    USING uczestnicy_wyzwan uw
+WHERE uw.id = d.uczestnik_id
+  AND (p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id);
+
+INSERT INTO dni_ukonczone (uczestnik_id, dzien)
+SELECT a.uczestnik_id, a.dzien
+FROM agregat_progresu_dziennego a
+         JOIN uczestnicy_wyzwan uw ON uw.id = a.uczestnik_id
+WHERE (p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id)
+  AND a.procent = 100
+GROUP BY a.uczestnik_id, a.dzien, uw.wyzwanie_id
+HAVING COUNT(*) = (SELECT COUNT(*) FROM zadania_dzienne zd WHERE zd.wyzwanie_id = uw.wyzwanie_id);
+
+DELETE FROM serie_zadan s
+    USING uczestnicy_wyzwan uw
+WHERE uw.id = s.uczestnik_id
+  AND (p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id);
+
+WITH dni AS (
+    SELECT a.uczestnik_id, a.zadanie_id, a.dzien
+    FROM agregat_progresu_dziennego a
+             JOIN uczestnicy_wyzwan uw ON uw.id = a.uczestnik_id
+    WHERE (p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id)
+      AND a.procent = 100
+    UNION ALL
+    SELECT d.uczestnik_id, NULL::int, d.dzien
+    FROM dni_ukonczone d
+             JOIN uczestnicy_wyzwan uw ON uw.id = d.uczestnik_id
+    WHERE p_wyzwanie_id IS NULL OR uw.wyzwanie_id = p_wyzwanie_id
+),
+     wyspy AS (
+         SELECT uczestnik_id, zadanie_id, MAX(dzien) AS koniec, COUNT(*) AS dlugosc
+         FROM (
+             SELECT uczestnik_id, zadanie_id, dzien,
+                    dzien - (row_number() OVER (PARTITION BY uczestnik_id, zadanie_id ORDER BY dzien))::int AS wyspa
+             FROM dni
+         ) x
+         GROUP BY uczestnik_id, zadanie_id, wyspa
+     )
+INSERT INTO serie_zadan (uczestnik_id, zadanie_id, biezaca, najdluzsza, ostatni_dzien)
+SELECT uczestnik_id, zadanie_id,
+       (array_agg(dlugosc ORDER BY koniec DESC))[1],
+       MAX(dlugosc),
+       MAX(koniec)
+FROM wyspy
+GROUP BY uczestnik_id, zadanie_id;
+
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Inna liczba zadań: ranking i serie całego wyzwania od nowa
+CREATE OR REPLACE FUNCTION fn_trg_klasyfikacja_zadania()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_wyzwanie_id INT;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+    v_wyzwanie_id := CASE WHEN TG_OP = 'DELETE' THEN OLD.wyzwanie_id ELSE NEW.wyzwanie_id END;
+    PERFORM fn_przebuduj_klasyfikacje(v_wyzwanie_id);
+    PERFORM fn_przebuduj_serie(v_wyzwanie_id);
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+SELECT fn_przebuduj_serie();
+
+
+-- Serie uczestników wyzwania do odczytu (biezaca = 0, jeśli seria urwała się przed wczoraj).
+-- p_uczestnik_id = NULL -> wszyscy zaakceptowani uczestnicy.
+CREATE OR REPLACE FUNCTION fn_serie_wyzwania(p_wyzwanie_id INT, p_uczestnik_id INT DEFAULT NULL)
+RETURNS TABLE (
+    uczestnik_id INT,
+    uzytkownik_id INT,
+    zadanie_id INT,
+    biezaca INT,
+    najdluzsza INT,
+    ostatni_dzien DATE
+) AS $$
+SELECT s.uczestnik_id, uw.uzytkownik_id, s.zadanie_id,
+       CASE WHEN s.ostatni_dzien >= CURRENT_DATE - 1 THEN s.biezaca ELSE 0 END,
+       s.najdluzsza, s.ostatni_dzien
+FROM serie_zadan s
+         JOIN uczestnicy_wyzwan uw ON uw.id = s.uczestnik_id
+WHERE uw.wyzwanie_id = p_wyzwanie_id
+  AND uw.zaakceptowane
+  AND (p_uczestnik_id IS NULL OR s.uczestnik_id = p_uczestnik_id)
+ORDER BY s.uczestnik_id, s.zadanie_id NULLS FIRST;
+$$ LANGUAGE sql STABLE;
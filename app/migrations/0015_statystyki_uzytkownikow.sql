@@ -0,0 +1,144 @@
+-- Liczniki znajomych i oczekujących zaproszeń per użytkownik (GET /znajomi/statystyki, pulpit).
+-- Dotąd widok_statystyki_znajomych grupował cały graf znajomości przy każdym odczycie.
+-- Teraz wyzwalacz na znajomi aktualizuje liczniki w tej samej transakcji co zmiana relacji,
+-- a odczyt to jeden wiersz po kluczu głównym. Te same reguły co w starym widoku i funkcji:
+--   liczba_znajomych    - relacje z sa_znajomymi = TRUE, po obu stronach,
+--   liczba_oczekujacych - zaproszenia o statusie 'oczekujacy', u adresata (znajomy_id).
+-- Brak wiersza = zera. Kontrola / naprawa: fn_sprawdz_statystyki_uzytkownikow
+-- (python -m app.cli sprawdz-statystyki [--napraw]).
+
+CREATE TABLE IF NOT EXISTS statystyki_uzytkownikow (
+    uzytkownik_id INT PRIMARY KEY REFERENCES uzytkownicy(id) ON DELETE CASCADE,
+    liczba_znajomych INT NOT NULL DEFAULT 0,
+    liczba_oczekujacych INT NOT NULL DEFAULT 0
+    );
+
+
+CREATE OR REPLACE FUNCTION fn_trg_statystyki_znajomych()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- OLD odejmujemy, NEW dodajemy; jeden INSERT ... ON CONFLICT po rosnącym id,
+    -- żeby równoległe zmiany blokowały wiersze w tej samej kolejności (bez zakleszczeń)
+INSERT INTO statystyki_uzytkownikow AS s (uzytkownik_id, liczba_znajomych, liczba_oczekujacych)
+SELECT d.uzytkownik_id, SUM(d.znajomi), SUM(d.oczekujace)
+FROM (
+    SELECT OLD.uzytkownik_id AS uzytkownik_id, -(OLD.sa_znajomymi IS TRUE)::int AS znajomi, 0 AS oczekujace
+    WHERE TG_OP <> 'INSERT'
+    UNION ALL
+    SELECT OLD.znajomy_id, -(OLD.sa_znajomymi IS TRUE)::int, -(OLD.status = 'oczekujacy')::int
+    WHERE TG_OP <> 'INSERT'
+    UNION ALL
+    SELECT NEW.uzytkownik_id, (NEW.sa_znajomymi IS TRUE)::int, 0
+    WHERE TG_OP <> 'DELETE'
+    UNION ALL
+    SELECT NEW.znajomy_id, (NEW.sa_znajomymi IS TRUE)::int, (NEW.status = 'oczekujacy')::int
+    WHERE TG_OP <> 'DELETE'
+) d
+WHERE EXISTS (SELECT 1 FROM uzytkownicy u WHERE u.id = d.uzytkownik_id)
+GROUP BY d.uzytkownik_id
+HAVING SUM(d.znajomi) <> 0 OR SUM(d.oczekujace) <> 0
+ORDER BY d.uzytkownik_id
+ON CONFLICT (uzytkownik_id) DO UPDATE
+    SET liczba_znajomych = s.liczba_znajomych + EXCLUDED.liczba_znajomych,
+        liczba_oczekujacych = s.liczba_oczekujacych + EXCLUDED.liczba_oczekujacych;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_statystyki_znajomych ON znajomi;
+CREATE TRIGGER trg_statystyki_znajomych
+    AFTER INSERT OR DELETE ON znajomi
+    FOR EACH ROW EXECUTE FUNCTION fn_trg_statystyki_znajomych();
+
+DROP TRIGGER IF EXISTS trg_statystyki_znajomych_zmiana ON znajomi;
+CREATE TRIGGER trg_statystyki_znajomych_zmiana
+    AFTER UPDATE OF uzytkownik_id, znajomy_id, status, sa_znajomymi ON znajomi
+    FOR EACH ROW
+    WHEN (OLD.uzytkownik_id IS DISTINCT FROM NEW.uzytkownik_id
+        OR OLD.znajomy_id IS DISTINCT FROM NEW.znajomy_id
+        OR OLD.status IS DISTINCT FROM NEW.status
+        OR OLD.sa_znajomymi IS DISTINCT FROM NEW.sa_znajomymi)
+    EXECUTE FUNCTION fn_trg_statystyki_znajomych();
+
+
+-- Porównuje liczniki z policzonymi od zera i zwraca rozbieżności.
+-- p_napraw = TRUE poprawia je (zapisy do znajomi czekają na koniec naprawy).
+CREATE OR REPLACE FUNCTION fn_sprawdz_statystyki_uzytkownikow(p_napraw BOOLEAN DEFAULT FALSE)
+RETURNS TABLE (
+    uzytkownik_id INT,
+    liczba_znajomych INT,
+    poprawna_liczba_znajomych INT,
+    liczba_oczekujacych INT,
+    poprawna_liczba_oczekujacych INT
+) AS $$
+BEGIN
+    IF p_napraw THEN
+        LOCK TABLE znajomi IN SHARE ROW EXCLUSIVE MODE;
+END IF;
+
+CREATE TEMP TABLE IF NOT EXISTS tmp_rozbieznosci_statystyk (
+    uzytkownik_id INT,
+    liczba_znajomych INT,
+    poprawna_liczba_znajomych INT,
+    liczba_oczekujacych INT,
+    poprawna_liczba_oczekujacych INT
+) ON COMMIT DROP;
+TRUNCATE tmp_rozbieznosci_statystyk;
+
+INSERT INTO tmp_rozbieznosci_statystyk
+WITH poprawne AS (
+    SELECT t.uid, SUM(t.znajomi)::int AS znajomi, SUM(t.oczekujace)::int AS oczekujace
+    FROM (
+        SELECT z.uzytkownik_id AS uid, 1 AS znajomi, 0 AS oczekujace
+        FROM znajomi z WHERE z.sa_znajomymi
+        UNION ALL
+        SELECT z.znajomy_id, 1, 0
+        FROM znajomi z WHERE z.sa_znajomymi
+        UNION ALL
+        SELECT z.znajomy_id, 0, 1
+        FROM znajomi z WHERE z.status = 'oczekujacy'
+    ) t
+    GROUP BY t.uid
+)
+SELECT u.id,
+       COALESCE(s.liczba_znajomych, 0), COALESCE(p.znajomi, 0),
+       COALESCE(s.liczba_oczekujacych, 0), COALESCE(p.oczekujace, 0)
+FROM uzytkownicy u
+         LEFT JOIN statystyki_uzytkownikow s ON s.uzytkownik_id = u.id
+         LEFT JOIN poprawne p ON p.uid = u.id
+WHERE COALESCE(s.liczba_znajomych, 0) <> COALESCE(p.znajomi, 0)
+   OR COALESCE(s.liczba_oczekujacych, 0) <> COALESCE(p.oczekujace, 0);
+
+IF p_napraw THEN
+INSERT INTO statystyki_uzytkownikow AS s (uzytkownik_id, liczba_znajomych, liczba_oczekujacych)
+SELECT r.uzytkownik_id, r.poprawna_liczba_znajomych, r.poprawna_liczba_oczekujacych
+FROM tmp_rozbieznosci_statystyk r
+ORDER BY r.uzytkownik_id
+ON CONFLICT ON CONSTRAINT statystyki_uzytkownikow_pkey DO UPDATE
+    SET liczba_znajomych = EXCLUDED.liczba_znajomych,
+        liczba_oczekujacych = EXCLUDED.liczba_oczekujacych;
+END IF;
+
+RETURN QUERY SELECT * FROM tmp_rozbieznosci_statystyk r ORDER BY r.uzytkownik_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- wypełnienie liczników dla istniejących danych
+SELECT COUNT(*) FROM fn_sprawdz_statystyki_uzytkownikow(TRUE);
+
+
+-- Widok i funkcja zostają (fn_pulpit_json, zgodność), ale czytają już liczniki
+CREATE OR REPLACE VIEW widok_statystyki_znajomych AS
+SELECT
+    u.id AS uzytkownik_id,
+    u.nazwa_uzytkownika,
+    COALESCE(s.liczba_znajomych, 0)::BIGINT AS liczba_znajomych
+FROM uzytkownicy u
+         LEFT JOIN statystyki_uzytkownikow s ON s.uzytkownik_id = u.id;
+
+CREATE OR REPLACE FUNCTION zlicz_oczekujace_zaproszenia(p_uzytkownik_id INT)
+RETURNS INT AS $$
+SELECT COALESCE((SELECT liczba_oczekujacych
+                 FROM statystyki_uzytkownikow
+                 WHERE uzytkownik_id = p_uzytkownik_id), 0);
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,63 @@
+-- Przebudowa agregatu po zmianie podzadań raz na polecenie, a nie raz na wiersz.
+-- Wyzwalacz FOR EACH ROW z 0001 przebudowywał całe zadanie dla każdego dodanego podzadania,
+-- więc utworzenie zadania z K podzadaniami (jeden INSERT w fn_utworz_wyzwanie) kosztowało O(K²).
+-- Teraz wyzwalacze poleceń czytają tabele przejściowe i przebudowują każde dotknięte zadanie
+-- jeden raz. Wyzwalacz z tabelami przejściowymi nie może mieć listy kolumn (UPDATE OF),
+-- dlatego zmianę wagi / zadania wykrywa złączenie starych i nowych wierszy po id.
+
+CREATE OR REPLACE FUNCTION fn_trg_agregat_podzadania()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_zadanie_id INT;
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        FOR v_zadanie_id IN SELECT DISTINCT zadanie_id FROM nowe_podzadania ORDER BY 1 LOOP
+            PERFORM fn_przebuduj_agregat_progresu(v_zadanie_id);
+END LOOP;
+    ELSIF TG_OP = 'DELETE' THEN
+        FOR v_zadanie_id IN SELECT DISTINCT zadanie_id FROM stare_podzadania ORDER BY 1 LOOP
+            PERFORM fn_przebuduj_agregat_progresu(v_zadanie_id);
+END LOOP;
+    ELSE
+        FOR v_zadanie_id IN
+            SELECT o.zadanie_id
+            FROM stare_podzadania o
+                     JOIN nowe_podzadania n ON n.id = o.id
+            WHERE o.waga IS DISTINCT FROM n.waga OR o.zadanie_id IS DISTINCT FROM n.zadanie_id
+            UNION
+            SELECT n.zadanie_id
+            FROM stare_podzadania o
+                     JOIN nowe_podzadania n ON n.id = o.id
+            WHERE o.zadanie_id IS DISTINCT FROM n.zadanie_id
+            ORDER BY 1
+        LOOP
+            PERFORM fn_przebuduj_agregat_progresu(v_zadanie_id);
+END LOOP;
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_podzadania ON podzadania;
+
+DROP TRIGGER IF EXISTS trg_agregat_podzadania_dodanie ON podzadania;
+CREATE TRIGGER trg_agregat_podzadania_dodanie
+    AFTER INSERT ON podzadania
+    REFERENCING NEW TABLE AS nowe_podzadania
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_agregat_podzadania();
+
+DROP TRIGGER IF EXISTS trg_agregat_podzadania_usuniecie ON podzadania;
+CREATE TRIGGER trg_agregat_podzadania_usuniecie
+    AFTER DELETE ON podzadania
+    REFERENCING OLD TABLE AS stare_podzadania
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_agregat_podzadania();
+
+DROP TRIGGER IF EXISTS trg_agregat_podzadania_zmiana ON podzadania;
+CREATE TRIGGER trg_agregat_podzadania_zmiana
+    AFTER UPDATE ON podzadania
+    REFERENCING OLD TABLE AS stare_podzadania NEW TABLE AS nowe_podzadania
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_agregat_podzadania();
@@ -0,0 +1,493 @@
+-- Jeden odczyt dla wyzwań bieżących i zarchiwizowanych + usuwanie wyzwań z archiwum.
+--
+-- 0012 dodało kopie fn_get_wyzwanie_json, fn_pobierz_historie_wykresu i fn_pobierz_historie_wyzwania
+-- na tabelach *_archiwum, a aplikacja wołała obie wersje (COALESCE). Każda zmiana kształtu JSON
+-- wymagała dwóch identycznych poprawek. Teraz funkcje czytają widoki *_z_archiwum (UNION ALL
+-- tabeli bieżącej i archiwum) - warunki po id/wyzwanie_id trafiają do obu gałęzi, więc to dalej
+-- odczyty po indeksach. Id są wspólne (archiwum zachowuje id z sekwencji tabel bieżących),
+-- a przeniesienie odbywa się w jednej transakcji, więc wiersz jest zawsze w dokładnie jednej gałęzi.
+--
+-- DELETE /wyzwania/ pomijał wyzwania z archiwum. wyzwania_archiwum ma kolumnę usunieto
+-- (LIKE wyzwania_wszystkie), więc miękkie usunięcie i czyszczenie w tle obejmują teraz obie tabele.
+
+CREATE OR REPLACE VIEW wyzwania_z_archiwum AS
+SELECT id, nazwa, opis, czasowe, data_start, data_koniec, autor_id, FALSE AS zarchiwizowane
+FROM wyzwania
+UNION ALL
+SELECT id, nazwa, opis, czasowe, data_start, data_koniec, autor_id, TRUE
+FROM wyzwania_archiwum
+WHERE usunieto IS NULL;
+
+CREATE OR REPLACE VIEW uczestnicy_wyzwan_z_archiwum AS
+SELECT id, wyzwanie_id, uzytkownik_id, zaakceptowane FROM uczestnicy_wyzwan
+UNION ALL
+SELECT id, wyzwanie_id, uzytkownik_id, zaakceptowane FROM uczestnicy_wyzwan_archiwum;
+
+CREATE OR REPLACE VIEW zadania_dzienne_z_archiwum AS
+SELECT id, wyzwanie_id, nazwa, opis FROM zadania_dzienne
+UNION ALL
+SELECT id, wyzwanie_id, nazwa, opis FROM zadania_dzienne_archiwum;
+
+CREATE OR REPLACE VIEW podzadania_z_archiwum AS
+SELECT id, zadanie_id, nazwa, wymagane, waga FROM podzadania
+UNION ALL
+SELECT id, zadanie_id, nazwa, wymagane, waga FROM podzadania_archiwum;
+
+CREATE OR REPLACE VIEW agregat_progresu_dziennego_z_archiwum AS
+SELECT uczestnik_id, zadanie_id, dzien, procent, zmieniono FROM agregat_progresu_dziennego
+UNION ALL
+SELECT uczestnik_id, zadanie_id, dzien, procent, zmieniono FROM agregat_progresu_dziennego_archiwum;
+
+
+-- Szczegóły i historia - jedna definicja dla obu źródeł (pole 'zarchiwizowane' z widoku)
+CREATE OR REPLACE FUNCTION fn_get_wyzwanie_json(p_wyzwanie_id INT)
+RETURNS JSON AS $$
+BEGIN
+RETURN (
+    SELECT json_build_object(
+                   'id', w.id,
+                   'nazwa', w.nazwa,
+                   'opis', w.opis,
+                   'czasowe', w.czasowe,
+
+                   'data_start',
+                   CASE
+                       WHEN w.data_start IS NULL THEN NULL
+                       ELSE to_char(w.data_start, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'data_koniec',
+                   CASE
+                       WHEN w.data_koniec IS NULL THEN NULL
+                       ELSE to_char(w.data_koniec, 'YYYY-MM-DD"T"HH24:MI:SS')
+                       END,
+
+                   'autor_id', w.autor_id,
+                   'zarchiwizowane', w.zarchiwizowane,
+
+                   'uczestnicy', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', u.id,
+                                                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                                       'zaakceptowane', uw.zaakceptowane
+                                               )
+                                                   ORDER BY u.id
+                                       ), '[]'::json)
+                       FROM uczestnicy_wyzwan_z_archiwum uw
+                                JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+                       WHERE uw.wyzwanie_id = w.id
+                   ),
+
+                   'zadania_dzienne', (
+                       SELECT COALESCE(json_agg(
+                                               json_build_object(
+                                                       'id', z.id,
+                                                       'nazwa', z.nazwa,
+                                                       'opis', z.opis,
+
+                                                       'podzadania', (
+                                                           SELECT COALESCE(json_agg(
+                                                                                   json_build_object(
+                                                                                           'id', p.id,
+                                                                                           'nazwa', p.nazwa,
+                                                                                           'wymagane', p.wymagane,
+                                                                                           'waga', p.waga
+                                                                                   )
+                                                                                       ORDER BY p.id
+                                                                           ), '[]'::json)
+                                                           FROM podzadania_z_archiwum p
+                                                           WHERE p.zadanie_id = z.id
+                                                       )
+                                               )
+                                                   ORDER BY z.id
+                                       ), '[]'::json)
+                       FROM zadania_dzienne_z_archiwum z
+                       WHERE z.wyzwanie_id = w.id
+                   )
+           )
+    FROM wyzwania_z_archiwum w
+    WHERE w.id = p_wyzwanie_id
+);
+END;
+$$ LANGUAGE plpgsql;
+
+
+
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wykresu(p_zadanie_id INT)
+RETURNS JSON AS $$
+DECLARE
+v_wyzwanie_id INT;
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    -- Zmienne obliczone
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+
+    v_wynik JSON;
+BEGIN
+    -- 1. Pobieramy dane wyzwania
+SELECT w.id, w.data_start, w.data_koniec, w.czasowe
+INTO v_wyzwanie_id, v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania_z_archiwum w
+         JOIN zadania_dzienne_z_archiwum zd ON w.id = zd.wyzwanie_id
+WHERE zd.id = p_zadanie_id;
+
+-- 2. Ustalanie daty KOŃCOWEJ
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+        v_koniec_calc := v_data_koniec::date;
+ELSE
+        v_koniec_calc := CURRENT_DATE;
+END IF;
+
+    -- 3. Ustalanie daty STARTOWEJ (pierwszy dzień z progresem - indeks agregatu)
+    IF v_czasowe AND v_data_start IS NOT NULL THEN
+        v_start_calc := v_data_start::date;
+ELSE
+        v_start_calc := COALESCE(
+            (SELECT MIN(dzien) FROM agregat_progresu_dziennego_z_archiwum WHERE zadanie_id = p_zadanie_id),
+            CURRENT_DATE);
+END IF;
+
+    -- 4. Generowanie JSON
+WITH uczestnicy AS (
+    SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+    FROM uczestnicy_wyzwan_z_archiwum uw
+             JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+    WHERE uw.wyzwanie_id = v_wyzwanie_id
+      AND uw.zaakceptowane = TRUE
+),
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.dzien, a.procent
+         FROM agregat_progresu_dziennego_z_archiwum a
+         WHERE a.zadanie_id = p_zadanie_id
+           AND a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     punkty AS (
+         SELECT u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w ON w.uczestnik_id = u.uczestnik_id AND w.dzien = d.dzien
+         GROUP BY u.uczestnik_id
+     )
+SELECT json_agg(
+               json_build_object(
+                       'uczestnik_id', u.uczestnik_id,
+                       'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                       'punkty', p.punkty
+               ) ORDER BY u.uczestnik_id
+       ) INTO v_wynik
+FROM uczestnicy u
+         LEFT JOIN punkty p ON p.uczestnik_id = u.uczestnik_id;
+
+RETURN COALESCE(v_wynik, '[]'::json);
+END;
+$$ LANGUAGE plpgsql;
+
+
+
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wyzwania(
+    p_wyzwanie_id INT,
+    p_od DATE DEFAULT NULL,
+    p_do DATE DEFAULT NULL,
+    p_od_zmiany TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+    v_wynik JSON;
+BEGIN
+SELECT w.data_start, w.data_koniec, w.czasowe
+INTO v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania_z_archiwum w
+WHERE w.id = p_wyzwanie_id;
+
+IF NOT FOUND THEN
+    RETURN NULL;
+END IF;
+
+-- Domyślny zakres - te same reguły co w fn_pobierz_historie_wykresu
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+    v_koniec_calc := v_data_koniec::date;
+ELSE
+    v_koniec_calc := CURRENT_DATE;
+END IF;
+
+IF v_czasowe AND v_data_start IS NOT NULL THEN
+    v_start_calc := v_data_start::date;
+ELSE
+    v_start_calc := COALESCE(
+        (SELECT MIN(a.dzien)
+         FROM agregat_progresu_dziennego_z_archiwum a
+                  JOIN zadania_dzienne_z_archiwum zd ON zd.id = a.zadanie_id
+         WHERE zd.wyzwanie_id = p_wyzwanie_id),
+        CURRENT_DATE);
+END IF;
+
+-- Okno żądane przez klienta
+v_start_calc := GREATEST(v_start_calc, COALESCE(p_od, v_start_calc));
+v_koniec_calc := LEAST(v_koniec_calc, COALESCE(p_do, v_koniec_calc));
+
+WITH zadania AS (
+    SELECT zd.id AS zadanie_id
+    FROM zadania_dzienne_z_archiwum zd
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+),
+     uczestnicy AS (
+         SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+         FROM uczestnicy_wyzwan_z_archiwum uw
+                  JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+         WHERE uw.wyzwanie_id = p_wyzwanie_id
+           AND uw.zaakceptowane = TRUE
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.zadanie_id, a.dzien, a.procent, a.zmieniono
+         FROM agregat_progresu_dziennego_z_archiwum a
+                  JOIN zadania z ON z.zadanie_id = a.zadanie_id
+         WHERE a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     -- Dni zmienione od p_od_zmiany. Margines 10 s obejmuje transakcje zapisu, które
+     -- zaczęły się przed poprzednim odczytem, a zatwierdziły po nim (ponowne wysłanie dnia nic nie psuje).
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+         WHERE p_od_zmiany IS NULL
+            OR d::date IN (SELECT dzien FROM wykonane
+                           WHERE zmieniono > p_od_zmiany - INTERVAL '10 seconds')
+     ),
+     punkty AS (
+         SELECT z.zadanie_id, u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM zadania z
+                  CROSS JOIN uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w
+                            ON w.zadanie_id = z.zadanie_id
+                                AND w.uczestnik_id = u.uczestnik_id
+                                AND w.dzien = d.dzien
+         GROUP BY z.zadanie_id, u.uczestnik_id
+     ),
+     historia AS (
+         SELECT z.zadanie_id,
+                COALESCE(json_agg(
+                                 json_build_object(
+                                         'uczestnik_id', u.uczestnik_id,
+                                         'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                         'punkty', COALESCE(p.punkty, '[]'::json)
+                                 ) ORDER BY u.uczestnik_id
+                         ) FILTER (WHERE u.uczestnik_id IS NOT NULL), '[]'::json) AS historia
+         FROM zadania z
+                  LEFT JOIN uczestnicy u ON TRUE
+                  LEFT JOIN punkty p ON p.zadanie_id = z.zadanie_id AND p.uczestnik_id = u.uczestnik_id
+         GROUP BY z.zadanie_id
+     )
+SELECT json_build_object(
+               'od', v_start_calc,
+               'do', v_koniec_calc,
+               'znacznik', NOW(),
+               'zadania', COALESCE(json_agg(
+                                          json_build_object('zadanie_id', h.zadanie_id, 'historia', h.historia)
+                                              ORDER BY h.zadanie_id
+                                  ), '[]'::json)
+       ) INTO v_wynik
+FROM historia h;
+
+RETURN v_wynik;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP FUNCTION IF EXISTS fn_get_wyzwanie_json_archiwum(INT);
+DROP FUNCTION IF EXISTS fn_pobierz_historie_wykresu_archiwum(INT);
+DROP FUNCTION IF EXISTS fn_pobierz_historie_wyzwania_archiwum(INT, DATE, DATE, TIMESTAMPTZ);
+
+
+-- Ukrywa wyzwania - bieżące i zarchiwizowane - i tworzy zlecenie czyszczenia.
+-- Zwraca id zlecenia i id faktycznie ukrytych wyzwań (NULL/pusta tablica, jeśli żadnego nie było).
+CREATE OR REPLACE FUNCTION fn_miekko_usun_wyzwania(p_ids INT[], p_zlecil INT)
+RETURNS TABLE (
+    zadanie_id BIGINT,
+    wyzwania_ids INT[]
+) AS $$
+DECLARE
+    v_ids INT[];
+    v_zadanie_id BIGINT;
+BEGIN
+    WITH ukryte AS (
+        UPDATE wyzwania_wszystkie
+        SET usunieto = NOW()
+        WHERE id = ANY(p_ids) AND usunieto IS NULL
+        RETURNING id
+    ),
+         ukryte_archiwum AS (
+             UPDATE wyzwania_archiwum
+             SET usunieto = NOW()
+             WHERE id = ANY(p_ids) AND usunieto IS NULL
+             RETURNING id
+         )
+SELECT COALESCE(array_agg(id ORDER BY id), '{}') INTO v_ids
+FROM (SELECT id FROM ukryte UNION ALL SELECT id FROM ukryte_archiwum) u;
+
+IF cardinality(v_ids) > 0 THEN
+        INSERT INTO usuwanie_wyzwan (zlecil, wyzwania_ids, pozostale_wyzwania)
+        VALUES (p_zlecil, v_ids, cardinality(v_ids))
+        RETURNING id INTO v_zadanie_id;
+END IF;
+
+RETURN QUERY SELECT v_zadanie_id, v_ids;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Usuwa do p_limit wierszy jednego ukrytego wyzwania - z pierwszej niepustej tabeli,
+-- od liści do korzenia. Zwraca liczbę usuniętych wierszy (0 = wyzwania już nie ma).
+-- Te same kroki dla tabel bieżących i *_archiwum (sufiks nazwy tabeli); archiwum nie ma
+-- wyzwalaczy ani kluczy obcych, więc betya.czyszczenie dotyczy tylko tabel bieżących.
+CREATE OR REPLACE FUNCTION fn_usun_porcje_wyzwania(p_wyzwanie_id INT, p_limit INT)
+RETURNS INT AS $$
+DECLARE
+    v_sufiks TEXT := '';
+    v_liczba INT;
+BEGIN
+    PERFORM set_config('betya.czyszczenie', 'on', true);
+
+    IF EXISTS (SELECT 1 FROM wyzwania_archiwum WHERE id = p_wyzwanie_id AND usunieto IS NOT NULL) THEN
+        v_sufiks := '_archiwum';
+END IF;
+
+EXECUTE format(
+    'DELETE FROM %1$I WHERE ctid = ANY(ARRAY(
+         SELECT a.ctid FROM %1$I a JOIN %2$I zd ON zd.id = a.zadanie_id
+         WHERE zd.wyzwanie_id = $1 LIMIT $2))',
+    'agregat_progresu_dziennego' || v_sufiks, 'zadania_dzienne' || v_sufiks)
+USING p_wyzwanie_id, p_limit;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+EXECUTE format(
+    'DELETE FROM %1$I WHERE ctid = ANY(ARRAY(
+         SELECT pp.ctid FROM %1$I pp
+             JOIN %2$I p ON p.id = pp.podzadanie_id
+             JOIN %3$I zd ON zd.id = p.zadanie_id
+         WHERE zd.wyzwanie_id = $1 LIMIT $2))',
+    'progres_podzadania' || v_sufiks, 'podzadania' || v_sufiks, 'zadania_dzienne' || v_sufiks)
+USING p_wyzwanie_id, p_limit;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+EXECUTE format(
+    'DELETE FROM %1$I WHERE ctid = ANY(ARRAY(
+         SELECT pd.ctid FROM %1$I pd JOIN %2$I zd ON zd.id = pd.zadanie_id
+         WHERE zd.wyzwanie_id = $1 LIMIT $2))',
+    'progres_dzienne' || v_sufiks, 'zadania_dzienne' || v_sufiks)
+USING p_wyzwanie_id, p_limit;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+    -- struktura wyzwania jest mała - bez porcjowania
+EXECUTE format(
+    'DELETE FROM %1$I WHERE zadanie_id IN (SELECT id FROM %2$I WHERE wyzwanie_id = $1)',
+    'podzadania' || v_sufiks, 'zadania_dzienne' || v_sufiks)
+USING p_wyzwanie_id;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+EXECUTE format('DELETE FROM %I WHERE wyzwanie_id = $1', 'zadania_dzienne' || v_sufiks)
+USING p_wyzwanie_id;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+EXECUTE format('DELETE FROM %I WHERE wyzwanie_id = $1', 'uczestnicy_wyzwan' || v_sufiks)
+USING p_wyzwanie_id;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+IF v_liczba > 0 THEN RETURN v_liczba; END IF;
+
+EXECUTE format('DELETE FROM %I WHERE id = $1 AND usunieto IS NOT NULL',
+               CASE WHEN v_sufiks = '' THEN 'wyzwania_wszystkie' ELSE 'wyzwania_archiwum' END)
+USING p_wyzwanie_id;
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Jedna porcja zlecenia (jedna krótka transakcja po stronie aplikacji).
+-- Zwraca liczbę usuniętych wierszy; 0 = zlecenie zakończone.
+CREATE OR REPLACE FUNCTION fn_usun_porcje_wyzwan(p_zadanie_id BIGINT, p_limit INT DEFAULT 1000)
+RETURNS INT AS $$
+DECLARE
+    v_zadanie usuwanie_wyzwan%ROWTYPE;
+    v_wyzwanie_id INT;
+    v_liczba INT := 0;
+BEGIN
+SELECT * INTO v_zadanie FROM usuwanie_wyzwan WHERE id = p_zadanie_id FOR UPDATE;
+IF NOT FOUND OR v_zadanie.status = 'zakonczone' THEN
+        RETURN 0;
+END IF;
+
+    -- kolejne wyzwanie zlecenia, które jeszcze istnieje (w tabeli bieżącej albo w archiwum)
+SELECT w.id INTO v_wyzwanie_id
+FROM (SELECT id, usunieto FROM wyzwania_wszystkie
+      UNION ALL
+      SELECT id, usunieto FROM wyzwania_archiwum) w
+WHERE w.id = ANY(v_zadanie.wyzwania_ids) AND w.usunieto IS NOT NULL
+ORDER BY w.id
+LIMIT 1;
+
+IF v_wyzwanie_id IS NOT NULL THEN
+        v_liczba := fn_usun_porcje_wyzwania(v_wyzwanie_id, p_limit);
+END IF;
+
+UPDATE usuwanie_wyzwan
+SET status = CASE WHEN v_wyzwanie_id IS NULL THEN 'zakonczone' ELSE 'w_toku' END,
+    usuniete_wiersze = usuniete_wiersze + v_liczba,
+    pozostale_wyzwania = (SELECT COUNT(*)
+                          FROM (SELECT id, usunieto FROM wyzwania_wszystkie
+                                UNION ALL
+                                SELECT id, usunieto FROM wyzwania_archiwum) w
+                          WHERE w.id = ANY(v_zadanie.wyzwania_ids) AND w.usunieto IS NOT NULL),
+    rozpoczeto = COALESCE(rozpoczeto, NOW()),
+    zakonczono = CASE WHEN v_wyzwanie_id IS NULL THEN NOW() END,
+    blad = NULL
+WHERE id = p_zadanie_id;
+
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Synchroniczne usunięcie całego wyzwania w jednej transakcji (skrypty / konsola).
+-- Aplikacja używa fn_miekko_usun_wyzwania + czyszczenia w tle.
+CREATE OR REPLACE FUNCTION usun_wyzwanie_admin(p_wyzwanie_id INT)
+RETURNS VOID AS $$
+BEGIN
+UPDATE wyzwania_wszystkie SET usunieto = COALESCE(usunieto, NOW()) WHERE id = p_wyzwanie_id;
+UPDATE wyzwania_archiwum SET usunieto = COALESCE(usunieto, NOW()) WHERE id = p_wyzwanie_id;
+
+LOOP
+        EXIT WHEN fn_usun_porcje_wyzwania(p_wyzwanie_id, 10000) = 0;
+END LOOP;
+END;
+$$ LANGUAGE plpgsql;
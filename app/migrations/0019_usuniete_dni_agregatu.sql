@@ -0,0 +1,175 @@
+-- Tryb przyrostowy historii (GET /wyzwania/{id}/historia?since=) widział tylko dni, w których
+-- wiersz agregatu zmienił się po znaczniku klienta. Gdy znikały wszystkie wpisy dnia,
+-- fn_odswiez_agregat_progresu usuwał wiersz (tak samo przebudowa zadania), więc dzień nie trafiał
+-- do odpowiedzi, a klient zostawał przy starym procencie.
+--
+-- Usunięcia zostawiają teraz ślad (zadanie, dzień, kiedy) w agregat_progresu_usuniete - jeden wiersz
+-- na dzień zadania, bo odpowiedź i tak wysyła dzień dla wszystkich uczestników. Ślady starsze
+-- niż 7 dni są usuwane przy kolejnych usunięciach; znacznik starszy niż to okno dostaje pełną
+-- odpowiedź. Czyszczenie i archiwizacja (betya.czyszczenie) śladów nie zostawiają - wyzwanie
+-- znika albo nie zmienia się dla klienta.
+
+CREATE TABLE IF NOT EXISTS agregat_progresu_usuniete (
+    zadanie_id INT NOT NULL,
+    dzien DATE NOT NULL,
+    usunieto TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (zadanie_id, dzien)
+    );
+
+CREATE INDEX IF NOT EXISTS idx_agregat_progresu_usuniete_kiedy ON agregat_progresu_usuniete (usunieto);
+
+
+CREATE OR REPLACE FUNCTION fn_trg_agregat_usuniete()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF fn_czyszczenie_w_toku() THEN
+        RETURN NULL;
+END IF;
+
+INSERT INTO agregat_progresu_usuniete (zadanie_id, dzien)
+SELECT DISTINCT zadanie_id, dzien
+FROM usuniete_agregaty
+ORDER BY 1, 2
+ON CONFLICT (zadanie_id, dzien) DO UPDATE SET usunieto = NOW();
+
+DELETE FROM agregat_progresu_usuniete WHERE usunieto < NOW() - INTERVAL '7 days';
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_agregat_usuniete ON agregat_progresu_dziennego;
+CREATE TRIGGER trg_agregat_usuniete
+    AFTER DELETE ON agregat_progresu_dziennego
+    REFERENCING OLD TABLE AS usuniete_agregaty
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_trg_agregat_usuniete();
+
+
+CREATE OR REPLACE FUNCTION fn_pobierz_historie_wyzwania(
+    p_wyzwanie_id INT,
+    p_od DATE DEFAULT NULL,
+    p_do DATE DEFAULT NULL,
+    p_od_zmiany TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+    v_wynik JSON;
+BEGIN
+SELECT w.data_start, w.data_koniec, w.czasowe
+INTO v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania_z_archiwum w
+WHERE w.id = p_wyzwanie_id;
+
+IF NOT FOUND THEN
+    RETURN NULL;
+END IF;
+
+-- Starszy znacznik niż okno przechowywania usuniętych dni - nie wiemy, co zniknęło, więc pełna odpowiedź
+IF p_od_zmiany < NOW() - INTERVAL '7 days' THEN
+    p_od_zmiany := NULL;
+END IF;
+
+-- Domyślny zakres - te same reguły co w fn_pobierz_historie_wykresu
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+    v_koniec_calc := v_data_koniec::date;
+ELSE
+    v_koniec_calc := CURRENT_DATE;
+END IF;
+
+IF v_czasowe AND v_data_start IS NOT NULL THEN
+    v_start_calc := v_data_start::date;
+ELSE
+    v_start_calc := COALESCE(
+        (SELECT MIN(a.dzien)
+         FROM agregat_progresu_dziennego_z_archiwum a
+                  JOIN zadania_dzienne_z_archiwum zd ON zd.id = a.zadanie_id
+         WHERE zd.wyzwanie_id = p_wyzwanie_id),
+        CURRENT_DATE);
+END IF;
+
+-- Okno żądane przez klienta
+v_start_calc := GREATEST(v_start_calc, COALESCE(p_od, v_start_calc));
+v_koniec_calc := LEAST(v_koniec_calc, COALESCE(p_do, v_koniec_calc));
+
+WITH zadania AS (
+    SELECT zd.id AS zadanie_id
+    FROM zadania_dzienne_z_archiwum zd
+    WHERE zd.wyzwanie_id = p_wyzwanie_id
+),
+     uczestnicy AS (
+         SELECT uw.id AS uczestnik_id, u.nazwa_uzytkownika
+         FROM uczestnicy_wyzwan_z_archiwum uw
+                  JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+         WHERE uw.wyzwanie_id = p_wyzwanie_id
+           AND uw.zaakceptowane = TRUE
+     ),
+     wykonane AS (
+         SELECT a.uczestnik_id, a.zadanie_id, a.dzien, a.procent, a.zmieniono
+         FROM agregat_progresu_dziennego_z_archiwum a
+                  JOIN zadania z ON z.zadanie_id = a.zadanie_id
+         WHERE a.dzien BETWEEN v_start_calc AND v_koniec_calc
+     ),
+     -- Dni zmienione od p_od_zmiany - także te, z których zniknął wiersz agregatu (spadek do 0).
+     -- Margines 10 s obejmuje transakcje zapisu, które zaczęły się przed poprzednim odczytem,
+     -- a zatwierdziły po nim (ponowne wysłanie dnia nic nie psuje).
+     dni AS (
+         SELECT d::date AS dzien
+         FROM generate_series(v_start_calc, v_koniec_calc, '1 day'::interval) AS d
+         WHERE p_od_zmiany IS NULL
+            OR d::date IN (SELECT dzien FROM wykonane
+                           WHERE zmieniono > p_od_zmiany - INTERVAL '10 seconds')
+            OR d::date IN (SELECT u.dzien
+                           FROM agregat_progresu_usuniete u
+                                    JOIN zadania z ON z.zadanie_id = u.zadanie_id
+                           WHERE u.usunieto > p_od_zmiany - INTERVAL '10 seconds')
+     ),
+     punkty AS (
+         SELECT z.zadanie_id, u.uczestnik_id,
+                json_agg(
+                        json_build_object(
+                                'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                'procent', COALESCE(w.procent, 0)
+                        ) ORDER BY d.dzien
+                ) AS punkty
+         FROM zadania z
+                  CROSS JOIN uczestnicy u
+                  CROSS JOIN dni d
+                  LEFT JOIN wykonane w
+                            ON w.zadanie_id = z.zadanie_id
+                                AND w.uczestnik_id = u.uczestnik_id
+                                AND w.dzien = d.dzien
+         GROUP BY z.zadanie_id, u.uczestnik_id
+     ),
+     historia AS (
+         SELECT z.zadanie_id,
+                COALESCE(json_agg(
+                                 json_build_object(
+                                         'uczestnik_id', u.uczestnik_id,
+                                         'nazwa_uzytkownika', u.nazwa_uzytkownika,
+                                         'punkty', COALESCE(p.punkty, '[]'::json)
+                                 ) ORDER BY u.uczestnik_id
+                         ) FILTER (WHERE u.uczestnik_id IS NOT NULL), '[]'::json) AS historia
+         FROM zadania z
+                  LEFT JOIN uczestnicy u ON TRUE
+                  LEFT JOIN punkty p ON p.zadanie_id = z.zadanie_id AND p.uczestnik_id = u.uczestnik_id
+         GROUP BY z.zadanie_id
+     )
+SELECT json_build_object(
+               'od', v_start_calc,
+               'do', v_koniec_calc,
+               'znacznik', NOW(),
+               'zadania', COALESCE(json_agg(
+                                          json_build_object('zadanie_id', h.zadanie_id, 'historia', h.historia)
+                                              ORDER BY h.zadanie_id
+                                  ), '[]'::json)
+       ) INTO v_wynik
+FROM historia h;
+
+RETURN v_wynik;
+END;
+$$ LANGUAGE plpgsql;
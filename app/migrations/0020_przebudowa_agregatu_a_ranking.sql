@@ -0,0 +1,161 @@
+-- Przebudowa agregatu a ranking (0013) i serie (0014).
+--
+-- fn_trg_klasyfikacja_agregat liczy deltę dni ukończonych z jednego wiersza: liczba pełnych zadań
+-- dnia "przed" = stan po poleceniu -/+ ten wiersz. Wyzwalacz FOR EACH ROW widzi jednak stan po
+-- całym poleceniu, a fn_przebuduj_agregat_progresu usuwa i wstawia wiele wierszy naraz:
+-- przy DELETE żaden wiersz nie widział, że dzień przestaje być pełny (brak -1), przy INSERT
+-- każdy widział, że dzień staje się pełny (+N za każdy pełny dzień). Każda przebudowa
+-- (python -m app.cli przebuduj-agregaty, zmiana podzadań - 0016) zawyżała ranking.
+--
+-- Przebudowa ustawia teraz betya.przebudowa_agregatu - wyzwalacz klasyfikacji ją pomija -
+-- i na końcu przelicza klasyfikację oraz dni ukończone i serie (fn_przebuduj_serie)
+-- wyzwania zadania albo, przy pełnej przebudowie, wszystkich wyzwań.
+-- Osobne ustawienie zamiast betya.czyszczenie: pozostałe wyzwalacze agregatu
+-- (ślady usuniętych dni - 0019) mają działać jak przy każdej zmianie.
+
+CREATE OR REPLACE FUNCTION fn_przebudowa_agregatu_w_toku()
+RETURNS BOOLEAN AS $$
+SELECT COALESCE(current_setting('betya.przebudowa_agregatu', true), '') = 'on';
+$$ LANGUAGE sql STABLE;
+
+
+-- Ranking + dni_ukonczone i seria całego wyzwania (0014), pomijane w trakcie przebudowy
+CREATE OR REPLACE FUNCTION fn_trg_klasyfikacja_agregat()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_uczestnik_id INT;
+    v_dzien DATE;
+    v_stary INT := 0;
+    v_nowy INT := 0;
+    v_wyzwanie_id INT;
+    v_liczba_zadan INT;
+    v_pelne_teraz INT;
+    v_pelne_przed INT;
+BEGIN
+    IF fn_czyszczenie_w_toku() OR fn_przebudowa_agregatu_w_toku() THEN
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        v_uczestnik_id := OLD.uczestnik_id;
+        v_dzien := OLD.dzien;
+ELSE
+        v_uczestnik_id := NEW.uczestnik_id;
+        v_dzien := NEW.dzien;
+END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_stary := OLD.procent;
+END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_nowy := NEW.procent;
+END IF;
+
+UPDATE klasyfikacja_wyzwan
+SET suma_procent = suma_procent + (v_nowy - v_stary),
+    zmieniono = NOW()
+WHERE uczestnik_id = v_uczestnik_id
+RETURNING wyzwanie_id INTO v_wyzwanie_id;
+
+IF NOT FOUND OR (v_stary = 100) = (v_nowy = 100) THEN
+        RETURN NULL; -- uczestnik usuwany albo "pełność" zadania się nie zmieniła
+END IF;
+
+SELECT COUNT(*) INTO v_liczba_zadan FROM zadania_dzienne WHERE wyzwanie_id = v_wyzwanie_id;
+
+SELECT COUNT(*) INTO v_pelne_teraz
+FROM agregat_progresu_dziennego
+WHERE uczestnik_id = v_uczestnik_id AND dzien = v_dzien AND procent = 100;
+
+v_pelne_przed := v_pelne_teraz - (v_nowy = 100)::int + (v_stary = 100)::int;
+
+IF (v_pelne_teraz = v_liczba_zadan) <> (v_pelne_przed = v_liczba_zadan) THEN
+        IF v_pelne_teraz = v_liczba_zadan THEN
+            INSERT INTO dni_ukonczone (uczestnik_id, dzien) VALUES (v_uczestnik_id, v_dzien)
+            ON CONFLICT DO NOTHING;
+ELSE
+DELETE FROM dni_ukonczone WHERE uczestnik_id = v_uczestnik_id AND dzien = v_dzien;
+END IF;
+
+UPDATE klasyfikacja_wyzwan
+SET dni_ukonczone = dni_ukonczone + CASE WHEN v_pelne_teraz = v_liczba_zadan THEN 1 ELSE -1 END
+WHERE uczestnik_id = v_uczestnik_id;
+
+        PERFORM fn_aktualizuj_serie(v_uczestnik_id, NULL, v_dzien, v_pelne_teraz = v_liczba_zadan);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Przebudowa agregatu od zera: jednego zadania albo (p_zadanie_id = NULL) całej tabeli.
+-- Używana po zmianie podzadań zadania oraz przez polecenie `python -m app.cli przebuduj-agregaty`.
+-- Zwraca liczbę zapisanych wierszy agregatu.
+CREATE OR REPLACE FUNCTION fn_przebuduj_agregat_progresu(p_zadanie_id INT DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+v_liczba INT;
+    v_wyzwanie_id INT;
+    v_poprzednio TEXT := COALESCE(current_setting('betya.przebudowa_agregatu', true), '');
+BEGIN
+    IF p_zadanie_id IS NOT NULL THEN
+SELECT wyzwanie_id INTO v_wyzwanie_id FROM zadania_dzienne WHERE id = p_zadanie_id;
+        -- blokada klasyfikacji wyzwania przed odczytem agregatu: zapis progresu, który zdążył
+        -- zmienić wiersz agregatu, dokończy swoją deltę dopiero po naszym przeliczeniu
+        PERFORM 1 FROM klasyfikacja_wyzwan
+        WHERE wyzwanie_id = v_wyzwanie_id
+        ORDER BY uczestnik_id
+            FOR UPDATE;
+END IF;
+
+    PERFORM set_config('betya.przebudowa_agregatu', 'on', true);
+
+    IF p_zadanie_id IS NULL THEN
+        -- blokuje zapisy progresu na czas przebudowy, odczyty działają dalej
+        LOCK TABLE progres_dzienne, progres_podzadania, agregat_progresu_dziennego IN SHARE ROW EXCLUSIVE MODE;
+DELETE FROM agregat_progresu_dziennego;
+ELSE
+DELETE FROM agregat_progresu_dziennego WHERE zadanie_id = p_zadanie_id;
+END IF;
+
+WITH zadania AS (
+    SELECT zd.id AS zadanie_id, COALESCE(SUM(p.waga), 0) AS suma_wag
+    FROM zadania_dzienne zd
+             LEFT JOIN podzadania p ON p.zadanie_id = zd.id
+    WHERE p_zadanie_id IS NULL OR zd.id = p_zadanie_id
+    GROUP BY zd.id
+),
+     wazone AS (
+         SELECT pp.uczestnik_id, z.zadanie_id, pp.data::date AS dzien,
+                COALESCE(SUM(p.waga) FILTER (WHERE pp.wykonane), 0) AS suma,
+                z.suma_wag
+         FROM progres_podzadania pp
+                  JOIN podzadania p ON p.id = pp.podzadanie_id
+                  JOIN zadania z ON z.zadanie_id = p.zadanie_id AND z.suma_wag > 0
+         GROUP BY pp.uczestnik_id, z.zadanie_id, pp.data::date, z.suma_wag
+     ),
+     proste AS (
+         SELECT pd.uczestnik_id, z.zadanie_id, pd.data::date AS dzien,
+                CASE WHEN bool_or(pd.wykonane) THEN 1 ELSE 0 END AS suma
+         FROM progres_dzienne pd
+                  JOIN zadania z ON z.zadanie_id = pd.zadanie_id AND z.suma_wag <= 0
+         GROUP BY pd.uczestnik_id, z.zadanie_id, pd.data::date
+     )
+INSERT INTO agregat_progresu_dziennego (uczestnik_id, zadanie_id, dzien, suma_wykonane, procent)
+SELECT uczestnik_id, zadanie_id, dzien, suma, CAST(ROUND((suma / suma_wag) * 100) AS INT)
+FROM wazone
+UNION ALL
+SELECT uczestnik_id, zadanie_id, dzien, suma, suma * 100
+FROM proste;
+
+GET DIAGNOSTICS v_liczba = ROW_COUNT;
+
+PERFORM set_config('betya.przebudowa_agregatu', v_poprzednio, true);
+
+    -- ranking, dni ukończone i serie od nowa z gotowego agregatu
+    IF p_zadanie_id IS NULL OR v_wyzwanie_id IS NOT NULL THEN
+        PERFORM fn_przebuduj_klasyfikacje(v_wyzwanie_id);
+        PERFORM fn_przebuduj_serie(v_wyzwanie_id);
+END IF;
+RETURN v_liczba;
+END;
+$$ LANGUAGE plpgsql;
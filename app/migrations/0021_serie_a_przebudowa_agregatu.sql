@@ -0,0 +1,41 @@
+-- Serie zadań (0014) a przebudowa agregatu.
+--
+-- fn_aktualizuj_serie przy cofnięciu dnia z przeszłości mierzy sąsiednie pełne dni w tabeli
+-- agregatu, a wyzwalacz FOR EACH ROW widzi stan po całym poleceniu. Przebudowa zadania
+-- (fn_przebuduj_agregat_progresu po każdej zmianie podzadań - 0016 - i przebuduj-agregaty)
+-- usuwa wszystkie dni zadania jednym DELETE: dla każdego wiersza sąsiedzi już nie istnieją,
+-- v_przed + 1 + v_po = 1 < najdluzsza i najdłuższa seria nie była przeliczana. Po zmianie wag,
+-- przez którą dawne dni spadły poniżej 100%, serie_zadan.najdluzsza zostawała przy starej serii.
+--
+-- Wyzwalacz serii zadań pomija teraz przebudowę (betya.przebudowa_agregatu, 0020) tak jak
+-- wyzwalacz klasyfikacji - przebudowa kończy się fn_przebuduj_serie dla wyzwania zadania,
+-- tak samo jak zmiana zadań wyzwania (fn_trg_klasyfikacja_zadania).
+
+-- Seria zadania: zmiana "pełności" wiersza agregatu (poza przebudową agregatu)
+CREATE OR REPLACE FUNCTION fn_trg_serie_agregat()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_stary BOOLEAN := FALSE;
+    v_nowy BOOLEAN := FALSE;
+BEGIN
+    IF fn_czyszczenie_w_toku() OR fn_przebudowa_agregatu_w_toku() THEN
+        RETURN NULL;
+END IF;
+    IF TG_OP <> 'INSERT' THEN
+        v_stary := OLD.procent = 100;
+END IF;
+    IF TG_OP <> 'DELETE' THEN
+        v_nowy := NEW.procent = 100;
+END IF;
+    IF v_stary = v_nowy THEN
+        RETURN NULL;
+END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        PERFORM fn_aktualizuj_serie(OLD.uczestnik_id, OLD.zadanie_id, OLD.dzien, FALSE);
+ELSE
+        PERFORM fn_aktualizuj_serie(NEW.uczestnik_id, NEW.zadanie_id, NEW.dzien, v_nowy);
+END IF;
+RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
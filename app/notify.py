@@ -0,0 +1,131 @@
+"""
+Nasłuch powiadomień Postgresa (LISTEN/NOTIFY) w wątku tła - jeden na proces uvicorn.
+
+Wyzwalacze w bazie publikują na kanałach (np. 'zmiany_wyzwan' z id wyzwania), a moduły
+rejestrują funkcje obsługi przez subskrybuj(). Dzięki temu lokalne cache każdego workera
+usuwają dokładnie zmienione wpisy bez współdzielonego serwera cache.
+
+Powiadomienia wysłane, gdy nasłuch był rozłączony, przepadają - po ponownym połączeniu
+wywoływane są funkcje z przy_polaczeniu() (np. wyczyszczenie całego cache), a do tego
+czasu `zdrowy` jest False i z cache nie należy korzystać.
+"""
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+from app.database import DATABASE_CONFIG, POOL_CONFIG
+
+# co ile sekund bez ruchu sprawdzamy połączenie (SELECT 1)
+SPRAWDZENIE_CO = 15
+# maksymalna przerwa między próbami ponownego połączenia
+MAX_PRZERWA = 30
+
+
+class NasluchZmian:
+    def __init__(self):
+        self._subskrypcje = {}
+        self._przy_polaczeniu = []
+        self._watek = None
+        self._stop = threading.Event()
+        self._zdrowy = threading.Event()
+        self.odebrane = 0
+        self.polaczenia = 0
+
+    @property
+    def zdrowy(self) -> bool:
+        return self._zdrowy.is_set()
+
+    def subskrybuj(self, kanal: str, funkcja):
+        """funkcja(payload: str) jest wywoływana w wątku nasłuchu dla każdego powiadomienia."""
+        self._subskrypcje.setdefault(kanal, []).append(funkcja)
+
+    def przy_polaczeniu(self, funkcja):
+        """funkcja() jest wywoływana po każdym (ponownym) rozpoczęciu nasłuchu."""
+        self._przy_polaczeniu.append(funkcja)
+
+    def start(self):
+        if self._watek is not None and self._watek.is_alive():
+            return
+        self._stop.clear()
+        self._watek = threading.Thread(target=self._petla, name="nasluch-notify", daemon=True)
+        self._watek.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watek is not None:
+            self._watek.join(timeout=5)
+            self._watek = None
+        self._zdrowy.clear()
+
+    def statystyki(self) -> dict:
+        return {
+            "zdrowy": self.zdrowy,
+            "kanaly": sorted(self._subskrypcje),
+            "odebrane": self.odebrane,
+            "polaczenia": self.polaczenia,
+        }
+
+    # ---------- wątek ----------
+
+    def _polacz(self):
+        conn = psycopg2.connect(connect_timeout=POOL_CONFIG["connect_timeout"], **DATABASE_CONFIG)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            for kanal in self._subskrypcje:
+                cur.execute(f"LISTEN {kanal}")
+        return conn
+
+    def _petla(self):
+        przerwa = 1
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._polacz()
+                self.polaczenia += 1
+                # najpierw LISTEN, potem wyczyszczenie - nic nie wpadnie w lukę między nimi
+                for funkcja in self._przy_polaczeniu:
+                    funkcja()
+                self._zdrowy.set()
+                przerwa = 1
+                self._nasluchuj(conn)
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"⚠️ Nasłuch powiadomień przerwany: {e}. Ponowna próba za {przerwa} s")
+            finally:
+                self._zdrowy.clear()
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop.wait(przerwa)
+            przerwa = min(przerwa * 2, MAX_PRZERWA)
+
+    def _nasluchuj(self, conn):
+        ostatni_ruch = time.monotonic()
+        while not self._stop.is_set():
+            gotowe, _, _ = select.select([conn], [], [], 1.0)
+            if not gotowe:
+                if time.monotonic() - ostatni_ruch > SPRAWDZENIE_CO:
+                    # zerwane połączenie TCP nie zawsze daje znać samo - sprawdzamy
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                    ostatni_ruch = time.monotonic()
+                continue
+
+            conn.poll()
+            ostatni_ruch = time.monotonic()
+            while conn.notifies:
+                powiadomienie = conn.notifies.pop(0)
+                self.odebrane += 1
+                for funkcja in self._subskrypcje.get(powiadomienie.channel, ()):
+                    try:
+                        funkcja(powiadomienie.payload)
+                    except Exception as e:
+                        print(f"⚠️ Błąd obsługi powiadomienia {powiadomienie.channel}: {e}")
+
+
+nasluch = NasluchZmian()
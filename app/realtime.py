@@ -0,0 +1,185 @@
+"""
+Rozsyłanie zdarzeń na żywo do otwartych połączeń:
+  - postęp wyzwań do WebSocketów (/ws/wyzwania/{id}, app/routers/ws.py),
+  - zaproszenia do strumieni SSE (/events, app/routers/zdarzenia.py).
+
+Źródłem jest jedno połączenie LISTEN na worker (app/notify.py, kanały 'progres_wyzwan'
+i 'zdarzenia_uzytkownikow').
+Wątek nasłuchu tylko wrzuca zdarzenie do kolejek subskrybentów danego wyzwania
+(przez call_soon_threadsafe), a wysyłaniem zajmuje się osobne zadanie każdego połączenia.
+
+Kolejka połączenia jest ograniczona (WS_MAX_W_KOLEJCE). Klient, który nie nadąża
+z odbiorem, jest rozłączany zamiast spowalniać pozostałych - po ponownym połączeniu
+dociąga stan zwykłymi endpointami (historia ?since=...).
+"""
+import asyncio
+import json
+import os
+import threading
+
+from app.notify import nasluch
+
+WS_MAX_W_KOLEJCE = int(os.getenv("WS_MAX_W_KOLEJCE", "100"))
+SSE_MAX_W_KOLEJCE = int(os.getenv("SSE_MAX_W_KOLEJCE", "100"))
+
+
+class Subskrypcja:
+    """Kolejka zdarzeń jednego połączenia WebSocket. None w kolejce = koniec (klient za wolny)."""
+
+    def __init__(self, wyzwanie_id: int, loop: asyncio.AbstractEventLoop):
+        self.wyzwanie_id = wyzwanie_id
+        self.loop = loop
+        self.kolejka = asyncio.Queue(maxsize=WS_MAX_W_KOLEJCE)
+        self.przepelniona = False
+
+    def _wrzuc(self, wiadomosc: str):
+        # wywoływane w pętli zdarzeń połączenia
+        if self.przepelniona:
+            return
+        try:
+            self.kolejka.put_nowait(wiadomosc)
+        except asyncio.QueueFull:
+            self.przepelniona = True
+            while not self.kolejka.empty():
+                self.kolejka.get_nowait()
+            self.kolejka.put_nowait(None)
+
+
+class HubProgresu:
+    def __init__(self):
+        self._subskrypcje = {}
+        self._lock = threading.Lock()
+        self.rozeslane = 0
+        self.przepelnione = 0
+
+    def dodaj(self, wyzwanie_id: int) -> Subskrypcja:
+        sub = Subskrypcja(wyzwanie_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subskrypcje.setdefault(wyzwanie_id, set()).add(sub)
+        return sub
+
+    def usun(self, sub: Subskrypcja):
+        with self._lock:
+            subs = self._subskrypcje.get(sub.wyzwanie_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subskrypcje[sub.wyzwanie_id]
+        if sub.przepelniona:
+            self.przepelnione += 1
+
+    def rozeslij(self, payload: str):
+        """Obsługa powiadomienia 'progres_wyzwan' (wątek nasłuchu)."""
+        zdarzenie = json.loads(payload)
+        with self._lock:
+            subs = list(self._subskrypcje.get(zdarzenie["wyzwanie_id"], ()))
+        if not subs:
+            return
+        wiadomosc = json.dumps({"typ": "progres", **zdarzenie})
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._wrzuc, wiadomosc)
+            except RuntimeError:
+                pass  # pętla zamknięta - połączenie i tak zaraz zniknie
+        self.rozeslane += len(subs)
+
+    def statystyki(self) -> dict:
+        with self._lock:
+            return {
+                "wyzwania": len(self._subskrypcje),
+                "polaczenia": sum(len(s) for s in self._subskrypcje.values()),
+                "rozeslane": self.rozeslane,
+                "rozlaczone_przepelnione": self.przepelnione,
+            }
+
+
+class StrumienZdarzen:
+    """
+    Kolejka zdarzeń jednego strumienia SSE. Zdarzenia są też w dzienniku w bazie, więc
+    przy przepełnieniu albo przerwie w nasłuchu nie rozłączamy klienta: kolejka jest
+    opróżniana, a None każe strumieniowi doczytać zaległości z dziennika.
+    """
+
+    def __init__(self, uzytkownik_id: int, loop: asyncio.AbstractEventLoop):
+        self.uzytkownik_id = uzytkownik_id
+        self.loop = loop
+        self.kolejka = asyncio.Queue(maxsize=SSE_MAX_W_KOLEJCE)
+        self.doczytaj = False
+
+    def _wrzuc(self, zdarzenie: dict):
+        if self.doczytaj:
+            return  # i tak zostanie doczytane z dziennika
+        try:
+            self.kolejka.put_nowait(zdarzenie)
+        except asyncio.QueueFull:
+            self._zaleglosci()
+
+    def _zaleglosci(self):
+        if self.doczytaj:
+            return
+        self.doczytaj = True
+        while not self.kolejka.empty():
+            self.kolejka.get_nowait()
+        self.kolejka.put_nowait(None)
+
+
+class HubZdarzen:
+    def __init__(self):
+        self._strumienie = {}
+        self._lock = threading.Lock()
+        self.rozeslane = 0
+
+    def dodaj(self, uzytkownik_id: int) -> StrumienZdarzen:
+        strumien = StrumienZdarzen(uzytkownik_id, asyncio.get_running_loop())
+        with self._lock:
+            self._strumienie.setdefault(uzytkownik_id, set()).add(strumien)
+        return strumien
+
+    def usun(self, strumien: StrumienZdarzen):
+        with self._lock:
+            strumienie = self._strumienie.get(strumien.uzytkownik_id)
+            if strumienie is not None:
+                strumienie.discard(strumien)
+                if not strumienie:
+                    del self._strumienie[strumien.uzytkownik_id]
+
+    def _wszystkie(self, uzytkownik_id=None):
+        with self._lock:
+            if uzytkownik_id is not None:
+                return list(self._strumienie.get(uzytkownik_id, ()))
+            return [s for strumienie in self._strumienie.values() for s in strumienie]
+
+    def rozeslij(self, payload: str):
+        """Obsługa powiadomienia 'zdarzenia_uzytkownikow' (wątek nasłuchu)."""
+        zdarzenie = json.loads(payload)
+        strumienie = self._wszystkie(zdarzenie["uzytkownik_id"])
+        for strumien in strumienie:
+            try:
+                strumien.loop.call_soon_threadsafe(strumien._wrzuc, zdarzenie)
+            except RuntimeError:
+                pass
+        self.rozeslane += len(strumienie)
+
+    def po_polaczeniu(self):
+        """Powiadomienia z czasu przerwy w nasłuchu przepadły - wszystkie strumienie doczytują dziennik."""
+        for strumien in self._wszystkie():
+            try:
+                strumien.loop.call_soon_threadsafe(strumien._zaleglosci)
+            except RuntimeError:
+                pass
+
+    def statystyki(self) -> dict:
+        with self._lock:
+            return {
+                "uzytkownicy": len(self._strumienie),
+                "strumienie": sum(len(s) for s in self._strumienie.values()),
+                "rozeslane": self.rozeslane,
+            }
+
+
+hub = HubProgresu()
+nasluch.subskrybuj("progres_wyzwan", hub.rozeslij)
+
+hub_zdarzen = HubZdarzen()
+nasluch.subskrybuj("zdarzenia_uzytkownikow", hub_zdarzen.rozeslij)
+nasluch.przy_polaczeniu(hub_zdarzen.po_polaczeniu)
@@ -1,16 +1,53 @@
-from fastapi import APIRouter, Depends
-from app.auth.jwt import get_current_user_id
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app import schemas
+from app.auth.jwt import get_current_user, pobierz_role, AktualnyUzytkownik
 from app.database import get_db
 
 router = APIRouter(prefix="/home", tags=["home"])
 
-@router.get("/")
-def home(user_id: int = Depends(get_current_user_id), conn=Depends(get_db)):
-    """Szybkie info dla frontendu na start"""
-    return {
-        "message": f"Witaj, użytkowniku {user_id}!",
-        "status": "success",
-    }
+SEKCJE_PULPITU = (
+    "znajomi",
+    "pending_wyslane",
+    "pending_odebrane",
+    "wyzwania",
+    "wyzwania_zaproszenia_odebrane",
+    "wyzwania_zaproszenia_wyslane",
+    "statystyki",
+)
+
+
+@router.get("/", response_model=schemas.PulpitResponse)
+def home(
+        sections: Optional[str] = Query(None, description="Sekcje oddzielone przecinkami (domyślnie wszystkie)"),
+        user: AktualnyUzytkownik = Depends(get_current_user),
+        conn=Depends(get_db)
+):
+    """
+    Wszystkie dane strony głównej w jednej odpowiedzi: znajomi, zaproszenia do znajomych,
+    wyzwania, zaproszenia do wyzwań i statystyki. Jedno wywołanie fn_pulpit_json zamiast
+    siedmiu osobnych requestów.
+    """
+    sekcje = None
+    if sections:
+        sekcje = [s.strip() for s in sections.split(",") if s.strip()]
+        nieznane = [s for s in sekcje if s not in SEKCJE_PULPITU]
+        if nieznane:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nieznane sekcje: {', '.join(nieznane)}. Dostępne: {', '.join(SEKCJE_PULPITU)}"
+            )
+
+    with conn.cursor() as cur:
+        admin = pobierz_role(user.id, cur) == 'admin'
+        cur.execute("SELECT fn_pulpit_json(%s, %s, %s)", (user.id, admin, sekcje))
+        pulpit = cur.fetchone()[0]
+
+    return schemas.PulpitResponse(
+        message=f"Witaj, użytkowniku {user.id}!",
+        status="success",
+        **pulpit
+    )
 
 
 
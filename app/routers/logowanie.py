@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app import schemas
 from app.database import get_db
-import bcrypt
-from app.auth.jwt import create_access_token
+from app.auth.jwt import create_access_token, zapamietaj_role
+from app.core.security import sprawdz_haslo, hashuj_haslo, wymaga_przeliczenia
 router = APIRouter(
     prefix="/auth",
     tags=["auth"]
@@ -13,28 +14,55 @@ router = APIRouter(
 def read_root():
     return {"message": "Witaj w Logowaniu!"}
 
-@router.post("/logowanie", response_model=schemas.AuthResponse)
-def logowanie(uzytkownik: schemas.UzytkownikLogin, conn=Depends(get_db)):
+def _pobierz_dane_logowania(conn, nazwa_uzytkownika: str):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT id, nazwa_uzytkownika, email, hashed_haslo, rola FROM widok_dane_logowania WHERE nazwa_uzytkownika = %s",
+            (nazwa_uzytkownika,)
+        )
+        return cur.fetchone()
+
+
+def _zapisz_nowy_hash(conn, user_id: int, stary_hash: str, nowy_hash: str):
     with conn.cursor() as cur:
+        # warunek na stary hash: nie nadpisujemy hasła zmienionego w międzyczasie
         cur.execute(
-            "SELECT id, nazwa_uzytkownika, email, hashed_haslo FROM widok_dane_logowania WHERE nazwa_uzytkownika = %s",
-            (uzytkownik.nazwa_uzytkownika,)
+            "UPDATE uzytkownicy SET hashed_haslo = %s WHERE id = %s AND hashed_haslo = %s",
+            (nowy_hash, user_id, stary_hash)
         )
-        row = cur.fetchone()
+    conn.commit()
+
+
+@router.post("/logowanie", response_model=schemas.AuthResponse)
+async def logowanie(uzytkownik: schemas.UzytkownikLogin, conn=Depends(get_db)):
+    # zapytania psycopg2 są blokujące - w threadpoolu; bcrypt - w puli procesów (app/core/security.py)
+    row = await run_in_threadpool(_pobierz_dane_logowania, conn, uzytkownik.nazwa_uzytkownika)
 
     if not row:
         raise HTTPException(status_code=401, detail="Nieprawidłowa nazwa użytkownika lub hasło")
 
     try:
-        user_id, nazwa_uzytkownika, email, hashed_haslo = row
+        user_id, nazwa_uzytkownika, email, hashed_haslo, rola = row
     except Exception as e:
         print("Błąd przy rozpakowywaniu:", e)
         raise HTTPException(status_code=500, detail="Błąd serwera przy odczycie użytkownika")
 
-    if not bcrypt.checkpw(uzytkownik.haslo.encode("utf-8"), hashed_haslo.encode("utf-8")):
+    if not await sprawdz_haslo(uzytkownik.haslo, hashed_haslo):
         raise HTTPException(status_code=401, detail="Nieprawidłowe hasło")
 
-    access_token = create_access_token(data={"uzytkownik_id": user_id})
+    # Hash z innym kosztem niż BCRYPT_ROUNDS przeliczamy teraz, gdy znamy hasło.
+    # Przeciążenie puli nie blokuje logowania - spróbujemy przy następnym.
+    if wymaga_przeliczenia(hashed_haslo):
+        try:
+            nowy_hash = await hashuj_haslo(uzytkownik.haslo)
+        except HTTPException:
+            nowy_hash = None
+        if nowy_hash:
+            await run_in_threadpool(_zapisz_nowy_hash, conn, user_id, hashed_haslo, nowy_hash)
+
+    # rola w tokenie - endpointy nie muszą jej doczytywać z bazy
+    access_token = create_access_token(data={"uzytkownik_id": user_id, "rola": rola})
+    zapamietaj_role(user_id, rola)
 
     return schemas.AuthResponse(
         access_token=access_token,
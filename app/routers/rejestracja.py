@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app import schemas
 from app.database import get_db
-import bcrypt
 from app.auth.jwt import create_access_token
+from app.core.security import hashuj_haslo
 from psycopg2.errors import UniqueViolation, CheckViolation
 
 router = APIRouter(
@@ -14,12 +15,8 @@ router = APIRouter(
 def read_root():
     return {"message": "Witaj w Rejestracji!"}
 
-@router.post("/rejestracja", response_model=schemas.AuthResponse)
-def rejestracja(uzytkownik: schemas.UzytkownikCreate, conn=Depends(get_db)):
-    # Hashowanie hasła
-    password_bytes = uzytkownik.haslo.encode("utf-8")
-    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode("utf-8")
 
+def _zarejestruj(conn, uzytkownik: schemas.UzytkownikCreate, hashed: str) -> int:
     new_id = None
 
     try:
@@ -59,8 +56,20 @@ def rejestracja(uzytkownik: schemas.UzytkownikCreate, conn=Depends(get_db)):
         print(f"Błąd bazy: {e}")
         raise HTTPException(status_code=500, detail="Błąd serwera podczas rejestracji")
 
+    return new_id
+
+
+@router.post("/rejestracja", response_model=schemas.AuthResponse)
+async def rejestracja(uzytkownik: schemas.UzytkownikCreate, conn=Depends(get_db)):
+    # Hashowanie hasła (pula procesów, app/core/security.py)
+    hashed = await hashuj_haslo(uzytkownik.haslo)
+
+    # zapis blokującym psycopg2 - w threadpoolu
+    new_id = await run_in_threadpool(_zarejestruj, conn, uzytkownik, hashed)
+
     # 3. Generowanie tokena
-    access_token = create_access_token(data={"uzytkownik_id": new_id})
+    # nowe konto ma zawsze domyślną rolę
+    access_token = create_access_token(data={"uzytkownik_id": new_id, "rola": "user"})
 
     return schemas.AuthResponse(
         access_token=access_token,
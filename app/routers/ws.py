@@ -0,0 +1,91 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.auth.jwt import pobierz_role, uzytkownik_z_tokenu
+from app.database import get_pool, PoolTimeout
+from app.realtime import hub
+
+router = APIRouter(
+    prefix="/ws",
+    tags=["ws"]
+)
+
+# co ile sekund bez zdarzeń wysyłamy ping (proxy zamykają bezczynne połączenia)
+PING_CO = 25
+
+
+def _moze_obserwowac(wyzwanie_id: int, user_id: int) -> bool:
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            if pobierz_role(user_id, cur) == 'admin':
+                return True
+            cur.execute("""
+                        SELECT 1
+                        FROM uczestnicy_wyzwan uw
+                                 JOIN wyzwania w ON w.id = uw.wyzwanie_id
+                        WHERE uw.wyzwanie_id = %s AND uw.uzytkownik_id = %s AND uw.zaakceptowane
+                        """, (wyzwanie_id, user_id))
+            return cur.fetchone() is not None
+    finally:
+        pool.putconn(conn)
+
+
+async def _wysylaj(websocket: WebSocket, sub):
+    while True:
+        try:
+            wiadomosc = await asyncio.wait_for(sub.kolejka.get(), timeout=PING_CO)
+        except asyncio.TimeoutError:
+            await websocket.send_json({"typ": "ping"})
+            continue
+        if wiadomosc is None:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Klient nie nadąża z odbiorem")
+            return
+        await websocket.send_text(wiadomosc)
+
+
+async def _odbieraj(websocket: WebSocket):
+    # klient nic nie wysyła - czytamy tylko, żeby zauważyć rozłączenie
+    while True:
+        await websocket.receive_text()
+
+
+@router.websocket("/wyzwania/{wyzwanie_id}")
+async def ws_wyzwanie(websocket: WebSocket, wyzwanie_id: int, token: str = Query(...)):
+    """
+    Postęp uczestników wyzwania na żywo. Przeglądarka nie ustawi nagłówka Authorization
+    dla WebSocketu, dlatego token JWT jest w parametrze ?token=.
+    Zdarzenia: {"typ": "progres", ...} (patrz 0009_powiadomienia_progresu.sql) i {"typ": "ping"}.
+    """
+    # Najpierw accept: close() przed nim Starlette zamienia na odrzucenie handshake'u (HTTP 403),
+    # a przeglądarka widzi wtedy 1006 zamiast naszego kodu i ponawia połączenie bez końca.
+    await websocket.accept()
+    try:
+        user = await run_in_threadpool(uzytkownik_z_tokenu, token)
+        dozwolone = await run_in_threadpool(_moze_obserwowac, wyzwanie_id, user.id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Nieprawidłowy lub wygasły token")
+        return
+    except PoolTimeout:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Serwer jest przeciążony")
+        return
+    if not dozwolone:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Brak dostępu do wyzwania")
+        return
+
+    sub = hub.dodaj(wyzwanie_id)
+    zadania = [asyncio.create_task(_wysylaj(websocket, sub)), asyncio.create_task(_odbieraj(websocket))]
+    try:
+        await websocket.send_json({"typ": "subskrypcja", "wyzwanie_id": wyzwanie_id})
+        await asyncio.wait(zadania, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.usun(sub)
+        for zadanie in zadania:
+            zadanie.cancel()
+        # wyjątki zadań (np. rozłączenie w trakcie wysyłania) nie są już istotne
+        await asyncio.gather(*zadania, return_exceptions=True)
@@ -1,65 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from app import schemas
 from app.database import get_db
-from app.auth.jwt import get_current_user_id
-from typing import List
+from app.auth.jwt import get_current_user_id, get_current_user, pobierz_role, AktualnyUzytkownik
+from app.cache import LRUCache
+from app.core.odpowiedzi import odpowiedz_json, koperta_json
+from app.notify import nasluch
+from app.czyszczenie import czyszczenie
+from typing import List, Literal, Optional
 from psycopg2.extras import RealDictCursor
-from datetime import date
+from datetime import date, datetime
+import csv
+import io
+import os
+import zlib
+import orjson
 router = APIRouter(
     prefix="/wyzwania",
     tags=["wyzwania"]
 )
 
 
+MAX_LIMIT_WYZWAN = 500
+# rozmiar strony, gdy klient podał tylko after_id
+DOMYSLNY_LIMIT_WYZWAN = 100
+
+# Zserializowane odpowiedzi GET /{wyzwanie_id}: wyzwanie_id -> (wersja, bajty JSON).
+# Wyzwalacze (0008_powiadomienia_o_zmianach.sql) wysyłają NOTIFY 'zmiany_wyzwan' z id wyzwania,
+# więc każdy worker usuwa dokładnie zmienione wpisy.
+_cache_wyzwan = LRUCache(
+    max_wpisow=int(os.getenv("WYZWANIA_CACHE_MAX_WPISOW", "1000")),
+    max_bajtow=int(os.getenv("WYZWANIA_CACHE_MAX_MB", "32")) * 1024 * 1024,
+)
+nasluch.subskrybuj("zmiany_wyzwan", lambda payload: _cache_wyzwan.uniewaznij(int(payload)))
+# powiadomienia z czasu rozłączenia przepadły - zaczynamy od pustego cache
+nasluch.przy_polaczeniu(_cache_wyzwan.clear)
+
+# Wspólny SELECT listy wyzwań. Zakończone = czasowe z datą końca w przeszłości
+# (te same reguły co w funkcjach historii).
+_SQL_LISTA_WYZWAN = """
+    SELECT w.id, w.nazwa, w.opis, w.czasowe, w.data_start, w.data_koniec, w.autor_id
+    FROM wyzwania w
+    WHERE (%(wszystkie)s
+        OR w.autor_id = %(user_id)s
+        OR EXISTS (SELECT 1 FROM uczestnicy_wyzwan uw
+                   WHERE uw.wyzwanie_id = w.id
+                     AND uw.uzytkownik_id = %(user_id)s
+                     AND uw.zaakceptowane))
+      AND (%(after_id)s::int IS NULL OR w.id < %(after_id)s)
+      AND (%(stan)s::text IS NULL
+        OR (%(stan)s = 'zakonczone') = COALESCE(w.czasowe AND w.data_koniec < NOW(), FALSE))
+    ORDER BY w.id DESC
+"""
+
+# To samo dla wyzwań przeniesionych do archiwum (?stan=archiwalne)
+_SQL_LISTA_WYZWAN_ARCHIWUM = """
+    SELECT w.id, w.nazwa, w.opis, w.czasowe, w.data_start, w.data_koniec, w.autor_id
+    FROM wyzwania_archiwum w
+    WHERE w.usunieto IS NULL
+      AND (%(wszystkie)s
+        OR w.autor_id = %(user_id)s
+        OR EXISTS (SELECT 1 FROM uczestnicy_wyzwan_archiwum uw
+                   WHERE uw.wyzwanie_id = w.id
+                     AND uw.uzytkownik_id = %(user_id)s
+                     AND uw.zaakceptowane))
+      AND (%(after_id)s::int IS NULL OR w.id < %(after_id)s)
+    ORDER BY w.id DESC
+"""
+
+
+_POLA_WYZWANIA = ("id", "nazwa", "opis", "czasowe", "data_start", "data_koniec", "autor_id")
+
+
+def _wyzwanie_out(w) -> dict:
+    """Wiersz _SQL_LISTA_WYZWAN jako słownik o kształcie schemas.WyzwanieOut."""
+    return dict(zip(_POLA_WYZWANIA, w))
+
+
 @router.get("/", response_model=schemas.WyzwaniaResponse)
-def get_wyzwania(user_id: int = Depends(get_current_user_id), conn=Depends(get_db)):
+def get_wyzwania(
+        after_id: Optional[int] = Query(None, description="Zwróć wyzwania o id mniejszym niż podane (następna strona)"),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT_WYZWAN,
+                                     description="Rozmiar strony (bez limit i after_id - wszystkie wyzwania)"),
+        stan: Optional[Literal["aktywne", "zakonczone", "archiwalne"]] = Query(
+            None, description="Filtr: aktywne / zakonczone / archiwalne (przeniesione do archiwum)"),
+        stream: bool = Query(False, description="Admin: wszystkie wyzwania jako strumień NDJSON"),
+        user: AktualnyUzytkownik = Depends(get_current_user),
+        conn=Depends(get_db)
+):
 
     """
-    Endpoint pobiera wszystkie wyzwania użytkownika:
-    Spełnia wymagania:
-    - 2a: wykorzystanie widoku w bazie (widok_moje_wyzwania)
+    Endpoint pobiera wyzwania użytkownika (autor lub zaakceptowany uczestnik), od najnowszych.
+    Stronicowanie jest opcjonalne: bez `limit` i `after_id` zwraca wszystkie wyzwania
+    (jak dotąd), z nimi - stronę po `limit` (domyślnie DOMYSLNY_LIMIT_WYZWAN), a kolejną
+    pobiera się z after_id=next_after_id.
+
+    Admin widzi wszystkie wyzwania; ze stream=true dostaje je w całości jako NDJSON
+    (jedno wyzwanie na linię) czytane kursorem po stronie serwera - pamięć nie rośnie
+    z liczbą wyzwań.
     """
 
     with conn.cursor() as cur:
-        cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
-        user_role = cur.fetchone()[0]
+        admin = pobierz_role(user.id, cur) == 'admin'
 
-        if user_role == 'admin':
-            # LOGIKA ADMINA: Pobierz wszystkie wyzwania z bazy
-            # Nie korzystamy z widoku 'widok_moje_wyzwania', bo on filtruje relacje.
-            # Bierzemy surowe dane z tabeli wyzwania.
-            cur.execute("""
-                        SELECT DISTINCT id, nazwa, opis, czasowe, data_start, data_koniec, autor_id
-                        FROM widok_moje_wyzwania
-                        ORDER BY id DESC
-                        """)
-        else:
-            cur.execute("""
-                        SELECT DISTINCT id, nazwa, opis, czasowe, data_start, data_koniec, autor_id
-                        FROM widok_moje_wyzwania
-                        WHERE autor_id = %s OR (uczestnik_id = %s AND zaakceptowane = TRUE)
-                        """, (user_id, user_id))
+    params = {
+        "wszystkie": admin,
+        "user_id": user.id,
+        "after_id": after_id,
+        "stan": stan,
+    }
+    sql = _SQL_LISTA_WYZWAN_ARCHIWUM if stan == "archiwalne" else _SQL_LISTA_WYZWAN
+
+    if stream:
+        if not admin:
+            raise HTTPException(status_code=403, detail="Strumień wszystkich wyzwań jest dostępny tylko dla administratora")
+
+        def generuj():
+            # Nazwany kursor = kursor po stronie serwera, pobierany paczkami po itersize
+            with conn.cursor(name="eksport_wyzwan") as named_cur:
+                named_cur.itersize = 1000
+                named_cur.execute(sql, params)
+                for w in named_cur:
+                    yield orjson.dumps(_wyzwanie_out(w)) + b"\n"
+
+        return StreamingResponse(generuj(), media_type="application/x-ndjson")
+
+    if limit is None and after_id is not None:
+        limit = DOMYSLNY_LIMIT_WYZWAN
 
+    with conn.cursor() as cur:
+        # limit + 1: dodatkowy wiersz mówi, czy istnieje następna strona (NULL = bez limitu)
+        cur.execute(sql + " LIMIT %(limit)s", dict(params, limit=limit + 1 if limit else None))
         rows = cur.fetchall()
 
-        wyzwania_list: List[schemas.WyzwanieOut] = [
-            schemas.WyzwanieOut(
-                id=w[0],
-                nazwa=w[1],
-                opis=w[2],
-                czasowe=w[3],
-                data_start=w[4],
-                data_koniec=w[5],
-                autor_id=w[6]
-            )
-            for w in rows
-        ]
+    next_after_id = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_after_id = rows[-1][0]
 
-    return schemas.WyzwaniaResponse(
-        message="Wszystkie wyzwania użytkownika",
-        status="success",
-        data=wyzwania_list
-    )
+    return odpowiedz_json({
+        "message": "Wszystkie wyzwania użytkownika",
+        "status": "success",
+        "data": [_wyzwanie_out(w) for w in rows],
+        "next_after_id": next_after_id,
+    })
 
 
 @router.post("/dodaj", response_model=schemas.WyzwanieCreateResponse)
@@ -78,72 +162,39 @@ def create_wyzwanie(
 
     print("DEBUG: Uczestnicy IDs:", wyzwanie_data.uczestnicy_ids)
     with conn.cursor() as cur:
+        # Całe wyzwanie (uczestnicy, zadania dzienne, podzadania) tworzy jedna funkcja w bazie,
+        # która zwraca wygenerowane id w kolejności z żądania - jedno zapytanie zamiast N.
+        cur.execute(
+            "SELECT fn_utworz_wyzwanie(%s, %s::json)",
+            (user_id, wyzwanie_data.model_dump_json())
+        )
+        wynik = cur.fetchone()[0]
+        conn.commit()
 
-        # 1. Tworzymy wyzwanie
-        cur.execute("""
-                    INSERT INTO wyzwania (nazwa, opis, czasowe, data_start, data_koniec, autor_id)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    """, (
-                        wyzwanie_data.nazwa,
-                        wyzwanie_data.opis,
-                        wyzwanie_data.czasowe,
-                        wyzwanie_data.data_start,
-                        wyzwanie_data.data_koniec,
-                        user_id
-                    ))
-        wyzwanie_id = cur.fetchone()[0]
-
-        # 3. Znajomi jako uczestnicy
-        for uid in wyzwanie_data.uczestnicy_ids:
-            cur.execute("""
-                        INSERT INTO uczestnicy_wyzwan (wyzwanie_id, uzytkownik_id, zaakceptowane)
-                        VALUES (%s, %s, %s)
-                        """, (wyzwanie_id, uid, False))
+    wyzwanie_id = wynik["id"]
 
-        # 4. Zadania dzienne i podzadania
-        zadania_list = []
-        for zadanie in wyzwanie_data.zadania_dzienne:
-            cur.execute("""
-                        INSERT INTO zadania_dzienne (wyzwanie_id, nazwa, opis)
-                        VALUES (%s, %s, %s)
-                        RETURNING id
-                        """, (wyzwanie_id, zadanie.nazwa, zadanie.opis))
-            zadanie_id = cur.fetchone()[0]
-
-            podzadania_list = [
+    zadania_list = [
+        schemas.ZadanieDzienneOut(
+            id=zadanie_ids["id"],
+            nazwa=zadanie.nazwa,
+            opis=zadanie.opis,
+            podzadania=[
                 schemas.PodzadanieOut(
-                    id=cur.execute("""
-                                   INSERT INTO podzadania (zadanie_id, nazwa, wymagane, waga)
-                                   VALUES (%s, %s, %s, %s)
-                                   RETURNING id
-                                   """, (zadanie_id, p.nazwa, p.wymagane, p.waga)) or cur.fetchone()[0],
+                    id=podzadanie_id,
                     nazwa=p.nazwa,
                     waga=p.waga,
                     wymagane=p.wymagane
                 )
-                for p in zadanie.podzadania
+                for podzadanie_id, p in zip(zadanie_ids["podzadania"], zadanie.podzadania)
             ]
-            zadania_list.append(
-                schemas.ZadanieDzienneOut(
-                    id=zadanie_id,
-                    nazwa=zadanie.nazwa,
-                    opis=zadanie.opis,
-                    podzadania=podzadania_list
-                )
-            )
+        )
+        for zadanie_ids, zadanie in zip(wynik["zadania_dzienne"], wyzwanie_data.zadania_dzienne)
+    ]
 
-        # 5. Pobieramy wszystkich uczestników (autor + znajomi)
-        cur.execute("""
-                    SELECT uzytkownik_id, nazwa_uzytkownika, zaakceptowane 
-                    FROM widok_uczestnicy_wyzwania 
-                    WHERE wyzwanie_id = %s
-                    """, (wyzwanie_id,))
-        uczestnicy_list = [
-            schemas.UczestnikWyzwaniaOut(id=row[0], nazwa_uzytkownika=row[1], zaakceptowane=row[2])
-            for row in cur.fetchall()
-        ]
-        conn.commit()
+    uczestnicy_list = [
+        schemas.UczestnikWyzwaniaOut(**uczestnik)
+        for uczestnik in wynik["uczestnicy"]
+    ]
 
     return schemas.WyzwanieCreateResponse(
         id=wyzwanie_id,
@@ -166,43 +217,34 @@ def get_zaproszenia(
     """Pobiera zaproszenia do wyzwań otrzymane przez użytkownika.
     Wymagania spełnione: 2a (widok)
    """
-    with conn.cursor() as cur:
+    # kolumny nazwane jak pola OdebraneZaproszenieWyzwanieOut - wiersze idą prosto do JSON-a
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("""
                     SELECT
                         uczestnictwo_id,
                         wyzwanie_id,
-                        wyzwanie_nazwa,
-                        wyzwanie_opis,
+                        wyzwanie_nazwa AS nazwa,
+                        wyzwanie_opis AS opis,
                         autor_id,
                         autor_nazwa
                     FROM widok_odebrane_zaproszenia_wyzwania
                     WHERE odbiorca_id = %s
                     """, (user_id,))
+        results = cur.fetchall()
 
-        results = [
-            schemas.OdebraneZaproszenieWyzwanieOut(
-                uczestnictwo_id=row[0],
-                wyzwanie_id=row[1],
-                nazwa=row[2],
-                opis=row[3],
-                autor_id=row[4],
-                autor_nazwa=row[5]
-            )
-            for row in cur.fetchall()
-        ]
-
-    return schemas.OdebraneZaproszeniaWyzwaniaResponse(
-        message="Odebrane zaproszenia do wyzwań",
-        status="success",
-        data=results
-    )
+    return odpowiedz_json({
+        "message": "Odebrane zaproszenia do wyzwań",
+        "status": "success",
+        "data": results,
+    })
 
 @router.get("/zaproszenia/wyslane", response_model=schemas.WyslaneZaproszeniaWyzwaniaResponse)
 def get_zaproszenia_wyslane(
         user_id: int = Depends(get_current_user_id),
         conn=Depends(get_db)
 ):
-    with conn.cursor() as cur:
+    # kolumny nazwane jak pola WyslaneZaproszenieWyzwanieOut
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("""
                     SELECT
                         uczestnictwo_id,
@@ -213,25 +255,13 @@ def get_zaproszenia_wyslane(
                     FROM widok_wyslane_zaproszenia_wyzwania
                     WHERE autor_id = %s
                     """, (user_id,))
+        zaproszenia = cur.fetchall()
 
-        rows = cur.fetchall()
-
-        # Konwersja każdego wiersza na instancję Pydantic
-        zaproszenia = [
-            schemas.WyslaneZaproszenieWyzwanieOut(
-                uczestnictwo_id=row[0],
-                wyzwanie_id=row[1],
-                wyzwanie_nazwa=row[2],
-                odbiorca_id=row[3],
-                odbiorca_nazwa=row[4]
-            )
-            for row in rows
-        ]
-    return schemas.WyslaneZaproszeniaWyzwaniaResponse(
-        message="Wysłane zaproszenia oczekujące na odpowiedź",
-        status="success",
-        data=zaproszenia
-    )
+    return odpowiedz_json({
+        "message": "Wysłane zaproszenia oczekujące na odpowiedź",
+        "status": "success",
+        "data": zaproszenia,
+    })
 
 
 @router.post("/zaproszenia/{uczestnictwo_id}/akceptuj", response_model=schemas.AkceptacjaZaproszeniaResponse)
@@ -295,30 +325,334 @@ def odrzuc_zaproszenie(
         message="Zaproszenie odrzucone"
     )
 
+def _etag_wyzwania(wyzwanie_id: int, wersja) -> str:
+    return f'"{wyzwanie_id}.{wersja}"'
+
+
+def _pasuje_do_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match porównuje słabo: W/"x" pasuje do "x"
+    tagi = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tagi or etag in tagi
+
+
+_SQL_SERIE = """
+    SELECT uczestnik_id, uzytkownik_id, zadanie_id, biezaca, najdluzsza, ostatni_dzien
+    FROM fn_serie_wyzwania(%s, %s)
+"""
+
+
 @router.get("/{wyzwanie_id}", response_model=schemas.WyzwanieResponse)
-def get_wyzwanie(wyzwanie_id: int, conn=Depends(get_db)):
+def get_wyzwanie(
+        wyzwanie_id: int,
+        request: Request,
+        serie: bool = Query(False, description="Dołącz serie uczestników (per zadanie i całego wyzwania)"),
+        conn=Depends(get_db)
+):
     """
     Zwraca pełne dane wyzwania w formacie JSON, łącznie z uczestnikami, zadaniami dziennymi i podzadaniami.
     6c (funkcja wbudowana w PL/pgSQL)
     6b – wykorzystanie funkcji agregujących, relacji 1-n i n-m, kontrola spójności danych poprzez klucze obce
+
+    ETag = wersja wyzwania (wyzwania_wersje, podbijana wyzwalaczami). Jeśli klient przyśle
+    aktualny tag w If-None-Match, dostaje 304 po samym odczycie wersji - bez budowania JSON-a.
+
+    Gotowa odpowiedź jest trzymana w _cache_wyzwan (bez zapytań do bazy), dopóki działa
+    nasłuch 'zmiany_wyzwan' - bez niego nie wiedzielibyśmy o zmianach z innych workerów.
+    JSON z fn_get_wyzwanie_json trafia do odpowiedzi bez parsowania i walidacji (app/core/odpowiedzi.py).
+    Wyzwanie przeniesione do archiwum (0012_archiwum_wyzwan.sql) czyta ta sama funkcja
+    (widoki *_z_archiwum, 0018) - nie ma wersji, więc bez ETag i cache.
+
+    serie=true dokłada serie uczestników (0014_serie_zadan.sql). Zmieniają się z każdym zapisem
+    progresu, więc taka odpowiedź omija cache i ETag.
     """
+    if serie:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("""
+                        SELECT fn_get_wyzwanie_json(%s)::text AS wyzwanie
+                        """, (wyzwanie_id,))
+            wyzwanie = cur.fetchone()["wyzwanie"]
+            if wyzwanie is None:
+                return schemas.WyzwanieResponse(status="error", message="Wyzwanie nie istnieje")
+            cur.execute(_SQL_SERIE, (wyzwanie_id, None))
+            wiersze_serii = cur.fetchall()
+        return Response(content=koperta_json(wyzwanie, serie=wiersze_serii), media_type="application/json",
+                        headers={"Cache-Control": "private, no-cache"})
+
+    if_none_match = request.headers.get("if-none-match")
+    uzyj_cache = nasluch.zdrowy
+
+    if uzyj_cache:
+        wpis = _cache_wyzwan.get(wyzwanie_id)
+        if wpis is not None:
+            wersja, tresc = wpis
+            etag = _etag_wyzwania(wyzwanie_id, wersja)
+            naglowki = {"ETag": etag, "Cache-Control": "private, no-cache"}
+            if _pasuje_do_etag(if_none_match, etag):
+                return Response(status_code=304, headers=naglowki)
+            return Response(content=tresc, media_type="application/json", headers=naglowki)
+        # pobrany przed odczytem - zmiana w trakcie zapytania nie zostanie zapisana w cache
+        znacznik = _cache_wyzwan.znacznik()
 
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        # Wywołanie funkcji SQL
-        cur.execute("SELECT fn_get_wyzwanie_json(%s) AS wyzwanie", (wyzwanie_id,))
+        if if_none_match:
+            cur.execute("SELECT wersja FROM wyzwania_wersje WHERE wyzwanie_id = %s", (wyzwanie_id,))
+            row = cur.fetchone()
+            if row:
+                etag = _etag_wyzwania(wyzwanie_id, row["wersja"])
+                if _pasuje_do_etag(if_none_match, etag):
+                    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+        # Wersja czytana przed JSON-em: przy równoległej zmianie JSON może być nowszy
+        # od tagu (klient pobierze go ponownie), ale nigdy starszy.
+        # ::text - psycopg2 nie parsuje JSON-a, trafia on do odpowiedzi jako gotowe bajty
+        cur.execute("""
+                    SELECT (SELECT wersja FROM wyzwania_wersje WHERE wyzwanie_id = %s) AS wersja,
+                           fn_get_wyzwanie_json(%s)::text AS wyzwanie
+                    """, (wyzwanie_id, wyzwanie_id))
         result = cur.fetchone()
 
-        if not result or result["wyzwanie"] is None:
-            return schemas.WyzwanieResponse(status="error", message="Wyzwanie nie istnieje")
+    if not result or result["wyzwanie"] is None:
+        return schemas.WyzwanieResponse(status="error", message="Wyzwanie nie istnieje")
+
+    tresc = koperta_json(result["wyzwanie"])
+    if result["wersja"] is None:
+        return Response(content=tresc, media_type="application/json")
+
+    naglowki = {"ETag": _etag_wyzwania(wyzwanie_id, result["wersja"]), "Cache-Control": "private, no-cache"}
+    if uzyj_cache:
+        _cache_wyzwan.set(wyzwanie_id, (result["wersja"], tresc), len(tresc), znacznik)
+    return Response(content=tresc, media_type="application/json", headers=naglowki)
+
+
+@router.get("/cache/statystyki")
+def get_statystyki_cache(user: AktualnyUzytkownik = Depends(get_current_user)):
+    """Liczniki cache szczegółów wyzwań tego workera (do doboru WYZWANIA_CACHE_*). Tylko admin."""
+    if pobierz_role(user.id) != 'admin':
+        raise HTTPException(status_code=403, detail="Brak uprawnień administratora")
+    return {
+        "status": "success",
+        "cache": _cache_wyzwan.statystyki(),
+        "nasluch": nasluch.statystyki(),
+    }
+
+@router.get("/{wyzwanie_id}/progres", response_model=schemas.ProgresWyzwaniaResponse)
+def get_progres_wyzwania(
+        wyzwanie_id: int,
+        data: Optional[date] = Query(None, description="Dzień (domyślnie dzisiaj)"),
+        conn=Depends(get_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Zwraca stan wszystkich zadań dziennych i podzadań wyzwania dla zalogowanego użytkownika
+    w danym dniu (wraz z procentem wykonania każdego zadania) - jedno zapytanie zamiast N.
+    Do tego bieżąca i najdłuższa seria każdego zadania i całego wyzwania (serie_zadan).
+    6c – funkcja wbudowana w PL/pgSQL
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT COALESCE(%s, CURRENT_DATE), fn_get_progres_wyzwania(%s, %s, COALESCE(%s, CURRENT_DATE))",
+            (data, wyzwanie_id, user.id, data)
+        )
+        dzien, wynik = cur.fetchone()
+
+        if wynik is None:
+            if pobierz_role(user.id, cur) != 'admin':
+                raise HTTPException(
+                    status_code=400,
+                    detail="Użytkownik nie jest uczestnikiem tego wyzwania"
+                )
+
+            # Admin widzi wyzwanie, ale w nim nie uczestniczy.
+            return schemas.ProgresWyzwaniaResponse(
+                status="admin_readonly",
+                wyzwanie_id=wyzwanie_id,
+                data=dzien,
+                message="Jesteś administratorem - to tylko podgląd."
+            )
+
+        # serie uczestnika: per zadanie i (zadanie_id = NULL) całego wyzwania
+        cur.execute(_SQL_SERIE, (wyzwanie_id, wynik["uczestnik_id"]))
+        serie = {r[2]: {"biezaca": r[3], "najdluzsza": r[4], "ostatni_dzien": r[5]} for r in cur.fetchall()}
+
+    for zadanie in wynik["zadania"]:
+        zadanie["seria"] = serie.get(zadanie["zadanie_id"])
+
+    return schemas.ProgresWyzwaniaResponse(
+        status="success",
+        wyzwanie_id=wyzwanie_id,
+        data=dzien,
+        zadania=wynik["zadania"],
+        seria=serie.get(None)
+    )
+
+
+MAX_BATCH_PROGRES = 500
+
+
+@router.post("/progres/batch", response_model=schemas.ProgresBatchResponse)
+def update_progres_batch(
+        items: List[schemas.ProgresBatchItem] = Body(...),
+        conn=Depends(get_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Zapisuje wiele zmian postępu (podzadania i zadania dzienne) w jednej transakcji:
+    jedno zapytanie sprawdzające uczestnictwo, jeden wielowierszowy upsert na tabelę, jeden commit.
+    Zwraca wynik dla każdej pozycji w kolejności z żądania.
+    """
+    if len(items) > MAX_BATCH_PROGRES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksymalnie {MAX_BATCH_PROGRES} pozycji w jednym żądaniu"
+        )
+
+    podzadania_ids = sorted({i.id for i in items if i.kind == "podzadanie"})
+    zadania_ids = sorted({i.id for i in items if i.kind == "zadanie"})
+
+    with conn.cursor() as cur:
+        # 1. Uczestnictwo dla wszystkich pozycji naraz (+ dzisiejsza data wg bazy)
+        #    i zakres dni, w których wolno zapisać progres: nie w przyszłości, a dla wyzwań
+        #    czasowych tylko od data_start do data_koniec (jak okno historii wykresu)
+        cur.execute("""
+                    SELECT CURRENT_DATE, m.kind, m.id, m.uczestnik_id,
+                           CASE WHEN w.czasowe THEN w.data_start::date END,
+                           LEAST(CURRENT_DATE, CASE WHEN w.czasowe THEN w.data_koniec::date END)
+                    FROM (SELECT 1) AS jeden
+                             LEFT JOIN (
+                        SELECT 'podzadanie' AS kind, podzadanie_id AS id, uczestnik_id, wyzwanie_id
+                        FROM widok_uczestnik_podzadania
+                        WHERE uzytkownik_id = %s AND podzadanie_id = ANY(%s)
+                        UNION ALL
+                        SELECT 'zadanie', zadanie_id, uczestnik_id, wyzwanie_id
+                        FROM widok_uczestnik_zadanie_dzienne
+                        WHERE uzytkownik_id = %s AND zadanie_id = ANY(%s)
+                    ) m ON TRUE
+                             LEFT JOIN wyzwania w ON w.id = m.wyzwanie_id
+                    """, (user.id, podzadania_ids, user.id, zadania_ids))
+        rows = cur.fetchall()
+
+        dzisiaj = rows[0][0]
+        uczestnictwo = {(kind, id_): (uczestnik_id, od, do)
+                        for _, kind, id_, uczestnik_id, od, do in rows if kind}
+
+        # 2. Przygotowanie wierszy (przy powtórzeniach tego samego dnia wygrywa ostatnia pozycja,
+        #    bo ON CONFLICT nie może zmienić jednego wiersza dwa razy w jednym poleceniu)
+        do_zapisu = {"podzadanie": {}, "zadanie": {}}
+        wyniki = []
+        for item in items:
+            dzien = item.data or dzisiaj
+            uczestnik_id, od, do = uczestnictwo.get((item.kind, item.id), (None, None, None))
+
+            if uczestnik_id is None:
+                if pobierz_role(user.id, cur) == 'admin':
+                    wyniki.append(schemas.ProgresBatchItemResult(
+                        kind=item.kind, id=item.id, data=dzien, wykonane=False,
+                        status="admin_readonly",
+                        message="Jesteś administratorem - to tylko podgląd."
+                    ))
+                else:
+                    wyniki.append(schemas.ProgresBatchItemResult(
+                        kind=item.kind, id=item.id, data=dzien, wykonane=False,
+                        status="error",
+                        message="Użytkownik nie jest uczestnikiem tego wyzwania"
+                    ))
+                continue
+
+            if dzien > do or (od is not None and dzien < od):
+                wyniki.append(schemas.ProgresBatchItemResult(
+                    kind=item.kind, id=item.id, data=dzien, wykonane=False,
+                    status="error",
+                    message="Data poza okresem trwania wyzwania"
+                ))
+                continue
+
+            do_zapisu[item.kind][(uczestnik_id, item.id, dzien)] = item.wykonane
+            wyniki.append(schemas.ProgresBatchItemResult(
+                kind=item.kind, id=item.id, data=dzien, wykonane=item.wykonane, status="success"
+            ))
+
+        # 3. Jeden upsert na tabelę. Klucze posortowane - wyzwalacze agregatu blokują pary
+        # (uczestnik, zadanie), więc równoległe paczki biorą blokady w tej samej kolejności.
+        if do_zapisu["podzadanie"]:
+            klucze, wartosci = zip(*sorted(do_zapisu["podzadanie"].items()))
+            uczestnicy, ids, dni = (list(k) for k in zip(*klucze))
+            cur.execute("""
+                        INSERT INTO progres_podzadania (uczestnik_id, podzadanie_id, data, wykonane)
+                        SELECT * FROM unnest(%s::int[], %s::int[], %s::date[], %s::boolean[])
+                        ON CONFLICT (uczestnik_id, podzadanie_id, data)
+                            DO UPDATE SET wykonane = EXCLUDED.wykonane
+                        """, (uczestnicy, ids, dni, list(wartosci)))
+
+        if do_zapisu["zadanie"]:
+            klucze, wartosci = zip(*sorted(do_zapisu["zadanie"].items()))
+            uczestnicy, ids, dni = (list(k) for k in zip(*klucze))
+            cur.execute("""
+                        INSERT INTO progres_dzienne (uczestnik_id, zadanie_id, data, wykonane)
+                        SELECT * FROM unnest(%s::int[], %s::int[], %s::date[], %s::boolean[])
+                        ON CONFLICT (uczestnik_id, zadanie_id, data)
+                            DO UPDATE SET wykonane = EXCLUDED.wykonane
+                        """, (uczestnicy, ids, dni, list(wartosci)))
+
+        conn.commit()
+
+    return schemas.ProgresBatchResponse(
+        status="success" if all(w.status == "success" for w in wyniki) else "partial",
+        wyniki=wyniki
+    )
+
+
+MAX_LIMIT_RANKINGU = 1000
+
+
+@router.get("/{wyzwanie_id}/ranking", response_model=schemas.RankingWyzwaniaResponse)
+def get_ranking_wyzwania(
+        wyzwanie_id: int,
+        limit: int = Query(50, ge=1, le=MAX_LIMIT_RANKINGU, description="Liczba pierwszych miejsc"),
+        user: AktualnyUzytkownik = Depends(get_current_user),
+        conn=Depends(get_db)
+):
+    """
+    Ranking zaakceptowanych uczestników: suma procentów wykonania zadań (ważonych wagami podzadań)
+    i liczba w pełni ukończonych dni. Pierwsze `limit` miejsc oraz moja_pozycja zalogowanego
+    użytkownika, nawet jeśli jest dalej. Remisy: mniejsze uczestnik_id wyżej.
+
+    Czytane z klasyfikacja_wyzwan, utrzymywanej wyzwalaczami przy zapisie progresu
+    (0013_klasyfikacja_wyzwan.sql) - koszt odczytu zależy od liczby uczestników, nie od historii.
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+                    SELECT pozycja, uczestnik_id, uzytkownik_id, nazwa_uzytkownika,
+                           suma_procent, dni_ukonczone, liczba_uczestnikow
+                    FROM fn_ranking_wyzwania(%s, %s, %s)
+                    """, (wyzwanie_id, limit, user.id))
+        wiersze = cur.fetchall()
+
+    if not wiersze:
+        return odpowiedz_json({"status": "error", "wyzwanie_id": wyzwanie_id,
+                               "message": "Wyzwanie nie istnieje lub nie ma uczestników"})
+
+    liczba_uczestnikow = wiersze[0].pop("liczba_uczestnikow")
+    for w in wiersze[1:]:
+        del w["liczba_uczestnikow"]
+
+    return odpowiedz_json({
+        "status": "success",
+        "wyzwanie_id": wyzwanie_id,
+        "liczba_uczestnikow": liczba_uczestnikow,
+        "ranking": [w for w in wiersze if w["pozycja"] <= limit],
+        "moja_pozycja": next((w for w in wiersze if w["uzytkownik_id"] == user.id), None),
+        "message": None,
+    })
 
-        return schemas.WyzwanieResponse(status="success", data=result["wyzwanie"])
 
 @router.post("/progres/podzadania/{podzadanie_id}", response_model=schemas.UpdateProgresResponse)
 def update_progres(
         podzadanie_id: int,
         wykonane: bool,
         conn=Depends(get_db),
-        user_id: int = Depends(get_current_user_id)
+        user: AktualnyUzytkownik = Depends(get_current_user)
 ):
     """
     Aktualizuje lub dodaje wpis o postępie użytkownika dla konkretnego podzadania
@@ -326,7 +660,7 @@ def update_progres(
     :param podzadanie_id:
     :param wykonane:
     :param conn:
-    :param user_id:
+    :param user:
     :return:
     """
     with conn.cursor() as cur:
@@ -336,15 +670,11 @@ def update_progres(
                     SELECT uczestnik_id
                     FROM widok_uczestnik_podzadania
                     WHERE podzadanie_id = %s AND uzytkownik_id = %s
-                    """, (podzadanie_id, user_id))
+                    """, (podzadanie_id, user.id))
 
         row = cur.fetchone()
         if not row:
-            cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
-            role_row = cur.fetchone()
-            user_role = role_row[0] if role_row else 'user'
-
-            if user_role == 'admin':
+            if pobierz_role(user.id, cur) == 'admin':
                 return schemas.UpdateProgresResponse(
                     status="admin_readonly",
                     podzadanie_id=podzadanie_id,
@@ -382,7 +712,7 @@ def update_progres_dzienne(
         zadanie_id: int,
         wykonane: bool,
         conn=Depends(get_db),
-        user_id: int = Depends(get_current_user_id)
+        user: AktualnyUzytkownik = Depends(get_current_user)
 ):
     with conn.cursor() as cur:
         """
@@ -395,15 +725,11 @@ def update_progres_dzienne(
                     SELECT uczestnik_id
                     FROM widok_uczestnik_zadanie_dzienne
                     WHERE zadanie_id = %s AND uzytkownik_id = %s
-                    """, (zadanie_id, user_id))
+                    """, (zadanie_id, user.id))
 
         row = cur.fetchone()
         if not row:
-            cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
-            role_row = cur.fetchone()
-            user_role = role_row[0] if role_row else 'user'
-
-            if user_role == 'admin':
+            if pobierz_role(user.id, cur) == 'admin':
                 return schemas.UpdateProgresResponse(
                     status="admin_readonly",
                     podzadanie_id=zadanie_id, # Tutaj używamy zadanie_id w polu podzadanie_id (lub musisz dodać pole zadanie_id do schematu jeśli je masz)
@@ -441,7 +767,7 @@ def update_progres_dzienne(
 def get_progres_dzienne(
         zadanie_id: int,
         conn=Depends(get_db),
-        user_id: int = Depends(get_current_user_id)
+        user: AktualnyUzytkownik = Depends(get_current_user)
 ):
     """
         Zwraca procent wykonania i informację, czy zadanie dzienne zostało wykonane przez użytkownika.
@@ -451,21 +777,17 @@ def get_progres_dzienne(
 
     with conn.cursor() as cur:
 
-        cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
-        role_row = cur.fetchone()
-        user_role = role_row[0] if role_row else 'user'
-
         # Pobierz procent wykonania z funkcji PL/pgSQL
         cur.execute(
             """
             SELECT *
             FROM fn_get_progres_dzienne(%s, %s)
             """,
-            (zadanie_id, user_id)
+            (zadanie_id, user.id)
         )
         row = cur.fetchone()
         if not row:
-            if user_role == 'admin':
+            if pobierz_role(user.id, cur) == 'admin':
                 # Admin widzi wyzwanie, ale w nim nie uczestniczy.
                 # Zwracamy "fałszywe" dane, żeby frontend się nie posypał.
                 wykonane = False
@@ -499,6 +821,7 @@ def get_progres(podzadanie_id: int, conn=Depends(get_db), user_id: int = Depends
         cur.execute("""
                     SELECT uw.id
                     FROM uczestnicy_wyzwan uw
+                             JOIN wyzwania w ON w.id = uw.wyzwanie_id
                              JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id
                              JOIN podzadania p ON p.zadanie_id = zd.id
                     WHERE p.id = %s AND uw.uzytkownik_id = %s
@@ -608,6 +931,10 @@ def get_progres(podzadanie_id: int, conn=Depends(get_db), user_id: int = Depends
 #         "historia": wynik
 #     }
 
+# Zadania bieżące i zarchiwizowane (widoki *_z_archiwum, 0018)
+_SQL_HISTORIA_WYKRESU = "SELECT fn_pobierz_historie_wykresu(%s)"
+
+
 @router.get("/progres/dzienne/historia/wszystkie/{zadanie_id}")
 def get_progres_dzienne_historia_wszystkie(
         zadanie_id: int,
@@ -619,7 +946,7 @@ def get_progres_dzienne_historia_wszystkie(
     """
     with conn.cursor() as cur:
         # Wywołujemy funkcję SQL, która zwraca gotowy JSON (listę obiektów)
-        cur.execute("SELECT fn_pobierz_historie_wykresu(%s)", (zadanie_id,))
+        cur.execute(_SQL_HISTORIA_WYKRESU, (zadanie_id,))
 
         # Pobieramy wynik (Postgres zwraca to jako pojedynczy ciąg JSON/obiekt)
         result_json = cur.fetchone()[0]
@@ -629,33 +956,285 @@ def get_progres_dzienne_historia_wszystkie(
         "zadanie_id": zadanie_id,
         "historia": result_json  # To jest lista wygenerowana przez SQL
     }
-@router.delete("/{wyzwanie_id}", response_model=schemas.DeleteWyzwanieResponse)
-def delete_wyzwanie_admin(
+
+
+@router.get("/{wyzwanie_id}/historia")
+def get_historia_wyzwania(
         wyzwanie_id: int,
-        user_id: int = Depends(get_current_user_id),
+        od: Optional[date] = Query(None, description="Początek okna dat (włącznie)"),
+        do: Optional[date] = Query(None, description="Koniec okna dat (włącznie)"),
+        since: Optional[datetime] = Query(None, description="Tylko dni zmienione od tego momentu ('znacznik' z poprzedniej odpowiedzi)"),
+        conn=Depends(get_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Zwraca historię progresu wszystkich zadań dziennych wyzwania w jednej odpowiedzi,
+    ograniczoną do okna dat. W trybie przyrostowym (since=) tylko dni zmienione od ostatniego pobrania,
+    także te, w których usunięto wszystkie wpisy (0019_usuniete_dni_agregatu.sql). Znacznik starszy
+    niż 7 dni daje pełną odpowiedź.
+    Cała logika w bazie (fn_pobierz_historie_wyzwania, także dla wyzwań zarchiwizowanych).
+
+    Odpowiedź zawiera nazwy i dzienny progres wszystkich uczestników, więc dostęp mają tylko
+    uczestnicy, autor wyzwania i admin.
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+                    SELECT EXISTS (SELECT 1 FROM uczestnicy_wyzwan_z_archiwum
+                                   WHERE wyzwanie_id = %(id)s AND uzytkownik_id = %(user_id)s)
+                        OR EXISTS (SELECT 1 FROM wyzwania_z_archiwum
+                                   WHERE id = %(id)s AND autor_id = %(user_id)s)
+                    """, {"id": wyzwanie_id, "user_id": user.id})
+        if not cur.fetchone()[0] and pobierz_role(user.id, cur) != 'admin':
+            raise HTTPException(
+                status_code=400,
+                detail="Użytkownik nie jest uczestnikiem tego wyzwania"
+            )
+
+        cur.execute(
+            """
+            SELECT fn_pobierz_historie_wyzwania(%(id)s, %(od)s, %(do)s, %(since)s)
+            """,
+            {"id": wyzwanie_id, "od": od, "do": do, "since": since}
+        )
+        wynik = cur.fetchone()[0]
+
+    if wynik is None:
+        return {"status": "error", "message": "Wyzwanie nie istnieje"}
+
+    return {
+        "status": "success",
+        "wyzwanie_id": wyzwanie_id,
+        "od": wynik["od"],
+        "do": wynik["do"],
+        "znacznik": wynik["znacznik"],
+        "zadania": wynik["zadania"]
+    }
+
+
+# Surowy progres wyzwania: wiersz na (dzień, uczestnik, zadanie proste / podzadanie).
+# Kolejność kolumn = nagłówek CSV i klucze NDJSON.
+KOLUMNY_EKSPORTU = (
+    "dzien", "uzytkownik_id", "nazwa_uzytkownika", "zadanie_id", "zadanie",
+    "podzadanie_id", "podzadanie", "waga", "wykonane", "zapisano",
+)
+
+_SQL_EKSPORT_PROGRESU = """
+    SELECT pp.data::date, uw.uzytkownik_id, u.nazwa_uzytkownika, z.id, z.nazwa,
+           p.id, p.nazwa, p.waga, pp.wykonane, pp.data
+    FROM progres_podzadania pp
+             JOIN podzadania p ON p.id = pp.podzadanie_id
+             JOIN zadania_dzienne z ON z.id = p.zadanie_id
+             JOIN uczestnicy_wyzwan uw ON uw.id = pp.uczestnik_id
+             JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+    WHERE z.wyzwanie_id = %(wyzwanie_id)s
+      AND (%(od)s::date IS NULL OR pp.data >= %(od)s::date)
+      AND (%(do)s::date IS NULL OR pp.data < %(do)s::date + 1)
+    UNION ALL
+    SELECT pd.data::date, uw.uzytkownik_id, u.nazwa_uzytkownika, z.id, z.nazwa,
+           NULL, NULL, NULL, pd.wykonane, pd.data
+    FROM progres_dzienne pd
+             JOIN zadania_dzienne z ON z.id = pd.zadanie_id
+             JOIN uczestnicy_wyzwan uw ON uw.id = pd.uczestnik_id
+             JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+    WHERE z.wyzwanie_id = %(wyzwanie_id)s
+      AND (%(od)s::date IS NULL OR pd.data >= %(od)s::date)
+      AND (%(do)s::date IS NULL OR pd.data < %(do)s::date + 1)
+    ORDER BY 1, 2, 4, 6 NULLS FIRST
+"""
+
+# ile bajtów zbieramy przed wysłaniem kawałka odpowiedzi
+EKSPORT_PACZKA = 64 * 1024
+
+
+def _wiersze_csv(wiersze):
+    bufor = io.StringIO()
+    pisarz = csv.writer(bufor)
+    pisarz.writerow(KOLUMNY_EKSPORTU)
+    for w in wiersze:
+        pisarz.writerow(w)
+        if bufor.tell() >= EKSPORT_PACZKA:
+            yield bufor.getvalue().encode("utf-8")
+            bufor.seek(0)
+            bufor.truncate()
+    yield bufor.getvalue().encode("utf-8")
+
+
+def _wiersze_ndjson(wiersze):
+    paczka = []
+    rozmiar = 0
+    for w in wiersze:
+        linia = orjson.dumps(dict(zip(KOLUMNY_EKSPORTU, w))) + b"\n"
+        paczka.append(linia)
+        rozmiar += len(linia)
+        if rozmiar >= EKSPORT_PACZKA:
+            yield b"".join(paczka)
+            paczka, rozmiar = [], 0
+    yield b"".join(paczka)
+
+
+def _gzip(kawalki):
+    kompresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> format gzip
+    for kawalek in kawalki:
+        skompresowane = kompresor.compress(kawalek)
+        if skompresowane:
+            yield skompresowane
+    yield kompresor.flush()
+
+
+@router.get("/{wyzwanie_id}/export")
+def export_progresu(
+        wyzwanie_id: int,
+        format: Literal["csv", "ndjson"] = Query("csv"),
+        od: Optional[date] = Query(None, description="Początek zakresu dat (włącznie)"),
+        do: Optional[date] = Query(None, description="Koniec zakresu dat (włącznie)"),
+        gzip: bool = Query(False, description="Plik .gz zamiast czystego tekstu"),
+        user: AktualnyUzytkownik = Depends(get_current_user),
         conn=Depends(get_db)
 ):
+    """
+    Surowe dane progresu wyzwania (dzień x uczestnik x zadanie/podzadanie) do analizy offline.
+    Tylko autor wyzwania i admin.
+
+    Wiersze są czytane nazwanym kursorem (po stronie serwera) paczkami i wysyłane kawałkami
+    (chunked) od razu po zapisaniu - pamięć nie rośnie z rozmiarem eksportu.
+    """
+    if od is not None and do is not None and od > do:
+        raise HTTPException(status_code=400, detail="Data 'od' jest późniejsza niż 'do'")
+
     with conn.cursor() as cur:
-        # 1. Sprawdzenie uprawnień
-        cur.execute("SELECT rola FROM uzytkownicy WHERE id = %s", (user_id,))
+        cur.execute("SELECT autor_id FROM wyzwania WHERE id = %s", (wyzwanie_id,))
         row = cur.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Wyzwanie nie istnieje")
+        if row[0] != user.id and pobierz_role(user.id, cur) != 'admin':
+            raise HTTPException(status_code=403, detail="Eksport jest dostępny tylko dla autora wyzwania")
+
+    params = {"wyzwanie_id": wyzwanie_id, "od": od, "do": do}
+
+    def wiersze():
+        with conn.cursor(name="eksport_progresu") as named_cur:
+            named_cur.itersize = 2000
+            named_cur.execute(_SQL_EKSPORT_PROGRESU, params)
+            yield from named_cur
+
+    tresc = _wiersze_csv(wiersze()) if format == "csv" else _wiersze_ndjson(wiersze())
+    nazwa_pliku = f"wyzwanie_{wyzwanie_id}_progres.{format}"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        tresc = _gzip(tresc)
+        nazwa_pliku += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        tresc,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nazwa_pliku}"'},
+    )
+
+
+# Limit id w jednym DELETE /wyzwania/ - samo ukrycie to jeden UPDATE, ale lista trafia do zlecenia
+MAX_USUWANYCH_WYZWAN = 500
+
+
+def _miekko_usun(cur, ids: List[int], user_id: int):
+    """Ukrywa wyzwania i zleca czyszczenie w tle. Zwraca (zadanie_id, ukryte ids)."""
+    cur.execute("SELECT zadanie_id, wyzwania_ids FROM fn_miekko_usun_wyzwania(%s, %s)", (ids, user_id))
+    zadanie_id, usuniete = cur.fetchone()
+    return zadanie_id, list(usuniete or [])
+
+
+@router.delete("/", response_model=schemas.UsuwanieWyzwanResponse, status_code=202)
+def delete_wyzwania_admin(
+        ids: List[int] = Query(..., description="Id wyzwań do usunięcia (?ids=1&ids=2)"),
+        user: AktualnyUzytkownik = Depends(get_current_user),
+        conn=Depends(get_db)
+):
+    """
+    Usuwa wiele wyzwań naraz (także zarchiwizowane). Tylko admin.
+    Wyzwania znikają od razu (miękkie usunięcie), a ich progres, zadania i uczestników
+    usuwa porcjami wątek tła (app/czyszczenie.py). Postęp: GET /wyzwania/usuwanie/{zadanie_id}.
+    """
+    if len(ids) > MAX_USUWANYCH_WYZWAN:
+        raise HTTPException(status_code=400, detail=f"Można usunąć najwyżej {MAX_USUWANYCH_WYZWAN} wyzwań naraz")
+
+    with conn.cursor() as cur:
+        if pobierz_role(user.id, cur) != 'admin':
+            raise HTTPException(status_code=403, detail="Brak uprawnień. Tylko administrator może usuwać wyzwania.")
 
+        zadanie_id, usuniete = _miekko_usun(cur, sorted(set(ids)), user.id)
+        conn.commit()
+
+    if zadanie_id is not None:
+        czyszczenie.zlec(zadanie_id)
+
+    return schemas.UsuwanieWyzwanResponse(
+        status="success" if usuniete else "error",
+        message=f"Usunięto wyzwań: {len(usuniete)}." if usuniete else "Nie znaleziono wyzwań do usunięcia.",
+        zadanie_id=zadanie_id,
+        usuniete=usuniete,
+        pominiete=sorted(set(ids) - set(usuniete)),
+    )
+
+
+@router.get("/usuwanie/{zadanie_id}", response_model=schemas.StatusUsuwaniaResponse)
+def get_status_usuwania(
+        zadanie_id: int,
+        user: AktualnyUzytkownik = Depends(get_current_user),
+        conn=Depends(get_db)
+):
+    """Postęp czyszczenia usuniętych wyzwań. Tylko admin (rola z bazy, jak przy samym usuwaniu)."""
+    with conn.cursor() as cur:
+        if pobierz_role(user.id, cur) != 'admin':
+            raise HTTPException(status_code=403, detail="Brak uprawnień administratora")
+
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("""
+                    SELECT id AS zadanie_id, status AS stan, wyzwania_ids, pozostale_wyzwania,
+                           usuniete_wiersze, blad, utworzono, rozpoczeto, zakonczono
+                    FROM usuwanie_wyzwan
+                    WHERE id = %s
+                    """, (zadanie_id,))
+        zadanie = cur.fetchone()
+
+    if not zadanie:
+        raise HTTPException(status_code=404, detail="Nie znaleziono zlecenia usuwania")
+    return {"status": "success", **zadanie}
+
+
+@router.delete("/{wyzwanie_id}", response_model=schemas.DeleteWyzwanieResponse)
+def delete_wyzwanie_admin(
+        wyzwanie_id: int,
+        user: AktualnyUzytkownik = Depends(get_current_user),
+        conn=Depends(get_db)
+):
+    with conn.cursor() as cur:
+        # 1. Sprawdzenie uprawnień - operacja nieodwracalna, więc rola z bazy (przez cache),
+        #    a nie z tokena, który mógł zostać wydany przed odebraniem uprawnień
         # Jeśli użytkownik nie istnieje LUB nie jest adminem -> zwracamy JSON (status 200 OK), a nie błąd 403
-        if not row or row[0] != 'admin':
+        if pobierz_role(user.id, cur) != 'admin':
             return schemas.DeleteWyzwanieResponse(
                 status="error",
                 message="Brak uprawnień. Tylko administrator może usuwać wyzwania.",
                 wyzwanie_id=wyzwanie_id
             )
 
-        # 2. Wywołanie funkcji czyszczącej z bazy (tylko jeśli admin)
-        # Zakładam, że funkcja SQL zwraca coś sensownego lub po prostu działa
-        cur.execute("SELECT usun_wyzwanie_admin(%s)", (wyzwanie_id,))
+        # 2. Ukrycie wyzwania - dane usuwa porcjami wątek tła (app/czyszczenie.py)
+        zadanie_id, usuniete = _miekko_usun(cur, [wyzwanie_id], user.id)
         conn.commit()
 
+    if not usuniete:
+        return schemas.DeleteWyzwanieResponse(
+            status="error",
+            message="Nie znaleziono wyzwania.",
+            wyzwanie_id=wyzwanie_id
+        )
+
+    czyszczenie.zlec(zadanie_id)
+
     # 3. Sukces
     return schemas.DeleteWyzwanieResponse(
         status="success",
         message="Wyzwanie zostało pomyślnie usunięte.",
-        wyzwanie_id=wyzwanie_id
+        wyzwanie_id=wyzwanie_id,
+        zadanie_id=zadanie_id
     )
@@ -0,0 +1,213 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app import schemas
+from app.database_async import get_async_db
+from app.auth.jwt import get_current_user, pobierz_role_async, AktualnyUzytkownik
+from app.routers.wyzwania import _SQL_HISTORIA_WYKRESU
+
+# Asynchroniczne odpowiedniki najgorętszych endpointów z routers/wyzwania.py.
+# Rejestrowane PRZED routerem synchronicznym (DB_MODE=async), więc przejmują te same ścieżki.
+# Korzystają z tych samych widoków i funkcji z app/migrations co wersja synchroniczna.
+#
+# Zakres jest celowo ograniczony do przełączania i odczytu progresu oraz historii wykresu -
+# to one tworzą serie krótkich zapytań, które w trybie sync czekały w threadpoolu za wolnymi
+# odczytami. Reszta routerów zostaje synchroniczna: to rzadkie operacje (tworzenie, usuwanie,
+# zaproszenia, admin) albo korzystają z funkcji psycopg2 bez odpowiednika tutaj (kursory
+# nazwane do strumieniowania, pamięć podręczna ról i JSON-a w wątkach, LISTEN/NOTIFY).
+# Przeniesienie ich dublowałoby kod bez zysku w pomiarach A/B; kolejne endpointy dodajemy
+# tutaj dopiero, gdy pomiar pokaże, że blokują threadpool.
+router = APIRouter(
+    prefix="/wyzwania",
+    tags=["wyzwania"]
+)
+
+
+@router.post("/progres/podzadania/{podzadanie_id}", response_model=schemas.UpdateProgresResponse)
+async def update_progres_async(
+        podzadanie_id: int,
+        wykonane: bool,
+        conn=Depends(get_async_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Aktualizuje lub dodaje wpis o postępie użytkownika dla konkretnego podzadania (wersja async).
+    2c widoki.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("""
+                          SELECT uczestnik_id
+                          FROM widok_uczestnik_podzadania
+                          WHERE podzadanie_id = %s AND uzytkownik_id = %s
+                          """, (podzadanie_id, user.id))
+
+        row = await cur.fetchone()
+        if not row:
+            if await pobierz_role_async(user.id, cur) == 'admin':
+                return schemas.UpdateProgresResponse(
+                    status="admin_readonly",
+                    podzadanie_id=podzadanie_id,
+                    wykonane=False,
+                    message="Jesteś administratorem - to tylko podgląd."
+                )
+            raise HTTPException(
+                status_code=400,
+                detail=schemas.UpdateProgresErrorResponse(
+                    message="Użytkownik nie jest uczestnikiem tego wyzwania"
+                ).model_dump()
+            )
+
+        await cur.execute("""
+                          INSERT INTO progres_podzadania (uczestnik_id, podzadanie_id, data, wykonane)
+                          VALUES (%s, %s, CURRENT_DATE, %s)
+                          ON CONFLICT (uczestnik_id, podzadanie_id, data)
+                              DO UPDATE SET wykonane = EXCLUDED.wykonane
+                          """, (row[0], podzadanie_id, wykonane))
+
+    await conn.commit()
+
+    return schemas.UpdateProgresResponse(
+        status="success",
+        podzadanie_id=podzadanie_id,
+        wykonane=wykonane
+    )
+
+
+@router.post("/progres/dzienne/{zadanie_id}", response_model=schemas.UpdateProgresResponse)
+async def update_progres_dzienne_async(
+        zadanie_id: int,
+        wykonane: bool,
+        conn=Depends(get_async_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Aktualizuje lub dodaje dzienny progres użytkownika dla konkretnego zadania (wersja async).
+    2c widoki
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("""
+                          SELECT uczestnik_id
+                          FROM widok_uczestnik_zadanie_dzienne
+                          WHERE zadanie_id = %s AND uzytkownik_id = %s
+                          """, (zadanie_id, user.id))
+
+        row = await cur.fetchone()
+        if not row:
+            if await pobierz_role_async(user.id, cur) == 'admin':
+                return schemas.UpdateProgresResponse(
+                    status="admin_readonly",
+                    podzadanie_id=zadanie_id,
+                    wykonane=False,
+                    message="Jesteś administratorem - to tylko podgląd."
+                )
+            raise HTTPException(
+                status_code=400,
+                detail=schemas.UpdateProgresErrorResponse(
+                    message="Użytkownik nie jest uczestnikiem tego wyzwania"
+                ).model_dump()
+            )
+
+        await cur.execute("""
+                          INSERT INTO progres_dzienne (uczestnik_id, zadanie_id, data, wykonane)
+                          VALUES (%s, %s, CURRENT_DATE, %s)
+                          ON CONFLICT (uczestnik_id, zadanie_id, data)
+                              DO UPDATE SET wykonane = EXCLUDED.wykonane
+                          """, (row[0], zadanie_id, wykonane))
+
+    await conn.commit()
+
+    return schemas.UpdateProgresResponse(
+        status="success",
+        podzadanie_id=zadanie_id,
+        wykonane=wykonane
+    )
+
+
+@router.get("/progres/dzienne/{zadanie_id}", response_model=schemas.GetProgresDzienneResponse)
+async def get_progres_dzienne_async(
+        zadanie_id: int,
+        conn=Depends(get_async_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Zwraca informację, czy zadanie dzienne zostało wykonane przez użytkownika (wersja async).
+    6c – funkcja wbudowana w PL/pgSQL
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("SELECT * FROM fn_get_progres_dzienne(%s, %s)", (zadanie_id, user.id))
+        row = await cur.fetchone()
+
+        if not row:
+            if await pobierz_role_async(user.id, cur) != 'admin':
+                raise HTTPException(
+                    status_code=400,
+                    detail="Użytkownik nie jest uczestnikiem tego wyzwania"
+                )
+            # Admin widzi wyzwanie, ale w nim nie uczestniczy.
+            wykonane = False
+        else:
+            procent, wykonane = row
+
+    return schemas.GetProgresDzienneResponse(
+        status="success",
+        zadanie_id=zadanie_id,
+        wykonane=wykonane
+    )
+
+
+@router.get("/progres/podzadania/{podzadanie_id}",
+            response_model=schemas.GetProgresPodzadanieResponse | schemas.UpdateProgresErrorResponse)
+async def get_progres_async(
+        podzadanie_id: int,
+        conn=Depends(get_async_db),
+        user: AktualnyUzytkownik = Depends(get_current_user)
+):
+    """
+    Zwraca informację, czy zalogowany użytkownik wykonał dziś dane podzadanie (wersja async).
+    """
+    async with conn.cursor() as cur:
+        await cur.execute("""
+                          SELECT uw.id
+                          FROM uczestnicy_wyzwan uw
+                                   JOIN wyzwania w ON w.id = uw.wyzwanie_id
+                                   JOIN zadania_dzienne zd ON zd.wyzwanie_id = uw.wyzwanie_id
+                                   JOIN podzadania p ON p.zadanie_id = zd.id
+                          WHERE p.id = %s AND uw.uzytkownik_id = %s
+                          """, (podzadanie_id, user.id))
+        row = await cur.fetchone()
+        if not row:
+            return schemas.UpdateProgresErrorResponse(
+                message="Użytkownik nie jest uczestnikiem tego wyzwania"
+            )
+
+        await cur.execute("""
+                          SELECT wykonane
+                          FROM progres_podzadania
+                          WHERE uczestnik_id = %s AND podzadanie_id = %s AND data = CURRENT_DATE
+                          """, (row[0], podzadanie_id))
+        row = await cur.fetchone()
+        wykonane = row[0] if row else False
+
+    return schemas.GetProgresPodzadanieResponse(
+        status="success",
+        podzadanie_id=podzadanie_id,
+        wykonane=wykonane
+    )
+
+
+@router.get("/progres/dzienne/historia/wszystkie/{zadanie_id}")
+async def get_progres_dzienne_historia_wszystkie_async(
+        zadanie_id: int,
+        conn=Depends(get_async_db)
+):
+    """
+    Zwraca historię progresu dla zadania (wersja async, logika w fn_pobierz_historie_wykresu).
+    Bez get_current_user - tak samo jak endpoint synchroniczny, którego zastępuje.
+    """
+    async with conn.cursor() as cur:
+        await cur.execute(_SQL_HISTORIA_WYKRESU, (zadanie_id,))
+        result_json = (await cur.fetchone())[0]
+
+    return {
+        "status": "success",
+        "zadanie_id": zadanie_id,
+        "historia": result_json
+    }
@@ -0,0 +1,144 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.auth.jwt import uzytkownik_z_tokenu
+from app.database import get_pool, PoolTimeout
+from app.realtime import hub_zdarzen
+
+router = APIRouter(
+    tags=["zdarzenia"]
+)
+
+# co ile sekund bez zdarzeń wysyłamy komentarz (proxy zamykają bezczynne połączenia)
+HEARTBEAT_CO = 20
+# po ilu ms przeglądarka ma się połączyć ponownie
+PONOW_PO_MS = 3000
+# więcej zaległości niż tyle -> zamiast nich 'resync' (klient przeładowuje pulpit)
+MAX_ZALEGLYCH = 500
+# id z BIGSERIAL nadawane są przy INSERT, a transakcje zatwierdzają się w innej kolejności:
+# zdarzenie o mniejszym id może stać się widoczne po tym, jak klient dostał większe.
+# Dlatego przy doczytywaniu bierzemy też zdarzenia nie starsze niż OKNO_DOCZYTANIA od
+# ostatnio widzianego (utworzono = początek transakcji, więc okno pokrywa transakcje
+# krótsze niż ono). Powtórzenia odrzuca strumień (wysłane id) i klient (Home.tsx).
+OKNO_DOCZYTANIA = "30 seconds"
+
+
+def _sse(zdarzenie: dict) -> str:
+    dane = json.dumps(zdarzenie["dane"], ensure_ascii=False)
+    return f"id: {zdarzenie['id']}\nevent: {zdarzenie['typ']}\ndata: {dane}\n\n"
+
+
+def _dziennik(user_id: int, po_id: Optional[int]):
+    """
+    Zaległe zdarzenia użytkownika z id > po_id oraz - na wypadek późno zatwierdzonych
+    transakcji - z id <= po_id, utworzone w OKNO_DOCZYTANIA przed zdarzeniem po_id.
+    Zwraca (zdarzenia, resync, ostatnie_id). resync = True, gdy części zaległości już nie ma
+    (dziennik przycięty albo za dużo wpisów) - wtedy ostatnie_id to bieżący koniec dziennika.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM zdarzenia_uzytkownikow")
+            najstarsze, najnowsze = cur.fetchone()
+            if po_id is None:
+                # nowe połączenie - stan klient ma z /home/, wysyłamy tylko to, co przyjdzie
+                return [], False, najnowsze
+            if najstarsze > po_id + 1:
+                return [], True, najnowsze
+
+            cur.execute("""
+                        SELECT id, typ, dane
+                        FROM zdarzenia_uzytkownikow
+                        WHERE uzytkownik_id = %(user_id)s
+                          AND (id > %(po_id)s
+                               OR utworzono >= (SELECT utworzono - %(okno)s::interval
+                                                FROM zdarzenia_uzytkownikow
+                                                WHERE id = %(po_id)s))
+                        ORDER BY id
+                        LIMIT %(limit)s
+                        """, {"user_id": user_id, "po_id": po_id, "okno": OKNO_DOCZYTANIA,
+                              "limit": MAX_ZALEGLYCH + 1})
+            rows = cur.fetchall()
+    finally:
+        pool.putconn(conn)
+
+    if len(rows) > MAX_ZALEGLYCH:
+        return [], True, najnowsze
+    zdarzenia = [{"id": r[0], "typ": r[1], "dane": r[2]} for r in rows]
+    return zdarzenia, False, max([po_id] + [z["id"] for z in zdarzenia])
+
+
+@router.get("/events")
+async def strumien_zdarzen(
+        token: str = Query(...),
+        last_event_id: Optional[str] = Header(None)
+):
+    """
+    Strumień Server-Sent Events z zaproszeniami do znajomych i wyzwań (nowe i zmiany statusu).
+    EventSource nie ustawia nagłówka Authorization, dlatego token JWT jest w ?token=.
+    Po zerwaniu przeglądarka sama wznawia z nagłówkiem Last-Event-ID - zaległości pochodzą
+    z dziennika zdarzenia_uzytkownikow. Zdarzenie 'resync' = zaległości niedostępne, przeładuj dane.
+
+    Bezczynny strumień nie trzyma połączenia z bazą ani wątku - tylko kolejkę w app/realtime.py.
+    """
+    user = await run_in_threadpool(uzytkownik_z_tokenu, token)
+
+    try:
+        po_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Nieprawidłowy nagłówek Last-Event-ID")
+
+    async def generuj():
+        strumien = hub_zdarzen.dodaj(user.id)
+        try:
+            yield f"retry: {PONOW_PO_MS}\n\n"
+            ostatnie = po_id
+            # zapis do hubu przed odczytem dziennika - nic nie wpadnie w lukę między nimi
+            doczytaj = True
+            # id wysłane tym połączeniem - doczytanie z oknem i kolejka zwracają je ponownie
+            wyslane = set()
+            while True:
+                if doczytaj:
+                    doczytaj = False
+                    strumien.doczytaj = False
+                    try:
+                        zdarzenia, resync, ostatnie = await run_in_threadpool(_dziennik, user.id, ostatnie)
+                    except PoolTimeout:
+                        return  # przeglądarka połączy się ponownie z Last-Event-ID
+                    if resync:
+                        yield "event: resync\ndata: {}\n\n"
+                    if len(wyslane) > MAX_ZALEGLYCH * 2:
+                        wyslane = set(sorted(wyslane)[-MAX_ZALEGLYCH:])
+                    for z in zdarzenia:
+                        if z["id"] not in wyslane:
+                            wyslane.add(z["id"])
+                            yield _sse(z)
+
+                try:
+                    z = await asyncio.wait_for(strumien.kolejka.get(), timeout=HEARTBEAT_CO)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if z is None:
+                    doczytaj = True
+                    continue
+                if z["id"] in wyslane:
+                    continue
+                wyslane.add(z["id"])
+                ostatnie = max(ostatnie or 0, z["id"])
+                yield _sse(z)
+        finally:
+            hub_zdarzen.usun(strumien)
+
+    return StreamingResponse(
+        generuj(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
+from typing import List, Optional
 from app import schemas
+from app.cache import TTLCache
+from app.core.odpowiedzi import odpowiedz_json
 from app.database import get_db
 from app.auth.jwt import get_current_user_id
+from app.notify import nasluch
+import base64
+import binascii
+import json
+import re
 import psycopg2
+from psycopg2.extras import RealDictCursor
 
 from app.schemas import ZnajomyOut
 
 router = APIRouter(prefix="/znajomi", tags=["znajomi"])
 
+# Wyniki wyszukiwania per (użytkownik, fraza, limit, kursor). Przy pisaniu kolejnych znaków
+# fraza tylko się wydłuża, a kandydaci (nazwa ILIKE '%fraza%') dłuższej frazy są podzbiorem
+# kandydatów krótszej - jeśli krótsza fraza zmieściła się w całości na pierwszej stronie,
+# wynik dłuższej liczymy z niej bez bazy (_z_krotszej_frazy).
+_wyniki_szukania = TTLCache(ttl=30, maxsize=2048)
+
+
+def _zakoduj_kursor(priorytet, podobienstwo, nazwa, uid) -> str:
+    dane = json.dumps([priorytet, podobienstwo, nazwa, uid]).encode()
+    return base64.urlsafe_b64encode(dane).decode()
+
+
+def _odkoduj_kursor(kursor: str):
+    try:
+        priorytet, podobienstwo, nazwa, uid = json.loads(base64.urlsafe_b64decode(kursor.encode()))
+        return int(priorytet), float(podobienstwo), str(nazwa), int(uid)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Niepoprawny kursor")
+
+
+def _trygramy(tekst: str) -> set:
+    """Trygramy jak w pg_trgm: słowa alfanumeryczne małymi literami, z dopełnieniem '  ' i ' '."""
+    wynik = set()
+    for slowo in re.findall(r"[^\W_]+", tekst.lower()):
+        slowo = "  " + slowo + " "
+        wynik.update(slowo[i:i + 3] for i in range(len(slowo) - 2))
+    return wynik
+
+
+def _podobienstwo(a: str, b: str) -> float:
+    """Odpowiednik similarity() z pg_trgm."""
+    ta, tb = _trygramy(a), _trygramy(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _z_krotszej_frazy(user_id: int, fraza: str, limit: int):
+    """
+    Pierwsza strona wyników dla `fraza` wyliczona z zapisanej pełnej listy dla jej prefiksu
+    (ta sama kolejność co w szukaj_potencjalnych_znajomych; przy remisie podobieństwa nazwy
+    porównywane są bez collation bazy). None, jeśli nie ma kompletnego wyniku prefiksu.
+    """
+    for dlugosc in range(len(fraza) - 1, 0, -1):
+        zapisane = _wyniki_szukania.get((user_id, fraza[:dlugosc], limit, None))
+        if zapisane is None:
+            continue
+        wyniki, nastepny = zapisane
+        if nastepny is not None:
+            return None  # prefiks miał kolejne strony - nie znamy wszystkich kandydatów
+        pasujace = [u for u in wyniki if fraza in u.nazwa_uzytkownika.lower()]
+        pasujace.sort(key=lambda u: (
+            0 if u.nazwa_uzytkownika.lower().startswith(fraza) else 1,
+            -_podobienstwo(u.nazwa_uzytkownika, fraza),
+            u.nazwa_uzytkownika,
+            u.id,
+        ))
+        return pasujace, None
+    return None
+
+
+def _uniewaznij_szukanie(*user_ids: int):
+    """Relacja między użytkownikami zmienia ich wzajemne wyniki wyszukiwania."""
+    _wyniki_szukania.usun_gdzie(lambda k: k[0] in user_ids)
+
+
+def _zdarzenie_znajomych(payload: str):
+    # zmiany relacji z innych workerów (dziennik zdarzeń, 0010_zdarzenia_uzytkownikow.sql)
+    zdarzenie = json.loads(payload)
+    if zdarzenie["typ"] == "zaproszenie_znajomego":
+        _uniewaznij_szukanie(zdarzenie["uzytkownik_id"], zdarzenie["dane"]["uzytkownik"]["id"])
+    elif zdarzenie["typ"] == "zaproszenie_znajomego_status":
+        _uniewaznij_szukanie(zdarzenie["uzytkownik_id"])
+
+
+nasluch.subskrybuj("zdarzenia_uzytkownikow", _zdarzenie_znajomych)
+nasluch.przy_polaczeniu(_wyniki_szukania.clear)
+
 
 @router.get("/")
 def read_root():
@@ -20,30 +106,28 @@ def znajomi(user_id: int = Depends(get_current_user_id), conn=Depends(get_db)):
     """
     Pobiera listę znajomych wykorzystując WIDOK (Wymaganie 2a).
     """
-    wynik = []
-    with conn.cursor() as cur:
+    # kolumny nazwane jak pola ZnajomyOut - wiersze idą prosto do JSON-a (app/core/odpowiedzi.py)
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("""
                     SELECT
-                        CASE WHEN uzytkownik_id = %s THEN adresat_nazwa ELSE inicjator_nazwa END,
-                        CASE WHEN uzytkownik_id = %s THEN adresat_email ELSE inicjator_email END,
-                        CASE WHEN uzytkownik_id = %s THEN znajomy_id ELSE uzytkownik_id END,
-                        CASE WHEN uzytkownik_id = %s THEN adresat_profilowe_url ELSE inicjator_profilowe_url END
+                        CASE WHEN uzytkownik_id = %s THEN znajomy_id ELSE uzytkownik_id END AS id,
+                        CASE WHEN uzytkownik_id = %s THEN adresat_nazwa ELSE inicjator_nazwa END AS nazwa_uzytkownika,
+                        CASE WHEN uzytkownik_id = %s THEN adresat_email ELSE inicjator_email END AS email,
+                        CASE WHEN uzytkownik_id = %s THEN adresat_profilowe_url ELSE inicjator_profilowe_url END AS profilowe_url
                     FROM widok_szczegoly_relacji
                     WHERE (uzytkownik_id = %s OR znajomy_id = %s)
                       AND sa_znajomymi = TRUE
                     """, (user_id, user_id, user_id, user_id, user_id, user_id))
+        wynik = cur.fetchall()
+    return odpowiedz_json(wynik)
 
-        dane = cur.fetchall()
-        for nazwa, email, uid, profilowe_url  in dane:
-            wynik.append(
-                ZnajomyOut(
-                    id=uid,
-                    nazwa_uzytkownika=nazwa,
-                    email=email,
-                    profilowe_url=profilowe_url
-                )
-            )
-    return wynik
+
+def _pending_out(rel_id, uid, nazwa, email) -> dict:
+    """Wiersz zaproszenia jako słownik o kształcie schemas.PendingZaproszenieOut."""
+    return {
+        "relacja_id": rel_id,
+        "uzytkownik": {"id": uid, "nazwa_uzytkownika": nazwa, "email": email, "profilowe_url": None},
+    }
 
 
 @router.get("/pending/wyslane", response_model=List[schemas.PendingZaproszenieOut])
@@ -51,7 +135,6 @@ def pending_wyslane(user_id: int = Depends(get_current_user_id), conn=Depends(ge
     """
     Pobiera wysłane zaproszenia używając widoku.
     """
-    wynik = []
     with conn.cursor() as cur:
         cur.execute("""
                     SELECT relacja_id, adresat_id, adresat_nazwa, adresat_email
@@ -63,18 +146,7 @@ def pending_wyslane(user_id: int = Depends(get_current_user_id), conn=Depends(ge
                     """, (user_id,))
         dane = cur.fetchall()
 
-        for rel_id, uid, nazwa, email in dane:
-            wynik.append(
-                schemas.PendingZaproszenieOut(
-                    relacja_id=rel_id,
-                    uzytkownik=schemas.ZnajomyOut(
-                        id=uid,
-                        nazwa_uzytkownika=nazwa,
-                        email=email
-                    )
-                )
-            )
-    return wynik
+    return odpowiedz_json([_pending_out(*row) for row in dane])
 
 
 @router.get("/pending/odebrane", response_model=List[schemas.PendingZaproszenieOut])
@@ -82,50 +154,63 @@ def pending_odebrane(user_id: int = Depends(get_current_user_id), conn=Depends(g
     """
     Pobiera odebrane zaproszenia używając widoku.
     """
-    wynik = []
     with conn.cursor() as cur:
         cur.execute("""
                     SELECT relacja_id, uzytkownik_id, inicjator_nazwa, inicjator_email
                     FROM widok_szczegoly_relacji
                     WHERE znajomy_id = %s AND status = 'oczekujacy'
                     """, (user_id,))
+        dane = cur.fetchall()
 
-        for rel_id, uid, nazwa, email in cur.fetchall():
-            wynik.append(
-                schemas.PendingZaproszenieOut(
-                    relacja_id=rel_id,
-                    uzytkownik=schemas.ZnajomyOut(
-                        id=uid,
-                        nazwa_uzytkownika=nazwa,
-                        email=email
-                    )
-                )
-            )
-    return wynik
+    return odpowiedz_json([_pending_out(*row) for row in dane])
 
 
 @router.get("/szukaj", response_model=List[schemas.UzytkownikOut])
 def szukaj_uzytkownikow(
+        response: Response,
         q: str = Query(..., min_length=1, description="Szukaj nowego znajomego"),
+        limit: int = Query(20, ge=1, le=100, description="Maksymalna liczba wyników"),
+        cursor: Optional[str] = Query(None, description="Kursor z nagłówka X-Next-Cursor poprzedniej strony"),
         conn=Depends(get_db),
         user_id: int = Depends(get_current_user_id),
 ):
     """
     Wyszukiwanie wykorzystujące funkcję wbudowaną w PL/PGSQL (Wymaganie 6c).
+    Najpierw nazwy zaczynające się od frazy, potem wg podobieństwa. Jeśli są kolejne
+    wyniki, kursor następnej strony jest w nagłówku X-Next-Cursor.
     """
-    with conn.cursor() as cur:
-        cur.callproc('szukaj_potencjalnych_znajomych', (q, user_id))
-        wyniki = cur.fetchall()
-
-    final_results = []
-    for u_id, nazwa, email in wyniki:
-        final_results.append(
-            schemas.UzytkownikOut(
-                id=u_id,
-                nazwa_uzytkownika=nazwa,
-                email=email
-            )
+    q = q.strip()
+    klucz = (user_id, q.lower(), limit, cursor)
+    zapisane = _wyniki_szukania.get(klucz)
+    if zapisane is None and cursor is None:
+        # nie zapisujemy - wynik żyje najwyżej tyle, co wpis prefiksu
+        zapisane = _z_krotszej_frazy(user_id, q.lower(), limit)
+    if zapisane is None:
+        po = _odkoduj_kursor(cursor) if cursor else (None, None, None, None)
+        with conn.cursor() as cur:
+            # limit + 1: dodatkowy wiersz mówi, czy istnieje następna strona
+            cur.execute("""
+                        SELECT id, nazwa_uzytkownika, email, priorytet, podobienstwo
+                        FROM szukaj_potencjalnych_znajomych(%s, %s, %s, %s, %s, %s, %s)
+                        """, (q, user_id, limit + 1, *po))
+            wyniki = cur.fetchall()
+
+        nastepny = None
+        if len(wyniki) > limit:
+            wyniki = wyniki[:limit]
+            u_id, nazwa, _, priorytet, podobienstwo = wyniki[-1]
+            nastepny = _zakoduj_kursor(priorytet, podobienstwo, nazwa, u_id)
+
+        zapisane = (
+            [schemas.UzytkownikOut(id=u_id, nazwa_uzytkownika=nazwa, email=email)
+             for u_id, nazwa, email, _, _ in wyniki],
+            nastepny,
         )
+        _wyniki_szukania.set(klucz, zapisane)
+
+    final_results, nastepny = zapisane
+    if nastepny:
+        response.headers["X-Next-Cursor"] = nastepny
     return final_results
 
 
@@ -145,6 +230,9 @@ def dodaj_znajomego(
             relacja = cur.fetchone()
             conn.commit()
 
+            # nowa relacja wyklucza obu użytkowników z wzajemnych wyników wyszukiwania
+            _uniewaznij_szukanie(user_id, zaproszenie.znajomy_id)
+
             # relacja = (id, status, data)
             return schemas.ZaproszenieOut(
                 id=relacja[0],
@@ -177,6 +265,7 @@ def akceptuj_zaproszenie(
             cur.callproc('zmien_status_zaproszenia', (zaproszenie_id, user_id, 'zaakceptowany'))
             updated = cur.fetchone()
             conn.commit()
+            _uniewaznij_szukanie(updated[1], updated[2])
 
         return schemas.ZaproszenieOut(
             id=updated[0],
@@ -202,6 +291,7 @@ def odrzuc_zaproszenie(
             cur.callproc('zmien_status_zaproszenia', (zaproszenie_id, user_id, 'odrzucony'))
             updated = cur.fetchone()
             conn.commit()
+            _uniewaznij_szukanie(updated[1], updated[2])
 
             return schemas.ZaproszenieOut(
                 id=updated[0],
@@ -222,21 +312,18 @@ def statystyki_znajomych(user_id: int = Depends(get_current_user_id), conn=Depen
     Zwraca statystyki znajomych dla zalogowanego użytkownika:
     - liczba znajomych
     - liczba oczekujących zaproszeń
-    2a (widok), 6c (funkcja wbudowana), 6a widok z GROUP BY
+    Liczniki utrzymuje wyzwalacz na znajomi (0015_statystyki_uzytkownikow.sql),
+    więc to jeden odczyt po kluczu głównym zamiast grupowania całej tabeli.
     """
     with conn.cursor() as cur:
-        # Pobranie liczby znajomych z widoku
         cur.execute("""
-                    SELECT liczba_znajomych
-                    FROM widok_statystyki_znajomych
+                    SELECT liczba_znajomych, liczba_oczekujacych
+                    FROM statystyki_uzytkownikow
                     WHERE uzytkownik_id = %s
                     """, (user_id,))
         wynik = cur.fetchone()
-        liczba_znajomych = wynik[0] if wynik else 0
-
-        # Pobranie liczby oczekujących zaproszeń z funkcji
-        cur.execute("SELECT zlicz_oczekujace_zaproszenia(%s)", (user_id,))
-        liczba_oczekujacych = cur.fetchone()[0]
+        # brak wiersza = użytkownik bez żadnej relacji
+        liczba_znajomych, liczba_oczekujacych = wynik if wynik else (0, 0)
 
     return schemas.StatystykiZnajomychOut(
         liczba_znajomych=liczba_znajomych,
@@ -1,7 +1,7 @@
 # app/schemas.py
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, date
+from typing import Optional, List, Literal
 
 
 # -------------------- Użytkownik --------------------
@@ -87,6 +87,8 @@ class WyzwaniaResponse(BaseModel):
     message: str
     status: str
     data: List[WyzwanieOut]
+    # id do przekazania jako after_id, jeśli są kolejne strony
+    next_after_id: Optional[int] = None
 
 class UczestnikWyzwaniaOut(BaseModel):
     id: int
@@ -122,11 +124,23 @@ class WyzwanieFullOut(BaseModel):
     autor_id: int
     uczestnicy: List[UczestnikWyzwaniaOut] = []
     zadania_dzienne: List[ZadanieDzienneOut] = []
+    zarchiwizowane: bool = False  # tylko do odczytu (tabele *_archiwum)
+
+class SeriaOut(BaseModel):
+    biezaca: int  # 0, jeśli seria urwała się przed wczoraj
+    najdluzsza: int
+    ostatni_dzien: Optional[date] = None  # ostatni dzień wykonany w 100%
+
+class SeriaUczestnikaOut(SeriaOut):
+    uczestnik_id: int
+    uzytkownik_id: int
+    zadanie_id: Optional[int] = None  # None = seria całego wyzwania (wszystkie zadania na 100%)
 
 class WyzwanieResponse(BaseModel):
     status: str
     data: Optional[WyzwanieFullOut] = None
     message: Optional[str] = None
+    serie: Optional[List[SeriaUczestnikaOut]] = None  # tylko z ?serie=true
 
 #--------------------- Wyzwanie zaproszenia---------------
 class WyslaneZaproszenieWyzwanieOut(BaseModel):
@@ -188,7 +202,94 @@ class GetProgresPodzadanieResponse(BaseModel):
     podzadanie_id: int
     wykonane: bool
 
+class ProgresBatchItem(BaseModel):
+    kind: Literal["podzadanie", "zadanie"]
+    id: int
+    wykonane: bool
+    data: Optional[date] = None  # domyślnie dzisiaj
+
+class ProgresBatchItemResult(BaseModel):
+    kind: str
+    id: int
+    data: date
+    wykonane: bool
+    status: str  # "success", "admin_readonly" lub "error"
+    message: Optional[str] = None
+
+class ProgresBatchResponse(BaseModel):
+    status: str  # "success" gdy wszystkie pozycje zapisano, inaczej "partial"
+    wyniki: List[ProgresBatchItemResult]
+
+class ProgresPodzadaniaOut(BaseModel):
+    podzadanie_id: int
+    wykonane: bool
+
+class ProgresZadaniaOut(BaseModel):
+    zadanie_id: int
+    procent: int
+    wykonane: bool
+    podzadania: List[ProgresPodzadaniaOut] = []
+    seria: Optional[SeriaOut] = None
+
+class ProgresWyzwaniaResponse(BaseModel):
+    status: str
+    wyzwanie_id: int
+    data: date
+    zadania: List[ProgresZadaniaOut] = []
+    seria: Optional[SeriaOut] = None  # seria całego wyzwania
+    message: Optional[str] = None
+
+class PozycjaRankinguOut(BaseModel):
+    pozycja: int
+    uczestnik_id: int
+    uzytkownik_id: int
+    nazwa_uzytkownika: str
+    suma_procent: int  # suma procentów wykonania zadań ze wszystkich dni
+    dni_ukonczone: int  # dni z wszystkimi zadaniami na 100%
+
+class RankingWyzwaniaResponse(BaseModel):
+    status: str
+    wyzwanie_id: int
+    liczba_uczestnikow: int = 0
+    ranking: List[PozycjaRankinguOut] = []
+    moja_pozycja: Optional[PozycjaRankinguOut] = None  # także spoza pierwszych `limit` miejsc
+    message: Optional[str] = None
+
 class DeleteWyzwanieResponse(BaseModel):
     status: str  # "success" lub "error"
     message: str
     wyzwanie_id: Optional[int] = None  # Zwracamy ID usuniętego wyzwania przy sukcesie
+    zadanie_id: Optional[int] = None  # zlecenie czyszczenia w tle (GET /wyzwania/usuwanie/{id})
+
+class UsuwanieWyzwanResponse(BaseModel):
+    status: str
+    message: str
+    zadanie_id: Optional[int] = None
+    usuniete: List[int] = []  # ukryte teraz wyzwania
+    pominiete: List[int] = []  # nieistniejące lub już usunięte
+
+class StatusUsuwaniaResponse(BaseModel):
+    status: str
+    zadanie_id: int
+    stan: str  # "oczekuje", "w_toku" lub "zakonczone"
+    wyzwania_ids: List[int]
+    pozostale_wyzwania: int
+    usuniete_wiersze: int
+    blad: Optional[str] = None
+    utworzono: datetime
+    rozpoczeto: Optional[datetime] = None
+    zakonczono: Optional[datetime] = None
+
+# -------------------- Pulpit (strona główna) --------------------
+
+class PulpitResponse(BaseModel):
+    status: str
+    message: str
+    # sekcje, o które klient nie prosił (?sections=), mają wartość None
+    znajomi: Optional[List[ZnajomyOut]] = None
+    pending_wyslane: Optional[List[PendingZaproszenieOut]] = None
+    pending_odebrane: Optional[List[PendingZaproszenieOut]] = None
+    wyzwania: Optional[List[WyzwanieOut]] = None
+    wyzwania_zaproszenia_odebrane: Optional[List[OdebraneZaproszenieWyzwanieOut]] = None
+    wyzwania_zaproszenia_wyslane: Optional[List[WyslaneZaproszenieWyzwanieOut]] = None
+    statystyki: Optional[StatystykiZnajomychOut] = None
@@ -0,0 +1,58 @@
+"""
+Mikrobenchmark weryfikacji haseł (bcrypt): ile logowań na sekundę daje jeden rdzeń
+i cała pula procesów z app/core/security.py przy różnych kosztach.
+
+Nie potrzebuje bazy. Uruchomienie:
+    python -m benchmarks.bench_bcrypt
+"""
+import asyncio
+import os
+import time
+
+import bcrypt
+
+from app.core import security
+
+KOSZTY = [10, 11, 12, 13]
+HASLO = "haslo-benchmarkowe"
+LOGOWANIA_NA_RDZEN = 8
+
+
+def zmierz_jeden_rdzen(hashed: bytes, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        bcrypt.checkpw(HASLO.encode("utf-8"), hashed)
+    return n / (time.perf_counter() - start)
+
+
+async def zmierz_pule(hashed: str, n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(security.sprawdz_haslo(HASLO, hashed) for _ in range(n)))
+    return n / (time.perf_counter() - start)
+
+
+async def main():
+    rdzenie = os.cpu_count() or 1
+    n = LOGOWANIA_NA_RDZEN * security.HASH_WORKERS
+    # wszystkie zlecenia naraz muszą zmieścić się w limicie kolejki
+    n = min(n, security.HASH_MAX_W_KOLEJCE)
+
+    # rozgrzanie procesów roboczych (spawn + import bcrypt)
+    await asyncio.gather(*(security.hashuj_haslo(HASLO) for _ in range(security.HASH_WORKERS)))
+
+    print(f"rdzenie: {rdzenie}, procesy robocze: {security.HASH_WORKERS}, zleceń w pomiarze puli: {n}")
+    print(f"{'koszt':>5} | {'1 rdzeń [log/s]':>16} {'ms/log':>7} | {'pula [log/s]':>13} {'na rdzeń':>9}")
+    print("-" * 60)
+    try:
+        for koszt in KOSZTY:
+            hashed = bcrypt.hashpw(HASLO.encode("utf-8"), bcrypt.gensalt(koszt))
+            jeden = zmierz_jeden_rdzen(hashed, LOGOWANIA_NA_RDZEN)
+            pula = await zmierz_pule(hashed.decode("utf-8"), n)
+            print(f"{koszt:>5} | {jeden:>16.1f} {1000 / jeden:>7.1f} | "
+                  f"{pula:>13.1f} {pula / min(rdzenie, security.HASH_WORKERS):>9.1f}")
+    finally:
+        security.zamknij_pule_hashowania()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
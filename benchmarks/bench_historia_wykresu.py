@@ -0,0 +1,270 @@
+"""
+Benchmark fn_pobierz_historie_wykresu: wersja z app/migrations (skan agregat_progresu_dziennego)
+vs pierwotna wersja, która przeliczała procent z surowego progresu dla każdej pary (uczestnik, dzień).
+
+Dla każdej kombinacji dni × uczestnicy × podzadania tworzy w transakcji sztuczne wyzwanie
+z losowym progresem, porównuje wyniki obu funkcji (muszą być identyczne) i mierzy czas.
+Na końcu transakcja jest wycofywana - baza zostaje bez zmian.
+
+Uruchomienie (zmienne DB_* jak dla backendu):
+    python -m benchmarks.bench_historia_wykresu
+"""
+import itertools
+import json
+import statistics
+import time
+
+from app.database import get_connection
+
+DNI = [7, 30, 90, 365]
+UCZESTNICY = [1, 5, 20, 50]
+PODZADANIA = [0, 3, 10]
+POWTORZENIA = 5
+
+# Pierwotne liczenie procentu z surowych tabel progresu (przed agregatem) jako funkcja tymczasowa.
+STARY_PROCENT = """
+CREATE FUNCTION pg_temp.fn_oblicz_procent_zadania_stara(
+    p_uczestnik_id INT,
+    p_zadanie_id INT,
+    p_data DATE
+)
+RETURNS INT AS $$
+DECLARE
+v_suma_wag FLOAT;
+    v_suma_wykonane FLOAT;
+    v_czy_zlozone BOOLEAN;
+    v_procent INT;
+BEGIN
+    -- 1. Sprawdzamy czy zadanie ma podzadania
+SELECT EXISTS (SELECT 1 FROM podzadania WHERE zadanie_id = p_zadanie_id)
+INTO v_czy_zlozone;
+
+IF v_czy_zlozone THEN
+        -- Logika dla zadań ZŁOŻONYCH (liczymy wagi)
+
+        -- Suma wszystkich wag
+SELECT COALESCE(SUM(waga), 0) INTO v_suma_wag
+FROM podzadania
+WHERE zadanie_id = p_zadanie_id;
+
+-- Suma wag wykonanych w danym dniu
+SELECT COALESCE(SUM(p.waga), 0) INTO v_suma_wykonane
+FROM podzadania p
+         JOIN progres_podzadania pp ON p.id = pp.podzadanie_id
+WHERE p.zadanie_id = p_zadanie_id
+  AND pp.uczestnik_id = p_uczestnik_id
+  AND pp.data::date = p_data
+          AND pp.wykonane = TRUE;
+
+IF v_suma_wag > 0 THEN
+            v_procent := ROUND((v_suma_wykonane / v_suma_wag) * 100);
+ELSE
+            v_procent := 0;
+END IF;
+
+ELSE
+        -- Logika dla zadań PROSTYCH (0% lub 100%)
+SELECT CASE WHEN EXISTS (
+    SELECT 1 FROM progres_dzienne
+    WHERE uczestnik_id = p_uczestnik_id
+      AND zadanie_id = p_zadanie_id
+      AND data::date = p_data
+        AND wykonane = TRUE
+) THEN 100 ELSE 0 END
+INTO v_procent;
+END IF;
+
+RETURN v_procent;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Poprzednia implementacja (przed przepisaniem na jedno zapytanie) jako funkcja tymczasowa.
+STARA_FUNKCJA = """
+CREATE FUNCTION pg_temp.fn_pobierz_historie_wykresu_stara(p_zadanie_id INT)
+RETURNS JSON AS $$
+DECLARE
+v_wyzwanie_id INT;
+    v_data_start TIMESTAMP;
+    v_data_koniec TIMESTAMP;
+    v_czasowe BOOLEAN;
+
+    -- Zmienne obliczone
+    v_start_calc DATE;
+    v_koniec_calc DATE;
+
+    v_min_data_progres DATE;
+    v_wynik JSON;
+BEGIN
+    -- 1. Pobieramy dane wyzwania
+SELECT w.id, w.data_start, w.data_koniec, w.czasowe
+INTO v_wyzwanie_id, v_data_start, v_data_koniec, v_czasowe
+FROM wyzwania w
+         JOIN zadania_dzienne zd ON w.id = zd.wyzwanie_id
+WHERE zd.id = p_zadanie_id;
+
+-- 2. Ustalanie daty KOŃCOWEJ
+IF v_czasowe AND v_data_koniec IS NOT NULL AND v_data_koniec < NOW() THEN
+        v_koniec_calc := v_data_koniec::date;
+ELSE
+        v_koniec_calc := CURRENT_DATE;
+END IF;
+
+    -- 3. Ustalanie daty STARTOWEJ
+    IF v_czasowe AND v_data_start IS NOT NULL THEN
+        v_start_calc := v_data_start::date;
+ELSE
+SELECT MIN(data::date) INTO v_min_data_progres
+FROM progres_dzienne
+WHERE zadanie_id = p_zadanie_id;
+
+v_start_calc := COALESCE(v_min_data_progres, CURRENT_DATE);
+
+        DECLARE
+v_min_data_podzadania DATE;
+BEGIN
+SELECT MIN(pp.data::date) INTO v_min_data_podzadania
+FROM progres_podzadania pp
+         JOIN podzadania p ON p.id = pp.podzadanie_id
+WHERE p.zadanie_id = p_zadanie_id;
+
+v_start_calc := LEAST(COALESCE(v_start_calc, 'infinity'::date), COALESCE(v_min_data_podzadania, 'infinity'::date));
+
+            IF v_start_calc = 'infinity'::date THEN
+                v_start_calc := CURRENT_DATE;
+END IF;
+END;
+END IF;
+
+    -- 4. Generowanie JSON
+SELECT json_agg(
+               json_build_object(
+                       'uczestnik_id', t.uczestnik_id,
+                       'nazwa_uzytkownika', t.nazwa_uzytkownika,
+                       'punkty', t.punkty_historia
+               )
+       ) INTO v_wynik
+FROM (
+         SELECT
+             uw.id AS uczestnik_id,
+             u.nazwa_uzytkownika,
+             (
+                 SELECT json_agg(
+                                json_build_object(
+                                        'data', to_char(d.dzien, 'YYYY-MM-DD'),
+                                        'procent', pg_temp.fn_oblicz_procent_zadania_stara(uw.id, p_zadanie_id, d.dzien::date)
+                                ) ORDER BY d.dzien
+                        )
+                 FROM generate_series(
+                              v_start_calc,
+                              v_koniec_calc,
+                              '1 day'::interval
+                      ) AS d(dzien)
+             ) AS punkty_historia
+         FROM uczestnicy_wyzwan uw
+                  JOIN uzytkownicy u ON u.id = uw.uzytkownik_id
+         WHERE uw.wyzwanie_id = v_wyzwanie_id
+           AND uw.zaakceptowane = TRUE
+     ) t;
+
+RETURN COALESCE(v_wynik, '[]'::json);
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def przygotuj_wyzwanie(cur, dni, uczestnicy, podzadania):
+    """Tworzy wyzwanie z jednym zadaniem dziennym i losowym progresem. Zwraca id zadania."""
+    cur.execute("""
+                INSERT INTO uzytkownicy (nazwa_uzytkownika, email, hashed_haslo)
+                SELECT 'bench_' || md5(random()::text), md5(random()::text) || '@bench.pl', 'x'
+                FROM generate_series(1, %s)
+                RETURNING id
+                """, (uczestnicy,))
+    user_ids = [r[0] for r in cur.fetchall()]
+
+    cur.execute("""
+                INSERT INTO wyzwania (nazwa, czasowe, data_start, data_koniec, autor_id)
+                VALUES ('benchmark', TRUE, CURRENT_DATE - %s, CURRENT_DATE, %s)
+                RETURNING id
+                """, (dni - 1, user_ids[0]))
+    wyzwanie_id = cur.fetchone()[0]
+
+    cur.execute("""
+                INSERT INTO uczestnicy_wyzwan (wyzwanie_id, uzytkownik_id, zaakceptowane)
+                SELECT %s, uid, TRUE FROM unnest(%s::int[]) AS uid
+                """, (wyzwanie_id, user_ids[1:]))
+
+    cur.execute("""
+                INSERT INTO zadania_dzienne (wyzwanie_id, nazwa) VALUES (%s, 'bench') RETURNING id
+                """, (wyzwanie_id,))
+    zadanie_id = cur.fetchone()[0]
+
+    if podzadania:
+        cur.execute("""
+                    INSERT INTO podzadania (zadanie_id, nazwa, waga)
+                    SELECT %s, 'bench ' || n, 1 + (n %% 3) FROM generate_series(1, %s) AS n
+                    """, (zadanie_id, podzadania))
+        cur.execute("""
+                    INSERT INTO progres_podzadania (uczestnik_id, podzadanie_id, data, wykonane)
+                    SELECT uw.id, p.id, d, random() < 0.6
+                    FROM uczestnicy_wyzwan uw
+                             JOIN podzadania p ON p.zadanie_id = %s
+                             CROSS JOIN generate_series(CURRENT_DATE - %s, CURRENT_DATE, '1 day'::interval) AS d
+                    WHERE uw.wyzwanie_id = %s AND random() < 0.8
+                    """, (zadanie_id, dni - 1, wyzwanie_id))
+    else:
+        cur.execute("""
+                    INSERT INTO progres_dzienne (uczestnik_id, zadanie_id, data, wykonane)
+                    SELECT uw.id, %s, d, random() < 0.6
+                    FROM uczestnicy_wyzwan uw
+                             CROSS JOIN generate_series(CURRENT_DATE - %s, CURRENT_DATE, '1 day'::interval) AS d
+                    WHERE uw.wyzwanie_id = %s AND random() < 0.8
+                    """, (zadanie_id, dni - 1, wyzwanie_id))
+
+    return zadanie_id
+
+
+def zmierz(cur, funkcja, zadanie_id):
+    czasy = []
+    wynik = None
+    for _ in range(POWTORZENIA):
+        start = time.perf_counter()
+        cur.execute(f"SELECT {funkcja}(%s)::text", (zadanie_id,))
+        wynik = cur.fetchone()[0]
+        czasy.append(time.perf_counter() - start)
+    return statistics.median(czasy), json.loads(wynik)
+
+
+def main():
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT setseed(0.42)")
+            cur.execute(STARY_PROCENT)
+            cur.execute(STARA_FUNKCJA)
+
+            print(f"{'dni':>5} {'ucz.':>5} {'podz.':>5} | {'stara [ms]':>11} {'nowa [ms]':>10} {'x':>7}")
+            print("-" * 52)
+            for dni, uczestnicy, podzadania in itertools.product(DNI, UCZESTNICY, PODZADANIA):
+                cur.execute("SAVEPOINT bench")
+                zadanie_id = przygotuj_wyzwanie(cur, dni, uczestnicy, podzadania)
+
+                t_stara, w_stara = zmierz(cur, "pg_temp.fn_pobierz_historie_wykresu_stara", zadanie_id)
+                t_nowa, w_nowa = zmierz(cur, "fn_pobierz_historie_wykresu", zadanie_id)
+
+                # stara wersja nie sortowała uczestników - porównujemy po uczestnik_id
+                klucz = lambda h: h["uczestnik_id"]
+                if sorted(w_stara, key=klucz) != sorted(w_nowa, key=klucz):
+                    raise AssertionError(f"Różne wyniki dla dni={dni} uczestnicy={uczestnicy} podzadania={podzadania}")
+
+                print(f"{dni:>5} {uczestnicy:>5} {podzadania:>5} | "
+                      f"{t_stara * 1000:>11.2f} {t_nowa * 1000:>10.2f} {t_stara / t_nowa:>6.1f}x")
+                cur.execute("ROLLBACK TO SAVEPOINT bench")
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Mikrobenchmark serializacji odpowiedzi: czas CPU na request w starej ścieżce
+(model Pydantic na wiersz + walidacja response_model + serializacja jak w FastAPI)
+i w nowej (app/core/odpowiedzi.py: gotowy JSON z bazy / słowniki przez orjson).
+
+Przy okazji sprawdza, że obie ścieżki dają ten sam JSON - szybka ścieżka pomija
+walidację, więc kształt musi się zgadzać z response_model (schematy OpenAPI).
+
+Nie potrzebuje bazy - wiersze i JSON z fn_get_wyzwanie_json są generowane. Uruchomienie:
+    python -m benchmarks.bench_serializacja
+"""
+import json
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.core.odpowiedzi import odpowiedz_json, koperta_json
+from app.routers.wyzwania import _wyzwanie_out
+
+POWTORZENIA = 300
+LICZBA_WYZWAN = [10, 100, 500]
+# rozmiary wyzwania: (uczestnicy, zadania, podzadania na zadanie)
+ROZMIARY_WYZWANIA = [(5, 3, 3), (20, 10, 5), (50, 30, 8)]
+
+
+def wiersze_wyzwan(n: int):
+    start = datetime(2025, 1, 1, 8, 30)
+    return [
+        (i, f"Wyzwanie {i}", f"Opis wyzwania numer {i}" if i % 3 else None, i % 2 == 0,
+         start + timedelta(days=i), start + timedelta(days=i + 30) if i % 2 == 0 else None, 1 + i % 17)
+        for i in range(n, 0, -1)
+    ]
+
+
+def json_wyzwania(uczestnicy: int, zadania: int, podzadania: int) -> str:
+    """Tekst w formacie fn_get_wyzwanie_json (tak jak zwraca go `::text`)."""
+    return json.dumps({
+        "id": 1, "nazwa": "Wyzwanie", "opis": "Opis", "czasowe": True,
+        "data_start": "2025-01-01T00:00:00", "data_koniec": "2025-02-01T00:00:00", "autor_id": 1,
+        "zarchiwizowane": False,
+        "uczestnicy": [{"id": u, "nazwa_uzytkownika": f"uzytkownik_{u}", "zaakceptowane": u % 4 != 0}
+                       for u in range(1, uczestnicy + 1)],
+        "zadania_dzienne": [
+            {"id": z, "nazwa": f"Zadanie {z}", "opis": None,
+             "podzadania": [{"id": z * 100 + p, "nazwa": f"Podzadanie {p}", "wymagane": True, "waga": 1.5}
+                            for p in range(podzadania)]}
+            for z in range(1, zadania + 1)
+        ],
+    }, separators=(",", ":"))
+
+
+def jak_fastapi(model, adapter: TypeAdapter) -> bytes:
+    """Stara ścieżka po zwróceniu modelu: walidacja response_model, dump i JSONResponse.render."""
+    wartosc = adapter.validate_python(model.model_dump())
+    return json.dumps(adapter.dump_python(wartosc, mode="json"), ensure_ascii=False,
+                      allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def czas_cpu(funkcja) -> float:
+    """Średni czas CPU jednego wywołania w mikrosekundach."""
+    funkcja()
+    start = time.process_time()
+    for _ in range(POWTORZENIA):
+        funkcja()
+    return (time.process_time() - start) / POWTORZENIA * 1e6
+
+
+def porownaj(nazwa: str, stara, nowa):
+    a, b = stara(), nowa()
+    if json.loads(a) != orjson.loads(b):
+        raise SystemExit(f"❌ {nazwa}: różne odpowiedzi starej i nowej ścieżki")
+    t_stara, t_nowa = czas_cpu(stara), czas_cpu(nowa)
+    print(f"{nazwa:<32} | {len(b):>9} | {t_stara:>10.1f} | {t_nowa:>10.1f} | {t_stara / t_nowa:>6.1f}x")
+
+
+def main():
+    print(f"{'endpoint':<32} | {'bajty':>9} | {'stara [µs]':>10} | {'nowa [µs]':>10} | {'zysk':>7}")
+    print("-" * 82)
+
+    adapter_lista = TypeAdapter(schemas.WyzwaniaResponse)
+    for n in LICZBA_WYZWAN:
+        wiersze = wiersze_wyzwan(n)
+
+        def stara():
+            return jak_fastapi(schemas.WyzwaniaResponse(
+                message="Wszystkie wyzwania użytkownika", status="success",
+                data=[schemas.WyzwanieOut(**_wyzwanie_out(w)) for w in wiersze], next_after_id=None,
+            ), adapter_lista)
+
+        def nowa():
+            return odpowiedz_json({
+                "message": "Wszystkie wyzwania użytkownika", "status": "success",
+                "data": [_wyzwanie_out(w) for w in wiersze], "next_after_id": None,
+            }).body
+
+        porownaj(f"GET /wyzwania/ ({n} wierszy)", stara, nowa)
+
+    adapter_wyzwanie = TypeAdapter(schemas.WyzwanieResponse)
+    for uczestnicy, zadania, podzadania in ROZMIARY_WYZWANIA:
+        tekst = json_wyzwania(uczestnicy, zadania, podzadania)
+
+        def stara():
+            # psycopg2 parsuje kolumnę json, potem model i walidacja response_model
+            return jak_fastapi(schemas.WyzwanieResponse(status="success", data=json.loads(tekst)),
+                               adapter_wyzwanie)
+
+        def nowa():
+            return koperta_json(tekst)
+
+        porownaj(f"GET /wyzwania/{{id}} ({uczestnicy}u/{zadania}z)", stara, nowa)
+
+
+if __name__ == "__main__":
+    main()
@@ -107,14 +107,14 @@ export default function Home() {
             const token = localStorage.getItem("token");
             if (!token) return;
 
-            const res = await fetch("http://127.0.0.1:8000/znajomi/statystyki", {
+            const res = await fetch("http://127.0.0.1:8000/home/?sections=statystyki", {
                 headers: { Authorization: `Bearer ${token}` },
             });
 
             if (!res.ok) return;
 
-            const data: Statystyki = await res.json();
-            setStatystyki(data);
+            const data: { statystyki: Statystyki } = await res.json();
+            setStatystyki(data.statystyki);
         } catch (err) {
             console.error("Błąd pobierania statystyk:", err);
         }
@@ -131,49 +131,28 @@ export default function Home() {
                 }
                 const headers: HeadersInit = { Authorization: `Bearer ${token}` };
 
-                // Pobierz wszystkich znajomych
-                const [
-                    znajomiRes,
-                    wyslaneRes,
-                    odebraneRes,
-                    wyzwaniaRes,
-                    wyzwaniaZapOdebraneRes,
-                    wyzwaniaZapWyslaneRes,
-                ] = await Promise.all([
-                    fetch("http://127.0.0.1:8000/znajomi/wszyscy", { headers }),
-                    fetch("http://127.0.0.1:8000/znajomi/pending/wyslane", { headers }),
-                    fetch("http://127.0.0.1:8000/znajomi/pending/odebrane", { headers }),
-                    fetch("http://127.0.0.1:8000/wyzwania/", { headers }),
-                    fetch("http://127.0.0.1:8000/wyzwania/zaproszenia/odebrane", { headers }),
-                    fetch("http://127.0.0.1:8000/wyzwania/zaproszenia/wyslane", { headers }),
-                ]);
-
-                if ([znajomiRes, wyslaneRes, odebraneRes, wyzwaniaRes, wyzwaniaZapOdebraneRes, wyzwaniaZapWyslaneRes].some(r => r.status === 403)) {
+                // Wszystkie sekcje strony głównej jednym requestem
+                const res = await fetch("http://127.0.0.1:8000/home/", { headers });
+
+                if (res.status === 401 || res.status === 403) {
                     alert("Twoja sesja wygasła. Zaloguj się ponownie.");
                     localStorage.removeItem("token");
                     navigate("/logowanie");
                     return;
                 }
+                if (!res.ok) return;
 
-                const [znajomi, pending_wyslane, pending_odebrane, wyzwania, wyzwania_zaproszenia_odebrane, wyzwania_zaproszenia_wyslane] =
-                    await Promise.all([
-                        znajomiRes.json(),
-                        wyslaneRes.json(),
-                        odebraneRes.json(),
-                        wyzwaniaRes.json(),
-                        wyzwaniaZapOdebraneRes.json(),
-                        wyzwaniaZapWyslaneRes.json(),
-                    ]);
+                const pulpit = await res.json();
 
                 setHomeData({
-                    znajomi: Array.isArray(znajomi) ? znajomi : [],
-                    pending_wyslane: Array.isArray(pending_wyslane) ? pending_wyslane : [],
-                    pending_odebrane: Array.isArray(pending_odebrane) ? pending_odebrane : [],
-                    wyzwania: wyzwania?.data || [],
-                    wyzwania_zaproszenia_odebrane: wyzwania_zaproszenia_odebrane?.data || [],
-                    wyzwania_zaproszenia_wyslane: wyzwania_zaproszenia_wyslane?.data || [],
+                    znajomi: pulpit.znajomi ?? [],
+                    pending_wyslane: pulpit.pending_wyslane ?? [],
+                    pending_odebrane: pulpit.pending_odebrane ?? [],
+                    wyzwania: pulpit.wyzwania ?? [],
+                    wyzwania_zaproszenia_odebrane: pulpit.wyzwania_zaproszenia_odebrane ?? [],
+                    wyzwania_zaproszenia_wyslane: pulpit.wyzwania_zaproszenia_wyslane ?? [],
                 });
-                await updateStatystyki();
+                if (pulpit.statystyki) setStatystyki(pulpit.statystyki);
 
             } catch (err) {
                 console.error("Błąd fetch:", err);
@@ -182,6 +161,59 @@ export default function Home() {
         fetchHomeData().catch(err => console.error(err));
     }, [navigate]);
 
+    // === Zaproszenia na żywo (SSE) - zamiast odpytywania co chwilę ===
+    useEffect(() => {
+        const token = localStorage.getItem("token");
+        if (!token) return;
+
+        const odswiezSekcje = async (sekcje: string[]) => {
+            try {
+                const res = await fetch(`http://127.0.0.1:8000/home/?sections=${sekcje.join(",")}`, {
+                    headers: { Authorization: `Bearer ${token}` },
+                });
+                if (!res.ok) return;
+                const pulpit = await res.json();
+                setHomeData(prev => {
+                    const next = { ...prev };
+                    sekcje.forEach(s => {
+                        if (s in next && pulpit[s]) (next as any)[s] = pulpit[s];
+                    });
+                    return next;
+                });
+                if (pulpit.statystyki) setStatystyki(pulpit.statystyki);
+            } catch (err) {
+                console.error("Błąd odświeżania pulpitu:", err);
+            }
+        };
+
+        const sekcjeZdarzen: Record<string, string[]> = {
+            zaproszenie_znajomego: ["pending_odebrane", "statystyki"],
+            zaproszenie_znajomego_status: ["znajomi", "pending_wyslane", "pending_odebrane", "statystyki"],
+            zaproszenie_wyzwania: ["wyzwania_zaproszenia_odebrane"],
+            zaproszenie_wyzwania_status: ["wyzwania", "wyzwania_zaproszenia_odebrane", "wyzwania_zaproszenia_wyslane"],
+            resync: ["znajomi", "pending_wyslane", "pending_odebrane", "wyzwania",
+                     "wyzwania_zaproszenia_odebrane", "wyzwania_zaproszenia_wyslane", "statystyki"],
+        };
+
+        // Po wznowieniu serwer doczytuje też zdarzenia sprzed Last-Event-ID (późno zatwierdzone
+        // transakcje) - już obsłużone pomijamy po id.
+        const widziane = new Set<string>();
+        const zrodlo = new EventSource(`http://127.0.0.1:8000/events?token=${encodeURIComponent(token)}`);
+        Object.entries(sekcjeZdarzen).forEach(([typ, sekcje]) => {
+            zrodlo.addEventListener(typ, (e) => {
+                const id = (e as MessageEvent).lastEventId;
+                if (id) {
+                    if (widziane.has(id)) return;
+                    widziane.add(id);
+                    if (widziane.size > 1000) widziane.delete(widziane.values().next().value as string);
+                }
+                odswiezSekcje(sekcje);
+            });
+        });
+
+        return () => zrodlo.close();
+    }, []);
+
     // === Wyszukiwanie znajomych ===
     const handleInputChange = async (e: ChangeEvent<HTMLInputElement>) => {
         const query = e.target.value;
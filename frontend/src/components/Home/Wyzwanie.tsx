@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from "react";
+import React, { useEffect, useState, useMemo, useRef } from "react";
 import {
     LineChart,
     Line,
@@ -188,6 +188,8 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
     const [progresZadania, setProgresZadania] = useState<Record<number, boolean>>({});
     const [wykresData, setWykresData] = useState<Record<number, any[]>>({});
     const [uczestnikColors, setUczestnikColors] = useState<Record<number, string>>({});
+    // 'znacznik' z ostatniej odpowiedzi /historia - kolejne odświeżenia pobierają tylko zmienione dni
+    const historiaZnacznik = useRef<string | null>(null);
 
     // Generowanie kolorów
     useEffect(() => {
@@ -246,6 +248,77 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
         }
     };
 
+    // Buduje dane wykresu (pełny zakres dat, zera dla brakujących dni) z historii jednego zadania
+    const buildChartData = (historia: any[]) => {
+        const today = getLocalToday();
+        const allUsers = uczestnicyAktywni.map(u => u.nazwa_uzytkownika);
+
+        // Zbieramy daty z API i normalizujemy je
+        const apiDates: string[] = [];
+        historia.forEach((u: any) => {
+            u.punkty.forEach((p: any) => apiDates.push(normalizeDate(p.data)));
+        });
+        apiDates.sort();
+
+        // Normalizujemy daty wyzwania
+        const wyzStart = normalizeDate(wyzwanie.data_start);
+        const wyzEnd = normalizeDate(wyzwanie.data_koniec);
+
+        // Ustalanie zakresu
+        const startDate = (wyzwanie.czasowe && wyzStart)
+            ? wyzStart
+            : (apiDates.length > 0 ? apiDates[0] : today);
+
+        let endDate = today;
+        if (wyzwanie.czasowe && wyzEnd) {
+            endDate = (wyzEnd < today) ? wyzEnd : today;
+        }
+
+        const pointsMap: Record<string, any> = {};
+        generateDateRange(startDate, endDate).forEach(dateStr => {
+            pointsMap[dateStr] = { date: dateStr };
+            allUsers.forEach(user => {
+                pointsMap[dateStr][user] = 0;
+            });
+        });
+
+        // Wypełnianie danymi z API (daty normalizujemy przed szukaniem w mapie)
+        historia.forEach((u: any) => {
+            u.punkty.forEach((p: any) => {
+                const apiDate = normalizeDate(p.data);
+                if (pointsMap[apiDate]) {
+                    pointsMap[apiDate][u.nazwa_uzytkownika] = p.procent;
+                }
+            });
+        });
+
+        return Object.values(pointsMap);
+    };
+
+    // Nakłada zmienione dni (tryb since=) na istniejące dane wykresu
+    const mergeChartData = (current: any[], historia: any[]) => {
+        const allUsers = uczestnicyAktywni.map(u => u.nazwa_uzytkownika);
+        const pointsMap: Record<string, any> = {};
+        current.forEach(point => {
+            pointsMap[point.date] = { ...point };
+        });
+
+        historia.forEach((u: any) => {
+            u.punkty.forEach((p: any) => {
+                const apiDate = normalizeDate(p.data);
+                if (!pointsMap[apiDate]) {
+                    pointsMap[apiDate] = { date: apiDate };
+                    allUsers.forEach(user => {
+                        pointsMap[apiDate][user] = 0;
+                    });
+                }
+                pointsMap[apiDate][u.nazwa_uzytkownika] = p.procent;
+            });
+        });
+
+        return Object.values(pointsMap).sort((a: any, b: any) => a.date.localeCompare(b.date));
+    };
+
     // Fetch danych
     useEffect(() => {
         const token = localStorage.getItem("token");
@@ -256,104 +329,41 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
             const zadaniaProgress: Record<number, boolean> = {};
             const wykresy: Record<number, any[]> = {};
 
-            const allUsers = uczestnicyAktywni.map(u => u.nazwa_uzytkownika);
-
-            for (const zd of wyzwanie.zadania_dzienne ?? []) {
-                // 1. Podzadania
-                for (const pz of zd.podzadania ?? []) {
-                    try {
-                        const res = await fetch(
-                            `http://127.0.0.1:8000/wyzwania/progres/podzadania/${pz.id}`,
-                            { headers: { Authorization: `Bearer ${token}` } }
-                        );
-                        const json = await res.json();
-                        if (json.status === "success") {
-                            podzadaniaProgress[pz.id] = json.wykonane;
-                        }
-                    } catch (e) {
-                        console.error(e);
-                    }
-                }
-
-                // 2. Zadania dzienne
-                if (!(zd.podzadania?.length)) {
-                    try {
-                        const res = await fetch(
-                            `http://127.0.0.1:8000/wyzwania/progres/dzienne/${zd.id}`,
-                            { headers: { Authorization: `Bearer ${token}` } }
-                        );
-                        const json = await res.json();
-                        if (json.wykonane !== undefined) {
-                            zadaniaProgress[zd.id] = json.wykonane;
-                        } else if (json.status === "success") {
-                            zadaniaProgress[zd.id] = json.wykonane;
-                        }
-                    } catch (e) {
-                        console.error(e);
-                    }
-                }
-
-                // 3. Wykresy (POPRAWIONA LOGIKA)
-                try {
-                    const res = await fetch(
-                        `http://127.0.0.1:8000/wyzwania/progres/dzienne/historia/wszystkie/${zd.id}`,
-                        { headers: { Authorization: `Bearer ${token}` } }
-                    );
-                    const json = await res.json();
-
-                    if (json.status === "success") {
-                        const today = getLocalToday();
-
-                        // Zbieramy daty z API i normalizujemy je
-                        let apiDates: string[] = [];
-                        json.historia.forEach((u: any) => {
-                            u.punkty.forEach((p: any) => {
-                                apiDates.push(normalizeDate(p.data));
-                            });
-                        });
-                        apiDates.sort();
-
-                        // Normalizujemy daty wyzwania
-                        const wyzStart = normalizeDate(wyzwanie.data_start);
-                        const wyzEnd = normalizeDate(wyzwanie.data_koniec);
-
-                        // Ustalanie zakresu
-                        const startDate = (wyzwanie.czasowe && wyzStart)
-                            ? wyzStart
-                            : (apiDates.length > 0 ? apiDates[0] : today);
-
-                        let endDate = today;
-                        if (wyzwanie.czasowe && wyzEnd) {
-                            endDate = (wyzEnd < today) ? wyzEnd : today;
-                        }
-
-                        // Generowanie mapy (teraz daty będą pasować)
-                        const fullDateRange = generateDateRange(startDate, endDate);
-                        const pointsMap: Record<string, any> = {};
-
-                        fullDateRange.forEach(dateStr => {
-                            pointsMap[dateStr] = { date: dateStr };
-                            allUsers.forEach(user => {
-                                pointsMap[dateStr][user] = 0;
-                            });
-                        });
-
-                        // Wypełnianie danymi z API
-                        json.historia.forEach((u: any) => {
-                            u.punkty.forEach((p: any) => {
-                                // TU JEST FIX: normalizujemy datę z API przed szukaniem w mapie
-                                const apiDate = normalizeDate(p.data);
-                                if (pointsMap[apiDate]) {
-                                    pointsMap[apiDate][u.nazwa_uzytkownika] = p.procent;
-                                }
-                            });
+            // 1-2. Stan wszystkich podzadań i zadań dziennych - jedno zapytanie dla całego wyzwania
+            try {
+                const res = await fetch(
+                    `http://127.0.0.1:8000/wyzwania/${wyzwanie.id}/progres`,
+                    { headers: { Authorization: `Bearer ${token}` } }
+                );
+                const json = await res.json();
+                if (json.status === "success") {
+                    json.zadania.forEach((z: any) => {
+                        zadaniaProgress[z.zadanie_id] = z.wykonane;
+                        z.podzadania.forEach((p: any) => {
+                            podzadaniaProgress[p.podzadanie_id] = p.wykonane;
                         });
+                    });
+                }
+            } catch (e) {
+                console.error(e);
+            }
 
-                        wykresy[zd.id] = Object.values(pointsMap);
-                    }
-                } catch (e) {
-                    console.error(e);
+            // 3. Wykresy wszystkich zadań - jedno zapytanie dla całego wyzwania
+            try {
+                const res = await fetch(
+                    `http://127.0.0.1:8000/wyzwania/${wyzwanie.id}/historia`,
+                    { headers: { Authorization: `Bearer ${token}` } }
+                );
+                const json = await res.json();
+
+                if (json.status === "success") {
+                    historiaZnacznik.current = json.znacznik;
+                    json.zadania.forEach((z: any) => {
+                        wykresy[z.zadanie_id] = buildChartData(z.historia);
+                    });
                 }
+            } catch (e) {
+                console.error(e);
             }
 
             setProgresPodzadania(podzadaniaProgress);
@@ -364,9 +374,9 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
         fetchProgressAndCharts().then(() => {
             console.log('Charts updated');
         });
-    }, [wyzwanie.zadania_dzienne, wyzwanie.czasowe, wyzwanie.data_start, wyzwanie.data_koniec, uczestnicyAktywni]);
+    }, [wyzwanie.id, wyzwanie.zadania_dzienne, wyzwanie.czasowe, wyzwanie.data_start, wyzwanie.data_koniec, uczestnicyAktywni]);
 
-    const refreshChart = async (zadanieId: number) => {
+    const refreshCharts = async () => {
         const token = localStorage.getItem("token");
         if (!token) return;
 
@@ -381,65 +391,80 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
                 }
             }
 
-            let endDate = today;
-            if (wyzwanie.czasowe && wyzEnd) {
-                endDate = (wyzEnd < today) ? wyzEnd : today;
-            }
-
+            // Tylko dni zmienione od ostatniego pobrania (przez nas lub innych uczestników)
+            const since = historiaZnacznik.current
+                ? `?since=${encodeURIComponent(historiaZnacznik.current)}`
+                : "";
             const res = await fetch(
-                `http://127.0.0.1:8000/wyzwania/progres/dzienne/historia/wszystkie/${zadanieId}`,
+                `http://127.0.0.1:8000/wyzwania/${wyzwanie.id}/historia${since}`,
                 { headers: { Authorization: `Bearer ${token}` } }
             );
             const json = await res.json();
 
             if (json.status === "success") {
-                const allUsers = uczestnicyAktywni.map(u => u.nazwa_uzytkownika);
-
-                let apiDates: string[] = [];
-                json.historia.forEach((u: any) => {
-                    u.punkty.forEach((p: any) => apiDates.push(normalizeDate(p.data)));
-                });
-                apiDates.sort();
-
-                const lastApiDate = apiDates.length > 0 ? apiDates[apiDates.length - 1] : null;
-
-                const wyzStart = normalizeDate(wyzwanie.data_start);
-                const startDate = (wyzwanie.czasowe && wyzStart)
-                    ? wyzStart
-                    : (apiDates.length > 0 ? apiDates[0] : today);
-
-                if (lastApiDate && lastApiDate > endDate) {
-                    alert(`Uwaga: Wykres nie został zaktualizowany.\n\nData wykonania zadania (${lastApiDate}) wykracza poza datę zakończenia wyzwania (${endDate}).`);
-                    return;
-                }
-
-                const fullDateRange = generateDateRange(startDate, endDate);
-                const pointsMap: Record<string, any> = {};
-
-                fullDateRange.forEach(dateStr => {
-                    pointsMap[dateStr] = { date: dateStr };
-                    allUsers.forEach(user => {
-                        pointsMap[dateStr][user] = 0;
-                    });
-                });
-
-                json.historia.forEach((u: any) => {
-                    u.punkty.forEach((p: any) => {
-                        // FIX: Normalizacja daty z API
-                        const apiDate = normalizeDate(p.data);
-                        if (pointsMap[apiDate]) {
-                            pointsMap[apiDate][u.nazwa_uzytkownika] = p.procent;
-                        }
+                historiaZnacznik.current = json.znacznik;
+                setWykresData(prev => {
+                    const next = { ...prev };
+                    json.zadania.forEach((z: any) => {
+                        next[z.zadanie_id] = since
+                            ? mergeChartData(prev[z.zadanie_id] ?? [], z.historia)
+                            : buildChartData(z.historia);
                     });
+                    return next;
                 });
-
-                setWykresData(prev => ({ ...prev, [zadanieId]: Object.values(pointsMap) }));
             }
         } catch (e) {
             console.error(e);
         }
     };
 
+    // Postęp innych uczestników na żywo: zdarzenie z WebSocketu -> przyrostowe odświeżenie wykresów
+    const refreshChartsRef = useRef(refreshCharts);
+    refreshChartsRef.current = refreshCharts;
+
+    useEffect(() => {
+        const token = localStorage.getItem("token");
+        if (!token) return;
+
+        let ws: WebSocket | null = null;
+        let odswiezTimer: ReturnType<typeof setTimeout> | undefined;
+        let ponowTimer: ReturnType<typeof setTimeout> | undefined;
+        let zamkniety = false;
+        // kolejne próby, w których połączenie w ogóle nie powstało (np. serwer odrzuca handshake)
+        let nieudanePolaczenia = 0;
+
+        const polacz = () => {
+            let otwarte = false;
+            ws = new WebSocket(`ws://127.0.0.1:8000/ws/wyzwania/${wyzwanie.id}?token=${encodeURIComponent(token)}`);
+            ws.onopen = () => {
+                otwarte = true;
+                nieudanePolaczenia = 0;
+            };
+            ws.onmessage = (e) => {
+                const msg = JSON.parse(e.data);
+                if (msg.typ !== "progres") return;
+                // kilka kliknięć pod rząd = jedno odświeżenie
+                clearTimeout(odswiezTimer);
+                odswiezTimer = setTimeout(() => refreshChartsRef.current(), 300);
+            };
+            ws.onclose = (e) => {
+                if (!otwarte) nieudanePolaczenia += 1;
+                // 1008 = brak dostępu - nie ponawiamy; po 5 nieudanych próbach z rzędu też nie
+                if (!zamkniety && e.code !== 1008 && nieudanePolaczenia < 5) {
+                    ponowTimer = setTimeout(polacz, 3000 * Math.max(1, nieudanePolaczenia));
+                }
+            };
+        };
+        polacz();
+
+        return () => {
+            zamkniety = true;
+            clearTimeout(odswiezTimer);
+            clearTimeout(ponowTimer);
+            ws?.close();
+        };
+    }, [wyzwanie.id]);
+
     const toggleProgresPodzadania = async (podzadanieId: number, current: boolean) => {
         const token = localStorage.getItem("token");
         if (!token) return;
@@ -468,8 +493,7 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
                 return;
             }
 
-            const zadanie = wyzwanie.zadania_dzienne?.find(z => z.podzadania?.some(p => p.id === podzadanieId));
-            if (zadanie) await refreshChart(zadanie.id);
+            await refreshCharts();
         } catch (e) {
             console.error(e);
             alert("Błąd połączenia z serwerem.");
@@ -503,7 +527,7 @@ const Wyzwanie: React.FC<Props> = ({ wyzwanie, onClose }) => {
                 setProgresZadania(prev => ({ ...prev, [zadanieId]: current }));
                 return;
             }
-            await refreshChart(zadanieId);
+            await refreshCharts();
         } catch (e) {
             console.error(e);
             alert("Błąd połączenia z serwerem.");